@@ -0,0 +1,310 @@
+"""Load generator
+
+Sends mix of POST image, GET image and GET log requests to locally started
+server and reports latency histograms, percentiles and errors.
+
+    Modes:
+
+        * open - requests are started at constant arrival rate regardless of
+          responses, latency is measured from scheduled start time so server
+          stalls are not hidden (coordinated omission)
+        * closed - fixed number of workers send requests back to back,
+          latency is corrected by adding samples for requests that would
+          have been sent during long responses at expected interval
+
+    Example:
+
+        python ./dev/scripts/requests/load.py --mode open --rate 50 --duration 60 --mix post=1,get=8,log=1
+"""
+
+import sys
+import time
+import math
+import random
+import asyncio
+import argparse
+import mimetypes
+from pathlib import Path
+from collections import Counter
+from typing import Dict, List, Optional
+
+import aiohttp
+
+PROJECT_ROOT = Path(__file__).parents[3]
+SCRIPT_ROOT = Path(__file__).parent
+PERCENTILES = (50, 90, 99, 99.9, 100)
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of latencies with bounded relative error
+
+    Attributes
+    ----------
+    precision : float
+        Relative bucket width
+    lowest : float
+        Lowest distinguishable latency in seconds
+    """
+    def __init__(self, precision: float = .01, lowest: float = 1e-5):
+        self.precision = precision
+        self.lowest = lowest
+        self.counts = Counter()
+        self.total = 0
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        return int(math.log(max(value, self.lowest) / self.lowest) / math.log1p(self.precision))
+
+    def _value(self, index: int) -> float:
+        return self.lowest * (1 + self.precision) ** (index + 1)
+
+    def record(self, value: float, expected_interval: Optional[float] = None) -> None:
+        """Add latency sample
+
+        Parameters
+        ----------
+        value : float
+            Latency in seconds
+        expected_interval : float
+            If provided, samples for requests delayed by this one are added
+        """
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.max = max(self.max, value)
+        if expected_interval:
+            missing = value - expected_interval
+            while missing >= expected_interval:
+                self.counts[self._index(missing)] += 1
+                self.total += 1
+                missing -= expected_interval
+
+    def percentile(self, p: float) -> float:
+        """Latency at percentile
+
+        Parameters
+        ----------
+        p : float
+            Percentile in range 0 - 100
+
+        Returns
+        -------
+        float
+            Latency in seconds
+        """
+        if not self.total:
+            return 0.0
+        if p >= 100:
+            return self.max
+        rank = math.ceil(self.total * p / 100)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value(index), self.max)
+        return self.max
+
+    def render(self, width: int = 40, rows: int = 12) -> List[str]:
+        """Text histogram with logarithmic latency ranges
+
+        Parameters
+        ----------
+        width : int
+            Bar width
+        rows : int
+            Number of ranges
+
+        Returns
+        -------
+        List[str]
+            Histogram lines
+        """
+        if not self.total:
+            return []
+        low, high = min(self.counts), max(self.counts) + 1
+        step = max(1, math.ceil((high - low) / rows))
+        ranges = []
+        for start in range(low, high, step):
+            ranges.append((start, sum(self.counts[i] for i in range(start, start + step))))
+        peak = max(count for _, count in ranges)
+        return [f'{self._value(start - 1) * 1000:10.2f} ms | {"#" * round(width * count / peak):<{width}} {count}'
+                for start, count in ranges]
+
+
+class Stats:
+    """
+    Collected results of load run per operation
+    """
+    def __init__(self):
+        self.service = {}
+        self.response = {}
+        self.errors = Counter()
+        self.statuses = Counter()
+
+    def record(self, op: str, scheduled: float, started: float, finished: float,
+               status: Optional[int], error: Optional[str], expected_interval: Optional[float]) -> None:
+        self.service.setdefault(op, LatencyHistogram()).record(finished - started)
+        self.response.setdefault(op, LatencyHistogram()).record(finished - scheduled, expected_interval)
+        if status is not None:
+            self.statuses[(op, status)] += 1
+        if error is not None:
+            self.errors[(op, error)] += 1
+
+    def report(self, duration: float) -> str:
+        lines = []
+        for op in sorted(self.service):
+            service, response = self.service[op], self.response[op]
+            lines.append(f'== {op}: {service.total} requests, {service.total / duration:.1f} req/s')
+            lines.append('   percentile   service ms   corrected ms')
+            for p in PERCENTILES:
+                lines.append(f'   {p:>10}   {service.percentile(p) * 1000:10.2f}'
+                             f'   {response.percentile(p) * 1000:12.2f}')
+            lines.append('   corrected latency histogram:')
+            lines.extend(f'   {line}' for line in response.render())
+        lines.append('== statuses')
+        lines.extend(f'   {op} {status}: {count}' for (op, status), count in sorted(self.statuses.items()))
+        if self.errors:
+            lines.append('== errors')
+            lines.extend(f'   {op} {error}: {count}' for (op, error), count in sorted(self.errors.items()))
+        return '\n'.join(lines)
+
+
+class LoadGenerator:
+    """
+    Sends weighted mix of requests using pooled client session
+    """
+    def __init__(self, args: argparse.Namespace):
+        self.url = args.url.rstrip('/')
+        self.headers = {'Authorization': f'Bearer {args.token}'}
+        self.mix = args.mix
+        self.corpus = [(path.name, path.read_bytes(), mimetypes.guess_type(path.name)[0] or 'application/octet-stream')
+                       for path in args.corpus]
+        self.params = args.params
+        self.ids = list(args.ids)
+        self.stats = Stats()
+        self.session = None
+
+    def choose(self) -> str:
+        op = random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if op == 'get' and not self.ids:
+            return 'post'
+        return op
+
+    async def post(self) -> aiohttp.ClientResponse:
+        name, content, content_type = random.choice(self.corpus)
+        data = aiohttp.FormData()
+        data.add_field('file', content, filename=name, content_type=content_type)
+        if self.params:
+            data.add_field('data', self.params, content_type='text/plain')
+        async with self.session.post(f'{self.url}/', data=data, headers=self.headers) as response:
+            body = await response.read()
+            if response.status == 200:
+                self.ids.append(body.decode())
+            return response
+
+    async def get(self) -> aiohttp.ClientResponse:
+        async with self.session.get(f'{self.url}/{random.choice(self.ids)}', headers=self.headers) as response:
+            await response.read()
+            return response
+
+    async def log(self) -> aiohttp.ClientResponse:
+        async with self.session.get(f'{self.url}/log/', headers=self.headers) as response:
+            await response.read()
+            return response
+
+    async def send(self, scheduled: float, expected_interval: Optional[float] = None) -> None:
+        op = self.choose()
+        started = time.monotonic()
+        status = error = None
+        try:
+            response = await getattr(self, op)()
+            status = response.status
+        except Exception as e:
+            error = e.__class__.__name__
+        self.stats.record(op, scheduled, started, time.monotonic(), status, error, expected_interval)
+
+    async def open_loop(self, rate: float, duration: float) -> None:
+        start = time.monotonic()
+        tasks = set()
+        for i in range(int(rate * duration)):
+            scheduled = start + i / rate
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.ensure_future(self.send(scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def closed_loop(self, concurrency: int, duration: float, expected_interval: Optional[float]) -> None:
+        deadline = time.monotonic() + duration
+
+        async def worker():
+            while time.monotonic() < deadline:
+                await self.send(time.monotonic(), expected_interval)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def run(self, args: argparse.Namespace) -> float:
+        connector = aiohttp.TCPConnector(limit=args.connections)
+        timeout = aiohttp.ClientTimeout(total=args.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as self.session:
+            start = time.monotonic()
+            if args.mode == 'open':
+                await self.open_loop(args.rate, args.duration)
+            else:
+                await self.closed_loop(args.concurrency, args.duration, args.expected_interval)
+            return time.monotonic() - start
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(','):
+        op, _, weight = item.partition('=')
+        if op not in ('post', 'get', 'log'):
+            raise argparse.ArgumentTypeError(f'Unknown operation {op}')
+        mix[op] = float(weight or 1)
+    return mix
+
+
+def parse_corpus(value: str) -> List[Path]:
+    path = Path(value)
+    files = sorted(p for p in path.iterdir() if mimetypes.guess_type(p.name)[0]) if path.is_dir() else [path]
+    if not files:
+        raise argparse.ArgumentTypeError(f'No images in {value}')
+    return files
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Image converter load generator')
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--token', default=None, help='Bearer token, read from ./token by default')
+    parser.add_argument('--mode', choices=('open', 'closed'), default='open')
+    parser.add_argument('--rate', type=float, default=10, help='Open loop arrival rate, req/s')
+    parser.add_argument('--concurrency', type=int, default=10, help='Closed loop workers')
+    parser.add_argument('--expected-interval', type=float, default=None,
+                        help='Closed loop expected interval between worker requests, s')
+    parser.add_argument('--duration', type=float, default=30, help='Run duration, s')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('post=1,get=8,log=1'))
+    parser.add_argument('--corpus', type=parse_corpus, default=parse_corpus(str(SCRIPT_ROOT / 'test-image.png')),
+                        help='Image file or directory of images to upload')
+    parser.add_argument('--params', default=None, help='Compression params, e.g. {quality=50,x=250,y=200}')
+    parser.add_argument('--ids', nargs='*', default=(), help='Existing image ids for GET requests')
+    parser.add_argument('--connections', type=int, default=100, help='Client connection pool size')
+    parser.add_argument('--timeout', type=float, default=60, help='Request timeout, s')
+    args = parser.parse_args(argv)
+    if args.token is None:
+        args.token = (PROJECT_ROOT / 'token').read_text(encoding='utf-8').strip()
+    return args
+
+
+async def main(argv: List[str]):
+    args = parse_args(argv)
+    generator = LoadGenerator(args)
+    duration = await generator.run(args)
+    print(generator.stats.report(duration))
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,46 @@
+"""Command line entrypoint
+
+This file provides command line interface and contains the following
+
+Functions:
+
+    * main(argv: List[str] = None) -> None
+
+    Example:
+
+        python -m image_converter serve
+        python -m image_converter worker
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).parents[1]))
+
+
+def main(argv: List[str] = None) -> None:
+    """Run web server or conversion worker
+
+    Parameters
+    ----------
+    argv : List[str]
+        Command line arguments
+    """
+    parser = argparse.ArgumentParser(prog='image_converter', description='Image converter')
+    parser.add_argument('command', nargs='?', choices=('serve', 'worker'), default='serve')
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        from image_converter.worker import main as run_worker
+        run_worker()
+    else:
+        from aiohttp.web import run_app
+        from image_converter.settings import config
+        from image_converter.main import app
+        run_app(app, host=config['app']['host'], port=config['app']['port'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""Hot images cache
+
+This file provides in-process caches of served image files and authorized tokens and contains the following
+
+Classes:
+
+    * ImageCache
+    * TokenCache
+
+Coroutines:
+
+    * cache_context(app) - Context coroutine
+"""
+
+import time
+from collections import OrderedDict, Counter
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from image_converter.metrics import metrics
+
+
+HITS = metrics.counter('image_cache_hits_total', 'Image requests served from memory')
+MISSES = metrics.counter('image_cache_misses_total', 'Image requests not found in memory')
+EVICTIONS = metrics.counter('image_cache_evictions_total', 'Cached images evicted by reason')
+REJECTED = metrics.counter('image_cache_rejected_total', 'Images not admitted to cache by reason')
+CACHED_BYTES = metrics.gauge('image_cache_bytes', 'Memory used by cached images')
+CACHED_ITEMS = metrics.gauge('image_cache_items', 'Number of cached images')
+TOKEN_LOOKUPS = metrics.counter('auth_token_lookups_total', 'Token checks by source')
+
+
+class ImageCache:
+    """
+    A class that represent byte budgeted cache of image files
+
+    Items are evicted in LRU order. New item is admitted only if it was
+    requested more often than items it would evict, request frequencies are
+    halved every sample requests so popularity follows recent traffic
+
+    Attributes
+    ----------
+    budget : int
+        Maximal bytes of cached data
+    max_item : int
+        Maximal size of cached file
+    sample : int
+        Number of requests after which frequencies are halved
+
+    Methods
+    -------
+    get(self, key: Tuple[str, str]) -> Optional[bytes]
+        Cached file content
+    admit(self, key: Tuple[str, str], data: bytes) -> bool
+        Store file content if it is more popular than evicted items
+    invalidate(self, image_id: str) -> None
+        Remove all cached files of image
+    """
+    def __init__(self, budget: int, max_item: int, sample: int):
+        self.budget = budget
+        self.max_item = max_item
+        self.sample = sample
+        self._items = OrderedDict()
+        self._images: Dict[str, Set[Hashable]] = {}
+        self._frequency = Counter()
+        self._requests = 0
+        self._size = 0
+
+    def _record(self, key: Tuple[str, str]) -> None:
+        self._frequency[key] += 1
+        self._requests += 1
+        if self._requests >= self.sample:
+            self._requests = 0
+            self._frequency = Counter({k: v // 2 for k, v in self._frequency.items() if v > 1})
+
+    def _remove(self, key: Tuple[str, str], reason: str) -> None:
+        data = self._items.pop(key)
+        self._size -= len(data)
+        names = self._images[key[0]]
+        names.discard(key[1])
+        if not names:
+            del self._images[key[0]]
+        EVICTIONS.inc(reason=reason)
+
+    def _report(self) -> None:
+        CACHED_BYTES.set(self._size)
+        CACHED_ITEMS.set(len(self._items))
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        """Cached file content
+
+        Parameters
+        ----------
+        key : Tuple[str, str]
+            Image id and rendition name
+
+        Returns
+        -------
+        Optional[bytes]
+            File content or None if not cached
+        """
+        self._record(key)
+        data = self._items.get(key)
+        if data is None:
+            MISSES.inc()
+            return None
+        self._items.move_to_end(key)
+        HITS.inc()
+        return data
+
+    def admit(self, key: Tuple[str, str], data: bytes) -> bool:
+        """Store file content if it is more popular than items it evicts
+
+        Parameters
+        ----------
+        key : Tuple[str, str]
+            Image id and rendition name
+        data : bytes
+            File content
+
+        Returns
+        -------
+        bool
+            True if content is cached
+        """
+        if key in self._items:
+            return True
+        if len(data) > min(self.max_item, self.budget):
+            REJECTED.inc(reason='size')
+            return False
+
+        victims = []
+        free = self.budget - self._size
+        frequency = self._frequency[key]
+        for victim in self._items:
+            if free >= len(data):
+                break
+            if self._frequency[victim] >= frequency:
+                REJECTED.inc(reason='frequency')
+                return False
+            victims.append(victim)
+            free += len(self._items[victim])
+
+        for victim in victims:
+            self._remove(victim, 'capacity')
+        self._items[key] = data
+        self._images.setdefault(key[0], set()).add(key[1])
+        self._size += len(data)
+        self._report()
+        return True
+
+    def invalidate(self, image_id: str) -> None:
+        """Remove all cached files of image
+
+        Parameters
+        ----------
+        image_id : str
+            Image id
+        """
+        for name in list(self._images.get(str(image_id), ())):
+            self._remove((str(image_id), name), 'invalidated')
+        self._report()
+
+
+class TokenCache:
+    """
+    A class that represent cache of tokens found in users table
+
+    Only existing tokens are cached, so removed user keeps access at most
+    for ttl. Least recently used tokens are evicted above size
+
+    Attributes
+    ----------
+    ttl : float
+        Seconds token stays cached
+    size : int
+        Maximal number of cached tokens
+
+    Methods
+    -------
+    get(self, token: str) -> bool
+        Check token was found recently
+    add(self, token: str) -> None
+        Cache found token
+    """
+    def __init__(self, ttl: float, size: int):
+        self.ttl = ttl
+        self.size = size
+        self._tokens = OrderedDict()
+
+    def get(self, token: str) -> bool:
+        """
+        Parameters
+        ----------
+        token : str
+            Client token
+
+        Returns
+        -------
+        bool
+            True if token was found during ttl
+        """
+        expires = self._tokens.get(token)
+        if expires is None or expires < time.monotonic():
+            self._tokens.pop(token, None)
+            TOKEN_LOOKUPS.inc(source='database')
+            return False
+        self._tokens.move_to_end(token)
+        TOKEN_LOOKUPS.inc(source='cache')
+        return True
+
+    def add(self, token: str) -> None:
+        """
+        Parameters
+        ----------
+        token : str
+            Client token found in users table
+        """
+        self._tokens[token] = time.monotonic() + self.ttl
+        self._tokens.move_to_end(token)
+        while len(self._tokens) > self.size:
+            self._tokens.popitem(last=False)
+
+
+async def cache_context(app):
+    """Context coroutine run when app run and stop
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    settings = app['settings']['cache']
+    app['Cache'] = ImageCache(settings['budget'], settings['max_item'], settings['sample'])
+    app['Tokens'] = TokenCache(settings['token_ttl'], settings['tokens'])
+    yield
@@ -1 +1 @@
-from .context import context
+from .context import context, session_middleware
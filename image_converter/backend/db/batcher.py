@@ -0,0 +1,140 @@
+"""Database insert batcher
+
+This file provides micro-batcher that coalesces row inserts from concurrent
+requests into one multi-row INSERT ... RETURNING statement and contains the following
+
+Classes:
+
+    * InsertBatcher
+
+Coroutines:
+
+    * batcher_context(app) - Context coroutine
+"""
+
+import time
+import asyncio
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Table, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from image_converter.metrics import metrics
+from image_converter.backend.db.settings import ENGINE
+from image_converter.backend.models import Image
+
+
+BATCH_ROWS = metrics.histogram('db_insert_batch_rows', 'Rows per batched insert statement',
+                               buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+BATCH_DURATION = metrics.histogram('db_insert_batch_seconds', 'Batched insert round trip time')
+
+
+class InsertBatcher:
+    """
+    A class that coalesces row inserts into multi-row INSERT ... RETURNING
+
+    Rows must contain primary key generated by application, it is used to
+    match returned rows with callers.
+
+    Attributes
+    ----------
+    engine : AsyncEngine
+        Database engine
+    table : Table
+        Table for inserts
+    delay : float
+        Seconds to wait for more rows before flush
+    max_rows : int
+        Rows count that triggers immediate flush
+
+    Methods
+    -------
+    insert(self, values: Dict) -> Row
+        Queue row insert and wait for its flush
+    close(self) -> None
+        Flush pending rows and wait for running flushes
+    """
+    def __init__(self, engine: AsyncEngine, table: Table, delay: float, max_rows: int):
+        self.engine = engine
+        self.table = table
+        self.delay = delay
+        self.max_rows = max_rows
+        self._key = table.primary_key.columns.values()[0]
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._flushes = set()
+        self._timer = None
+
+    async def insert(self, values: Dict) -> Row:
+        """Queue row insert and wait for its flush
+
+        Parameters
+        ----------
+        values : Dict
+            Row values by column key, primary key included
+
+        Returns
+        -------
+        Row
+            Inserted row with server generated values
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((values, future))
+        if len(self._pending) >= self.max_rows:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self._flush_pending)
+        return await future
+
+    def _flush_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        start = time.monotonic()
+        try:
+            async with self.engine.begin() as conn:
+                result = await conn.execute(insert(self.table)
+                                            .values([values for values, _ in batch])
+                                            .returning(*self.table.columns))
+                rows = {row[self._key.name]: row for row in result.mappings()}
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for values, future in batch:
+                if not future.done():
+                    future.set_result(rows[values[self._key.key]])
+        finally:
+            BATCH_ROWS.observe(len(batch))
+            BATCH_DURATION.observe(time.monotonic() - start)
+
+    async def close(self) -> None:
+        """Flush pending rows and wait for running flushes
+        """
+        self._flush_pending()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+async def batcher_context(app):
+    """Context coroutine run when app run and stop
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    settings = app['settings']['db']
+    app['Batcher'] = InsertBatcher(ENGINE, Image.__table__, settings['batch_delay'], settings['batch_rows'])
+    yield
+    await app['Batcher'].close()
@@ -5,23 +5,52 @@ This file provides context for aiohttp app
     Coroutines:
 
         * context(app) - Context coroutine
+        * session_middleware(request, handler) - Middleware releasing request session
 """
 
 import asyncio
 
+from aiohttp import web
+from sqlalchemy.ext.asyncio import async_scoped_session
+
 from image_converter.backend.db.settings import ASYNC_SESSION
 
 
 async def context(app):
     """Context coroutine run when app run and stop
 
+    Each request handler task gets its own session, so concurrent requests
+    never share transaction
+
     Parameters
     ----------
     app : aihttp.web.Application
         aiohttp application
 
     """
-    app['db'] = ASYNC_SESSION()
+    app['db'] = async_scoped_session(ASYNC_SESSION, scopefunc=asyncio.current_task)
     yield
-    await app['db'].close()
+    await app['db'].remove()
     await asyncio.sleep(.25)
+
+
+@web.middleware
+async def session_middleware(request, handler):
+    """Close request task session after handler finished
+
+    Parameters
+    ----------
+    request : Request
+        Client request
+    handler : Callable
+        Request handler
+
+    Returns
+    -------
+    Response
+        Handler response
+    """
+    try:
+        return await handler(request)
+    finally:
+        await request.app['db'].remove()
@@ -0,0 +1,335 @@
+"""Images export
+
+This file provides streaming export of stored images with their rows as tar
+archive and restore of exported rows and contains the following
+
+Classes:
+
+    * ExportStream
+
+Functions:
+
+    * tar_header(name: str, size: int, mtime: float) -> bytes
+    * tar_padding(size: int) -> bytes
+    * image_files(data: Image, extension: str) -> List[str]
+    * dump_row(data: Image) -> Dict
+    * load_row(data: Dict) -> Dict
+
+Coroutines:
+
+    * restore_rows(engine: AsyncEngine, rows: List[Dict]) -> int
+
+Archive contains images/{file} members of exported images followed by
+manifest/{chunk}.ndjson member with their rows for each chunk of rows,
+and cursor member with cursor of next incremental export at the end.
+Restore writes files of chunk before its rows, so restored row always has its files
+"""
+
+import os
+import re
+import json
+import uuid
+import tarfile
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiofiles
+from sqlalchemy import select, tuple_, literal, func, DateTime
+from sqlalchemy.sql import Select
+from sqlalchemy.dialects.postgresql import insert, UUID
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from image_converter.metrics import metrics
+from image_converter.backend.models import Image, User, Status
+from image_converter.backend.views.image.logic.list.helpers import encode_cursor
+
+
+BLOCK = 512
+IMAGES = 'images/'
+MANIFEST = 'manifest/'
+CURSOR = 'cursor'
+FILE_NAME = re.compile(r'^[0-9a-f-]{36}(\.[a-z0-9]+)*$')
+
+EXPORTED = metrics.counter('export_images_total', 'Images written to export archives')
+EXPORTED_BYTES = metrics.counter('export_bytes_total', 'Bytes of export archives')
+
+
+def tar_header(name: str, size: int, mtime: float) -> bytes:
+    """
+    Parameters
+    ----------
+    name : str
+        Member name
+    size : int
+        Member size in bytes
+    mtime : float
+        Member modification time
+
+    Returns
+    -------
+    bytes
+        Tar header blocks of regular file member
+    """
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'surrogateescape')
+
+
+def tar_padding(size: int) -> bytes:
+    """
+    Parameters
+    ----------
+    size : int
+        Member size in bytes
+
+    Returns
+    -------
+    bytes
+        Zero bytes completing last block of member
+    """
+    return bytes(-size % BLOCK)
+
+
+def image_files(data: Image, extension: str) -> List[str]:
+    """Stored files of image, first is image itself, alternate formats and tiles are made again on request
+
+    Parameters
+    ----------
+    data : Image
+        Database entity
+    extension : str
+        Extension of stored files
+
+    Returns
+    -------
+    List[str]
+        File names
+    """
+    names = [f'{data.id}.{extension}']
+    names.extend(f'{data.id}.{name}.{extension}' for name in sorted(data.renditions or ()) if name != 'p0')
+    return names
+
+
+def dump_row(data: Image) -> Dict:
+    """
+    Parameters
+    ----------
+    data : Image
+        Database entity
+
+    Returns
+    -------
+    Dict
+        Serializable column values by column key
+    """
+    row = {}
+    for prop in Image.__mapper__.column_attrs:
+        value = getattr(data, prop.key)
+        if isinstance(value, (uuid.UUID, datetime)):
+            value = value.isoformat() if isinstance(value, datetime) else str(value)
+        row[prop.columns[0].key] = value
+    return row
+
+
+def load_row(data: Dict) -> Dict:
+    """
+    Parameters
+    ----------
+    data : Dict
+        Row dumped by dump_row
+
+    Returns
+    -------
+    Dict
+        Column values by column key
+    """
+    row = {}
+    for column in Image.__table__.columns:
+        value = data.get(column.key)
+        if value is not None and isinstance(column.type, UUID):
+            value = uuid.UUID(value)
+        elif value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        row[column.key] = value
+    return row
+
+
+async def restore_rows(engine: AsyncEngine, rows: List[Dict]) -> int:
+    """Insert rows with one multi-row INSERT, existing rows are kept, owners
+    missing in users table are cleared
+
+    Parameters
+    ----------
+    engine : AsyncEngine
+        Database engine
+    rows : List[Dict]
+        Rows loaded by load_row
+
+    Returns
+    -------
+    int
+        Number of inserted rows
+    """
+    if not rows:
+        return 0
+    owner = Image.__table__.c.owner_id
+    key = Image.__mapper__.primary_key[0]
+    async with engine.begin() as conn:
+        owners = {row[owner.key] for row in rows if row[owner.key] is not None}
+        if owners:
+            result = await conn.execute(select(User.id).where(User.id.in_(owners)))
+            known = set(result.scalars())
+            rows = [dict(row, **{owner.key: None}) if row[owner.key] not in known else row for row in rows]
+        result = await conn.execute(insert(Image.__table__).values(rows).on_conflict_do_nothing(index_elements=[key]))
+    return result.rowcount
+
+
+class ExportStream:
+    """
+    A class that represent export archive of converted images created after cursor
+
+    Rows are exported in (created_at, image_id) order up to first pending image,
+    so image converted later is not left behind incremental export cursor.
+    Image without its stored file is skipped.
+
+    Attributes
+    ----------
+    session : AsyncSession
+        Database session
+    path : Path
+        Path to images folder
+    extension : str
+        Extension of stored files
+    after : Tuple[datetime, UUID]
+        Optional cursor of previous export
+    chunk : int
+        Rows per manifest member
+    settle : float
+        Seconds images created before export must be old, covers rows not yet committed
+    cursor : str
+        Cursor of next export, set when archive is complete
+    images : int
+        Number of exported images
+
+    Methods
+    -------
+    query(self) -> Select
+        Exported rows statement
+    member(self, name: str, path: Path) -> AsyncIterator[bytes]
+        Tar member of stored file
+    chunks(self) -> AsyncIterator[bytes]
+        Archive data
+    """
+    read_size = 65536
+
+    def __init__(self, session: AsyncSession,
+                 path: Path,
+                 extension: str,
+                 after: Optional[Tuple[datetime, uuid.UUID]],
+                 chunk: int,
+                 settle: float):
+        self.session = session
+        self.path = path
+        self.extension = extension
+        self.after = after
+        self.chunk = chunk
+        self.settle = settle
+        self.cursor = encode_cursor(*after) if after else None
+        self.images = 0
+
+    def query(self) -> Select:
+        """
+        Returns
+        -------
+        Select
+            Exported rows statement
+        """
+        horizon = (select(func.min(Image.created_at))
+                   .where(Image.status == Status.PENDING)
+                   .scalar_subquery())
+        query = (select(Image)
+                 .where(Image.status == Status.READY,
+                        Image.created_at < func.least(horizon, func.now() - timedelta(seconds=self.settle)))
+                 .order_by(Image.created_at, Image.id))
+        if self.after is not None:
+            created_at, _id = self.after
+            query = query.where(tuple_(Image.created_at, Image.id) >
+                                tuple_(literal(created_at, Image.created_at.type), literal(_id, Image.id.type)))
+        return query
+
+    async def member(self, name: str, path: Path) -> AsyncIterator[bytes]:
+        """Tar member of stored file, file size is taken when file is opened
+
+        Parameters
+        ----------
+        name : str
+            Member name
+        path : Path
+            Path to file
+
+        Yields
+        ------
+        bytes
+            Member data
+
+        Raises
+        ------
+        FileNotFoundError
+            If file is removed
+        """
+        async with aiofiles.open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            yield tar_header(name, stat.st_size, stat.st_mtime)
+            left = stat.st_size
+            while left > 0:
+                chunk = await f.read(min(self.read_size, left))
+                if not chunk:
+                    raise EOFError(path)
+                left -= len(chunk)
+                yield chunk
+            yield tar_padding(stat.st_size)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Archive data
+
+        Yields
+        ------
+        bytes
+            Archive data
+        """
+        result = await self.session.stream_scalars(self.query())
+        number = 0
+        async for images in result.partitions(self.chunk):
+            rows = []
+            for image in images:
+                names = image_files(image, self.extension)
+                try:
+                    async for data in self.member(IMAGES + names[0], self.path / names[0]):
+                        EXPORTED_BYTES.inc(len(data))
+                        yield data
+                except FileNotFoundError:
+                    continue
+                for name in names[1:]:
+                    try:
+                        async for data in self.member(IMAGES + name, self.path / name):
+                            EXPORTED_BYTES.inc(len(data))
+                            yield data
+                    except FileNotFoundError:
+                        continue
+                rows.append(json.dumps(dump_row(image)))
+                self.cursor = encode_cursor(image.created_at, image.id)
+            if rows:
+                number += 1
+                manifest = ''.join(f'{row}\n' for row in rows).encode()
+                yield tar_header(f'{MANIFEST}{number:06d}.ndjson', len(manifest), datetime.now().timestamp())
+                yield manifest + tar_padding(len(manifest))
+                self.images += len(rows)
+                EXPORTED.inc(len(rows))
+
+        cursor = (self.cursor or '').encode()
+        yield tar_header(CURSOR, len(cursor), datetime.now().timestamp())
+        yield cursor + tar_padding(len(cursor))
+        yield bytes(2 * BLOCK)
@@ -0,0 +1,320 @@
+"""Conversion jobs queue
+
+This file provides durable Postgres backed queue of conversion jobs and contains the following
+
+Classes:
+
+    * JobQueue
+
+Functions:
+
+    * write_source(path: Path, source: Union[bytes, Path]) -> None
+
+Coroutines:
+
+    * jobs_context(app) - Context coroutine
+"""
+
+import os
+import random
+import shutil
+from pathlib import Path
+from datetime import timedelta
+from typing import Dict, Optional, Union
+
+from sqlalchemy import select, update, and_, or_, func
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from image_converter.metrics import metrics
+from image_converter.backend.db.settings import ENGINE
+from image_converter.images.formats import write_file
+from image_converter.backend.models import Image, Job, JobStatus, Status
+
+
+ENQUEUED = metrics.counter('jobs_enqueued_total', 'Conversion jobs enqueued')
+FINISHED = metrics.counter('jobs_finished_total', 'Conversion job attempts by result')
+
+
+def write_source(path: Path, source: Union[bytes, Path]) -> None:
+    """Store conversion source in shared storage, spooled file is moved
+
+    Parameters
+    ----------
+    path : Path
+        Stored source path
+    source : bytes | Path
+        Data in bytes or path to spooled file
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        write_file(path, source)
+    else:
+        shutil.move(str(source), str(path))
+
+
+class JobQueue:
+    """
+    A class that represent queue of conversion jobs in jobs table
+
+    Job is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    workers never take the same job. Claimed job is invisible to other workers
+    until its lease expires, worker extends lease while converting. Crashed
+    worker's job is claimed again after lease expiration, result of worker that
+    lost its lease is discarded. Failed job is retried with exponential backoff,
+    after max attempts job is dead and image failed.
+
+    Attributes
+    ----------
+    engine : AsyncEngine
+        Database engine
+    path : Path
+        Shared storage of conversion sources
+    channel : str
+        Notification channel
+    visibility : float
+        Lease duration in seconds
+    max_attempts : int
+        Attempts before job is dead
+    backoff : float
+        First retry delay in seconds
+    max_backoff : float
+        Maximal retry delay in seconds
+
+    Methods
+    -------
+    enqueue(self, session: AsyncSession, image_id, source: str, params: Dict) -> None
+        Add job in session transaction and notify workers on commit
+    claim(self, worker: str) -> Optional[RowMapping]
+        Lease next available job
+    extend(self, job: RowMapping, worker: str) -> bool
+        Extend job lease
+    held(self, job: RowMapping, worker: str) -> ColumnElement
+        Condition matching job still held by worker
+    complete(self, job: RowMapping, worker: str, metadata: Dict) -> bool
+        Finish job and store converted image metadata
+    fail(self, job: RowMapping, worker: str, error: str, retry: bool = True) -> bool
+        Schedule job retry or mark it dead
+    source(self, job: RowMapping) -> Path
+        Path to job conversion source
+    remove_source(self, job: RowMapping) -> None
+        Remove job conversion source
+    """
+    def __init__(self, engine: AsyncEngine, path: Path, settings: Dict):
+        self.engine = engine
+        self.path = path
+        self.channel = settings['channel']
+        self.visibility = timedelta(seconds=settings['visibility'])
+        self.max_attempts = settings['max_attempts']
+        self.backoff = settings['backoff']
+        self.max_backoff = settings['max_backoff']
+
+    def source(self, job: RowMapping) -> Path:
+        """
+        Parameters
+        ----------
+        job : RowMapping
+            Job row
+
+        Returns
+        -------
+        Path
+            Path to job conversion source
+        """
+        return self.path / job['source']
+
+    async def enqueue(self, session: AsyncSession, image_id, source: str, params: Dict) -> None:
+        """Add job in session transaction, workers are notified when transaction commits
+
+        Parameters
+        ----------
+        session : AsyncSession
+            Session with open transaction
+        image_id : UUID
+            Converted image id
+        source : str
+            Source name in shared storage
+        params : Dict
+            Conversion params
+        """
+        session.add(Job(image_id=image_id, source=source, params=params, max_attempts=self.max_attempts))
+        await session.execute(select(func.pg_notify(self.channel, str(image_id))))
+        ENQUEUED.inc()
+
+    async def claim(self, worker: str) -> Optional[RowMapping]:
+        """Lease next available job, job with expired lease is available again
+
+        Parameters
+        ----------
+        worker : str
+            Worker name
+
+        Returns
+        -------
+        Optional[RowMapping]
+            Claimed job or None if queue is empty
+        """
+        now = func.now()
+        candidate = (select(Job.id)
+                     .where(or_(and_(Job.status == JobStatus.QUEUED, Job.available_at <= now),
+                                and_(Job.status == JobStatus.RUNNING, Job.locked_until < now)))
+                     .order_by(Job.available_at)
+                     .limit(1)
+                     .with_for_update(skip_locked=True)
+                     .scalar_subquery())
+        async with self.engine.begin() as conn:
+            result = await conn.execute(update(Job)
+                                        .where(Job.id == candidate)
+                                        .values(status=JobStatus.RUNNING,
+                                                attempts=Job.attempts + 1,
+                                                locked_until=now + self.visibility,
+                                                worker=worker,
+                                                updated_at=now)
+                                        .returning(*Job.__table__.columns))
+            return result.mappings().first()
+
+    async def extend(self, job: RowMapping, worker: str) -> bool:
+        """Extend job lease
+
+        Parameters
+        ----------
+        job : RowMapping
+            Claimed job
+        worker : str
+            Worker name
+
+        Returns
+        -------
+        bool
+            False if lease was lost
+        """
+        async with self.engine.begin() as conn:
+            result = await conn.execute(update(Job)
+                                        .where(Job.id == job['job_id'],
+                                               Job.worker == worker,
+                                               Job.status == JobStatus.RUNNING)
+                                        .values(locked_until=func.now() + self.visibility, updated_at=func.now()))
+            return result.rowcount == 1
+
+    def held(self, job: RowMapping, worker: str) -> ColumnElement:
+        """
+        Parameters
+        ----------
+        job : RowMapping
+            Claimed job
+        worker : str
+            Worker name
+
+        Returns
+        -------
+        ColumnElement
+            Condition matching job only while worker still holds this claim of it
+        """
+        return and_(Job.id == job['job_id'],
+                    Job.worker == worker,
+                    Job.status == JobStatus.RUNNING,
+                    Job.attempts == job['attempts'])
+
+    async def complete(self, job: RowMapping, worker: str, metadata: Dict) -> bool:
+        """Finish job and store converted image metadata in one transaction,
+        image is not touched if job lease was lost and job was claimed again
+
+        Parameters
+        ----------
+        job : RowMapping
+            Claimed job
+        worker : str
+            Worker name
+        metadata : Dict
+            Converted image metadata
+
+        Returns
+        -------
+        bool
+            False if lease was lost
+        """
+        async with self.engine.begin() as conn:
+            result = await conn.execute(update(Job)
+                                        .where(self.held(job, worker))
+                                        .values(status=JobStatus.DONE, locked_until=None, error=None,
+                                                updated_at=func.now()))
+            if result.rowcount != 1:
+                FINISHED.inc(result='lost')
+                return False
+            await conn.execute(update(Image)
+                               .where(Image.id == job['image_id'])
+                               .values(status=Status.READY, **metadata))
+        FINISHED.inc(result='done')
+        return True
+
+    async def fail(self, job: RowMapping, worker: str, error: str, retry: bool = True) -> bool:
+        """Schedule job retry with exponential backoff or mark it dead and image failed,
+        job and image are not touched if job lease was lost and job was claimed again
+
+        Parameters
+        ----------
+        job : RowMapping
+            Claimed job
+        worker : str
+            Worker name
+        error : str
+            Failure description
+        retry : bool
+            False if retry is useless, e.g. job deadline passed
+
+        Returns
+        -------
+        bool
+            True if job is dead, False if it is retried or lease was lost
+        """
+        dead = not retry or job['attempts'] >= job['max_attempts']
+        if dead:
+            values = {'status': JobStatus.DEAD}
+        else:
+            delay = min(self.max_backoff, self.backoff * 2 ** (job['attempts'] - 1)) * random.uniform(.5, 1)
+            values = {'status': JobStatus.QUEUED, 'available_at': func.now() + timedelta(seconds=delay)}
+        async with self.engine.begin() as conn:
+            result = await conn.execute(update(Job)
+                                        .where(self.held(job, worker))
+                                        .values(locked_until=None, error=error, updated_at=func.now(), **values))
+            if result.rowcount != 1:
+                FINISHED.inc(result='lost')
+                return False
+            if dead:
+                await conn.execute(update(Image)
+                                   .where(Image.id == job['image_id'])
+                                   .values(status=Status.FAILED))
+        FINISHED.inc(result='dead' if dead else 'retry')
+        return dead
+
+    def remove_source(self, job: RowMapping) -> None:
+        """Remove job conversion source
+
+        Parameters
+        ----------
+        job : RowMapping
+            Finished job
+        """
+        try:
+            os.remove(self.source(job))
+        except FileNotFoundError:
+            pass
+
+
+async def jobs_context(app):
+    """Context coroutine run when app run and stop
+
+    Conversions are queued for workers only if jobs are enabled
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    settings = app['settings']['jobs']
+    app['Jobs'] = None
+    if settings['enabled']:
+        app['Jobs'] = JobQueue(ENGINE, app['settings']['project_root'] / settings['path'], settings)
+    yield
@@ -0,0 +1,220 @@
+"""Admission control and rate limiting
+
+This file provides limiters for request processing and contains the following
+
+Classes:
+
+    * Overloaded
+        Exception raised when limiter wait queue is full
+    * ConcurrencyLimiter
+        Limits number of concurrent operations with bounded wait queue
+    * RateLimiter
+        Token bucket rate limits keyed by client token
+
+Coroutines:
+
+    * limits_context(app) - Context coroutine
+"""
+
+import os
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from image_converter.metrics import metrics
+
+
+QUEUE_WAIT = metrics.histogram('admission_queue_wait_seconds', 'Time spent waiting for conversion slot')
+REJECTED = metrics.counter('admission_rejected_total', 'Operations rejected because wait queue is full')
+IN_FLIGHT = metrics.gauge('admission_in_flight', 'Operations holding a slot')
+WAITING = metrics.gauge('admission_waiting', 'Operations waiting for a slot')
+RATE_LIMITED = metrics.counter('rate_limited_total', 'Requests rejected by token rate limit')
+
+
+class Overloaded(Exception):
+    """
+    Exception raised when limiter wait queue is full
+
+    Attributes
+    ----------
+    retry_after : int
+        Seconds client should wait before retry
+    """
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """
+    A class that limits number of concurrent operations with bounded wait queue
+
+    Attributes
+    ----------
+    name : str
+        Limiter name used as metrics label
+    limit : int
+        Maximum concurrent operations
+    queue_size : int
+        Maximum operations waiting for slot
+
+    Methods
+    -------
+    waiting(self) -> int
+        Number of operations waiting for slot
+    full(self) -> bool
+        Check new operation will be rejected
+    retry_after(self) -> int
+        Estimate seconds until a slot frees up
+    slot(self)
+        Async context manager holding a slot
+    """
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self._semaphore = asyncio.Semaphore(limit)
+        self._active = 0
+        self._waiting = 0
+        self._duration = 1.0
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    def full(self) -> bool:
+        """Check new operation will be rejected
+
+        Returns
+        -------
+        bool
+            True if all slots are busy and wait queue is full
+        """
+        return self._active >= self.limit and self._waiting >= self.queue_size
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a slot frees up
+
+        Returns
+        -------
+        int
+            Seconds estimate based on average operation duration
+        """
+        return max(1, math.ceil(self._duration * (self._waiting + 1) / self.limit))
+
+    @asynccontextmanager
+    async def slot(self):
+        """Async context manager holding a slot
+
+        Raises
+        ------
+        Overloaded
+            If wait queue is full
+        """
+        if self.full():
+            REJECTED.inc(limiter=self.name)
+            raise Overloaded(self.retry_after())
+
+        start = time.monotonic()
+        self._waiting += 1
+        WAITING.set(self._waiting, limiter=self.name)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+            WAITING.set(self._waiting, limiter=self.name)
+
+        acquired = time.monotonic()
+        QUEUE_WAIT.observe(acquired - start, limiter=self.name)
+        self._active += 1
+        IN_FLIGHT.set(self._active, limiter=self.name)
+        try:
+            yield
+        finally:
+            self._active -= 1
+            IN_FLIGHT.set(self._active, limiter=self.name)
+            self._semaphore.release()
+            self._duration = .8 * self._duration + .2 * (time.monotonic() - acquired)
+
+
+class RateLimiter:
+    """
+    A class that represent token bucket rate limits keyed by client token
+
+    Attributes
+    ----------
+    rate : float
+        Bucket refill rate per second
+    burst : int
+        Bucket capacity
+    max_keys : int
+        Number of tracked keys that triggers idle buckets pruning
+
+    Methods
+    -------
+    acquire(self, key: str) -> float
+        Take token from key bucket
+    """
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: Dict[str, list] = {}
+
+    def _prune(self, now: float) -> None:
+        full = self.burst / self.rate
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < full}
+
+    def acquire(self, key: str) -> float:
+        """Take token from key bucket
+
+        Parameters
+        ----------
+        key : str
+            Client token
+
+        Returns
+        -------
+        float
+            0 if request allowed or seconds until token is available
+        """
+        if not self.rate:
+            return 0
+
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            bucket = self._buckets[key] = [float(self.burst), now]
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0
+
+        bucket[0] = tokens
+        RATE_LIMITED.inc()
+        return (1 - tokens) / self.rate
+
+
+async def limits_context(app):
+    """Context coroutine run when app run and stop
+
+    Creates limiters inside running event loop
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    settings = app['settings']['limits']
+    app['Limiter'] = ConcurrencyLimiter('conversion',
+                                        settings['conversions'] or os.cpu_count(),
+                                        settings['queue'])
+    app['RateLimiter'] = RateLimiter(settings['rate'], settings['burst'])
+    yield
@@ -3,18 +3,61 @@
 This file provides models for models dor database and contains the following
 classes:
 
+    * Status
+    * JobStatus
     * Image
+    * Job
     * User
 """
 
 import uuid
+from typing import Dict
 
-from sqlalchemy import Column
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 from .db.settings import BASE
 
 
+class Status:
+    """
+    Image processing statuses
+
+    Fields
+    ----------
+    PENDING : str
+        Conversion not finished
+    READY : str
+        Image file stored
+    FAILED : str
+        Conversion failed
+    """
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+
+
+class JobStatus:
+    """
+    Conversion job statuses
+
+    Fields
+    ----------
+    QUEUED : str
+        Waiting for worker or retry
+    RUNNING : str
+        Claimed by worker until visibility timeout
+    DONE : str
+        Image converted
+    DEAD : str
+        Attempts exhausted
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    DEAD = 'dead'
+
+
 class Image(BASE):
     __tablename__ = 'images'
 
@@ -22,6 +65,90 @@ class Image(BASE):
                 name='image_id',
                 primary_key=True,
                 default=uuid.uuid4)
+    width = Column(Integer)
+    height = Column(Integer)
+    size = Column(BigInteger)
+    hash = Column(String(64))
+    frames = Column(Integer,
+                    nullable=False,
+                    default=1,
+                    server_default='1')
+    renditions = Column(JSONB)
+    placeholder = Column(Text)
+    quality = Column(Integer)
+    status = Column(String(16),
+                    nullable=False,
+                    default=Status.PENDING,
+                    server_default=Status.PENDING)
+    created_at = Column(DateTime(timezone=True),
+                        nullable=False,
+                        server_default=func.now())
+    owner_id = Column(UUID(as_uuid=True),
+                      ForeignKey('users.user_id', ondelete='SET NULL'),
+                      name='owner_id')
+
+    __table_args__ = (Index('ix_images_created_at_image_id', 'created_at', 'image_id'),
+                      Index('ix_images_owner_id_created_at_image_id', 'owner_id', 'created_at', 'image_id'),
+                      Index('ix_images_status_created_at_image_id', 'status', 'created_at', 'image_id'))
+
+    def to_dict(self) -> Dict:
+        """Serializable image metadata
+
+        Returns
+        -------
+        Dict
+            Image metadata
+        """
+        return {'id': str(self.id),
+                'width': self.width,
+                'height': self.height,
+                'size': self.size,
+                'hash': self.hash,
+                'frames': self.frames,
+                'renditions': sorted(self.renditions or ()),
+                'placeholder': self.placeholder,
+                'quality': self.quality,
+                'status': self.status,
+                'owner': str(self.owner_id) if self.owner_id else None,
+                'created_at': self.created_at.isoformat() if self.created_at else None}
+
+
+class Job(BASE):
+    __tablename__ = 'jobs'
+
+    id = Column(UUID(as_uuid=True),
+                name='job_id',
+                primary_key=True,
+                default=uuid.uuid4)
+    image_id = Column(UUID(as_uuid=True),
+                      ForeignKey('images.image_id', ondelete='CASCADE'),
+                      nullable=False)
+    source = Column(Text, nullable=False)
+    params = Column(JSONB, nullable=False)
+    status = Column(String(16),
+                    nullable=False,
+                    default=JobStatus.QUEUED,
+                    server_default=JobStatus.QUEUED)
+    attempts = Column(Integer,
+                      nullable=False,
+                      default=0,
+                      server_default='0')
+    max_attempts = Column(Integer, nullable=False)
+    available_at = Column(DateTime(timezone=True),
+                          nullable=False,
+                          server_default=func.now())
+    locked_until = Column(DateTime(timezone=True))
+    worker = Column(String(255))
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True),
+                        nullable=False,
+                        server_default=func.now())
+    updated_at = Column(DateTime(timezone=True),
+                        nullable=False,
+                        server_default=func.now())
+
+    __table_args__ = (Index('ix_jobs_status_available_at', 'status', 'available_at'),
+                      Index('ix_jobs_image_id', 'image_id'))
 
 
 class User(BASE):
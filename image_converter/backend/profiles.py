@@ -0,0 +1,113 @@
+"""Profiles storage
+
+This file provides storage for captured request profiles and contains the following
+
+Classes:
+
+    * ProfileStore
+
+Coroutines:
+
+    * profiles_context(app) - Context coroutine
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from image_converter.profiling import EXTENSIONS
+
+
+class ProfileStore:
+    """
+    A class that represent storage of profiles grouped by request id
+
+    Profiles of one request are stored together in path / request_id,
+    e.g. handler.prof and worker.prof
+
+    Attributes
+    ----------
+    path : Path
+        Profiles folder
+
+    Methods
+    -------
+    save(self, request_id: str, name: str, mode: str, data: bytes) -> None
+        Store profile
+    list(self) -> List[Dict]
+        Stored profiles by request id, newest first
+    file(self, request_id: str, filename: str) -> Optional[Path]
+        Path to stored profile
+    """
+    request_id_pattern = re.compile(r'^[0-9a-f]{32}$')
+    filename_pattern = re.compile(r'^[a-z]+\.(%s)$' % '|'.join(EXTENSIONS.values()))
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def save(self, request_id: str, name: str, mode: str, data: bytes) -> None:
+        """Store profile
+
+        Parameters
+        ----------
+        request_id : str
+            Request id
+        name : str
+            Profile name, e.g. handler or worker
+        mode : str
+            Profiling mode
+        data : bytes
+            Serialized profile
+        """
+        folder = self.path / request_id
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f'{name}.{EXTENSIONS[mode]}').write_bytes(data)
+
+    def list(self) -> List[Dict]:
+        """Stored profiles by request id, newest first
+
+        Returns
+        -------
+        List[Dict]
+            Request id, creation time and files
+        """
+        if not self.path.is_dir():
+            return []
+        folders = [f for f in self.path.iterdir() if f.is_dir() and self.request_id_pattern.match(f.name)]
+        folders.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+        return [{'id': f.name,
+                 'created': f.stat().st_mtime,
+                 'files': sorted(p.name for p in f.iterdir())} for f in folders]
+
+    def file(self, request_id: str, filename: str) -> Optional[Path]:
+        """Path to stored profile
+
+        Parameters
+        ----------
+        request_id : str
+            Request id
+        filename : str
+            Profile file name
+
+        Returns
+        -------
+        Optional[Path]
+            Path or None if profile not found or names are malformed
+        """
+        if not (self.request_id_pattern.match(request_id) and self.filename_pattern.match(filename)):
+            return None
+        path = self.path / request_id / filename
+        return path if path.is_file() else None
+
+
+async def profiles_context(app):
+    """Context coroutine run when app run and stop
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    app['Profiles'] = ProfileStore(app['settings']['project_root'] / app['settings']['profiling']['path'])
+    yield
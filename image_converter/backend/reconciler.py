@@ -0,0 +1,287 @@
+"""Background reconciler
+
+This file provides background task that removes orphaned image rows and files
+and enforces images retention and contains the following
+
+Classes:
+
+    * Reconciler
+
+Coroutines:
+
+    * reconciler_context(app) - Context coroutine
+"""
+
+import os
+import uuid
+import shutil
+import time
+import asyncio
+import logging
+import itertools
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Iterable, Tuple
+
+from sqlalchemy import select, delete, tuple_, literal
+
+from image_converter.settings import config
+from image_converter.metrics import metrics
+from image_converter.backend.db.settings import ASYNC_SESSION
+from image_converter.images.converter import TILES
+from image_converter.backend.views.helpers import make_log
+from image_converter.backend.models import Image, Job, JobStatus, Status
+
+
+REMOVED_FILES = metrics.counter('reconciler_removed_files_total', 'Orphaned image files removed')
+REMOVED_ROWS = metrics.counter('reconciler_removed_rows_total', 'Image rows removed by reason')
+RUN_DURATION = metrics.histogram('reconciler_run_seconds', 'Reconciler pass duration',
+                                 buckets=(1, 5, 10, 30, 60, 300, 900, 3600))
+
+
+class Reconciler:
+    """
+    A class that represent background reconciler of image rows and files
+
+    Files and tile directories without row and temporary files older than
+    grace period are removed. Rows of ready images without file, rows stuck in pending state
+    without queued or running job and rows older than ttl are removed with
+    their files. Work is done in
+    bounded batches with pauses and backs off while conversions wait for slot.
+
+    Attributes
+    ----------
+    path : Path
+        Path to images folder
+    extensions : Tuple[str]
+        Extensions of stored image files, primary first
+    limiter : ConcurrencyLimiter
+        Conversion admission control used to detect foreground load
+    cache : ImageCache
+        Hot images cache invalidated for removed images
+    batch : int
+        Rows and directory entries processed per batch
+    pause : float
+        Seconds to sleep between batches
+    interval : float
+        Seconds between passes
+    grace : float
+        Age in seconds after which file without row is orphan
+    pending_timeout : float
+        Age in seconds after which pending row is considered crashed
+    ttl : float
+        Optional image retention in seconds
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    run(self) -> None
+        Run passes forever
+    reconcile(self) -> None
+        Run one pass over files and rows
+    reconcile_files(self) -> None
+        Remove files without row
+    reconcile_rows(self) -> None
+        Remove expired, crashed and missing file rows
+    """
+    def __init__(self, path: Path, extensions: Tuple, limiter, cache, settings: Dict, logger: logging.Logger):
+        self.path = path
+        self.extensions = extensions
+        self.limiter = limiter
+        self.cache = cache
+        self.batch = settings['batch']
+        self.pause = settings['pause']
+        self.interval = settings['interval']
+        self.grace = settings['grace']
+        self.pending_timeout = settings['pending_timeout']
+        self.ttl = settings['ttl']
+        self.logger = logger
+        self.extra = {'route': 'reconciler', 'functionName': 'reconcile'}
+
+    async def _throttle(self) -> None:
+        await asyncio.sleep(self.pause)
+        while self.limiter.waiting:
+            await asyncio.sleep(self.pause)
+
+    def _remove_files(self, names: Iterable[str]) -> int:
+        removed = 0
+        for name in names:
+            try:
+                if name.endswith(f'.{TILES}'):
+                    shutil.rmtree(self.path / name)
+                else:
+                    os.remove(self.path / name)
+            except FileNotFoundError:
+                pass
+            except IsADirectoryError:
+                continue
+            else:
+                removed += 1
+        return removed
+
+    def _next_names(self, entries) -> Tuple[int, List[str]]:
+        batch = list(itertools.islice(entries, self.batch))
+        return len(batch), [entry.name for entry in batch
+                            if entry.is_file() or entry.name.endswith(f'.{TILES}') and entry.is_dir()]
+
+    def _orphans(self, names: List[str]) -> List[str]:
+        cutoff = time.time() - self.grace
+        orphans = []
+        for name in names:
+            try:
+                if os.stat(self.path / name).st_mtime < cutoff:
+                    orphans.append(name)
+            except FileNotFoundError:
+                pass
+        return orphans
+
+    def _missing(self, ids: List[uuid.UUID]) -> List[uuid.UUID]:
+        extension = self.extensions[0]
+        return [_id for _id in ids if not os.path.exists(self.path / f'{_id}.{extension}')]
+
+    async def _delete_rows(self, ids: List[uuid.UUID], reason: str) -> None:
+        if not ids:
+            return
+        loop = asyncio.get_running_loop()
+        async with ASYNC_SESSION() as session:
+            async with session.begin():
+                await session.execute(delete(Image).where(Image.id.in_(ids)))
+        for _id in ids:
+            self.cache.invalidate(_id)
+        names = [f'{_id}.{extension}' for _id in ids for extension in (*self.extensions, TILES)]
+        REMOVED_FILES.inc(await loop.run_in_executor(None, self._remove_files, names))
+        REMOVED_ROWS.inc(len(ids), reason=reason)
+        make_log(self.logger, 'info', f'Removed {len(ids)} image rows: {reason}', self.extra)
+
+    async def reconcile_files(self) -> None:
+        """Remove files without row older than grace period
+        """
+        loop = asyncio.get_running_loop()
+        with os.scandir(self.path) as entries:
+            while True:
+                count, names = await loop.run_in_executor(None, self._next_names, entries)
+                if not count:
+                    break
+
+                candidates = {}
+                for name in names:
+                    try:
+                        candidates[name] = uuid.UUID(name.split('.', 1)[0])
+                    except ValueError:
+                        continue
+                if not candidates:
+                    continue
+                async with ASYNC_SESSION() as session:
+                    result = await session.execute(select(Image.id).where(Image.id.in_(set(candidates.values()))))
+                    known = set(result.scalars())
+
+                names = [name for name, _id in candidates.items() if _id not in known or name.endswith('.tmp')]
+                for _id in set(candidates.values()) - known:
+                    self.cache.invalidate(_id)
+                orphans = await loop.run_in_executor(None, self._orphans, names)
+                removed = await loop.run_in_executor(None, self._remove_files, orphans)
+                if removed:
+                    REMOVED_FILES.inc(removed)
+                    make_log(self.logger, 'info', f'Removed {removed} orphaned files', self.extra)
+                await self._throttle()
+
+    async def reconcile_rows(self) -> None:
+        """Remove expired rows, rows stuck in pending state and ready rows without file
+        """
+        loop = asyncio.get_running_loop()
+        now = datetime.now(timezone.utc)
+        if self.ttl:
+            while True:
+                async with ASYNC_SESSION() as session:
+                    result = await session.execute(select(Image.id)
+                                                   .where(Image.created_at < now - timedelta(seconds=self.ttl))
+                                                   .order_by(Image.created_at, Image.id)
+                                                   .limit(self.batch))
+                    expired = list(result.scalars())
+                await self._delete_rows(expired, 'expired')
+                if len(expired) < self.batch:
+                    break
+                await self._throttle()
+
+        stale = now - timedelta(seconds=self.pending_timeout)
+        after = None
+        while True:
+            query = (select(Image.id, Image.status, Image.created_at)
+                     .order_by(Image.created_at, Image.id)
+                     .limit(self.batch))
+            if after is not None:
+                query = query.where(tuple_(Image.created_at, Image.id) >
+                                    tuple_(literal(after[0], Image.created_at.type), literal(after[1], Image.id.type)))
+            async with ASYNC_SESSION() as session:
+                rows = (await session.execute(query)).all()
+            if not rows:
+                break
+            after = rows[-1].created_at, rows[-1].id
+
+            crashed = [row.id for row in rows if row.status != Status.READY and row.created_at < stale]
+            if crashed:
+                async with ASYNC_SESSION() as session:
+                    result = await session.execute(select(Job.image_id)
+                                                   .where(Job.image_id.in_(crashed),
+                                                          Job.status.in_((JobStatus.QUEUED, JobStatus.RUNNING))))
+                    queued = set(result.scalars())
+                crashed = [_id for _id in crashed if _id not in queued]
+            await self._delete_rows(crashed, 'unfinished')
+            ready = [row.id for row in rows if row.status == Status.READY]
+            missing = await loop.run_in_executor(None, self._missing, ready)
+            await self._delete_rows(missing, 'missing file')
+            await self._throttle()
+
+    async def reconcile(self) -> None:
+        """Run one pass over files and rows
+        """
+        start = time.monotonic()
+        await self.reconcile_rows()
+        await self.reconcile_files()
+        RUN_DURATION.observe(time.monotonic() - start)
+
+    async def run(self) -> None:
+        """Run passes forever
+        """
+        while True:
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                make_log(self.logger,
+                         'error',
+                         f'Throws exception while reconciling: {e.__class__.__name__}',
+                         self.extra)
+            await asyncio.sleep(self.interval)
+
+
+async def reconciler_context(app):
+    """Context coroutine run when app run and stop
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    settings = app['settings']['reconciler']
+    if not settings['enabled']:
+        yield
+        return
+
+    extensions = tuple(output.extension for output in app['Converter'].formats.values())
+    reconciler = Reconciler(app['settings']['images_path'],
+                            extensions,
+                            app['Limiter'],
+                            app['Cache'],
+                            settings,
+                            logging.getLogger(config['project']['name']))
+    task = asyncio.ensure_future(reconciler.run())
+    yield
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
@@ -8,7 +8,8 @@ functions:
 """
 from aiohttp import web
 
-from image_converter.backend.views import ImageView, LogView
+from image_converter.backend.views import ImageView, LogView, MetricsView, ProfileView, UploadView, SpriteView, \
+    ExportView
 
 
 def setup_routes(app):
@@ -22,7 +23,28 @@ def setup_routes(app):
     """
     image_view = ImageView()
     log_view = LogView()
-
-    app.add_routes([web.get('/{image_id}', image_view.get),
-                    web.post('/', image_view.post),
-                    web.get('/log/', log_view.get)])
+    metrics_view = MetricsView()
+    profile_view = ProfileView()
+    upload_view = UploadView()
+    sprite_view = SpriteView()
+    export_view = ExportView()
+
+    app.add_routes([web.get('/images', image_view.list),
+                    web.get('/{image_id}', image_view.get, allow_head=False),
+                    web.head('/{image_id}', image_view.head),
+                    web.get('/{image_id}/meta', image_view.meta),
+                    web.post('/', image_view.post, expect_handler=image_view.expect),
+                    web.get('/log/', log_view.get),
+                    web.get('/log/stream', log_view.stream),
+                    web.get('/metrics/', metrics_view.get),
+                    web.get('/profiles/', profile_view.list),
+                    web.get('/profiles/{request_id}/{filename}', profile_view.get),
+                    web.get('/export/', export_view.get),
+                    web.post('/uploads/', upload_view.create),
+                    web.head('/uploads/{upload_id}', upload_view.head),
+                    web.put('/uploads/{upload_id}', upload_view.put, expect_handler=upload_view.expect_put),
+                    web.post('/uploads/{upload_id}/finalize', upload_view.finalize),
+                    web.get('/sprites/', sprite_view.layout),
+                    web.get('/sprites/{name}', sprite_view.get),
+                    web.get(r'/{image_id}/tiles/{z:\d+}/{x:\d+}/{y:\d+}', image_view.tile),
+                    web.get('/{image_id}/{rendition}', image_view.rendition)])
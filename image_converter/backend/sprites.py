@@ -0,0 +1,251 @@
+"""Sprites storage
+
+This file provides storage for composed thumbnail sprites and contains the following
+
+Classes:
+
+    * SpriteStore
+
+Coroutines:
+
+    * expire_sprites(store: SpriteStore, interval: float, logger: Logger) -> None
+    * sprites_context(app) - Context coroutine
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from image_converter.settings import config
+from image_converter.metrics import metrics
+from image_converter.images.formats import write_file
+from image_converter.backend.views.helpers import make_log
+
+
+EXPIRED_SPRITES = metrics.counter('sprite_expired_total', 'Unused sprites removed')
+
+
+class SpriteStore:
+    """
+    A class that represent storage of sprites named by hash of their images list
+
+    Sprite image is stored in path / {name}.{extension}, its layout is stored
+    in path / {name}.json. Layout is written after image, so sprite with layout
+    is complete. Concurrent requests of the same sprite share one composition,
+    which alone writes sprite. Sprite is removed when it was not requested during ttl
+
+    Attributes
+    ----------
+    path : Path
+        Sprites folder
+    extension : str
+        Extension of sprite file
+    ttl : float
+        Seconds without requests after which sprite is removed
+
+    Methods
+    -------
+    name(ids: List[str], cell: int) -> str
+        Sprite name of images list
+    image(self, name: str) -> Path
+        Path to sprite image
+    load(self, name: str) -> Optional[Dict]
+        Sprite layout
+    save(self, name: str, layout: Dict) -> None
+        Store sprite layout
+    compose(self, name: str, function: Callable[[], Awaitable[Dict]]) -> Dict
+        Compose sprite once for concurrent requests and store its layout
+    expire(self) -> int
+        Remove unused sprites
+    """
+    name_pattern = re.compile(r'^[0-9a-f]{64}$')
+
+    def __init__(self, path: Path, extension: str, ttl: float):
+        self.path = path
+        self.extension = extension
+        self.ttl = ttl
+        self._composing: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def name(ids: List[str], cell: int) -> str:
+        """
+        Parameters
+        ----------
+        ids : List[str]
+            Image ids in sprite order
+        cell : int
+            Cell side
+
+        Returns
+        -------
+        str
+            Sprite name, hash of cell side and ids
+        """
+        return hashlib.sha256(f'{cell}:{",".join(ids)}'.encode()).hexdigest()
+
+    def _layout(self, name: str) -> Path:
+        return self.path / f'{name}.json'
+
+    def image(self, name: str) -> Optional[Path]:
+        """
+        Parameters
+        ----------
+        name : str
+            Sprite name
+
+        Returns
+        -------
+        Optional[Path]
+            Path to sprite image or None if name is malformed
+        """
+        if not self.name_pattern.match(name):
+            return None
+        return self.path / f'{name}.{self.extension}'
+
+    def load(self, name: str) -> Optional[Dict]:
+        """Sprite layout, loaded sprite is kept for another ttl
+
+        Parameters
+        ----------
+        name : str
+            Sprite name
+
+        Returns
+        -------
+        Optional[Dict]
+            Layout or None if sprite is not stored
+        """
+        path = self._layout(name)
+        try:
+            layout = json.loads(path.read_text())
+            now = time.time()
+            os.utime(path, (now, now))
+        except (FileNotFoundError, ValueError):
+            return None
+        return layout if self.image(name).is_file() else None
+
+    def save(self, name: str, layout: Dict) -> None:
+        """Store sprite layout
+
+        Parameters
+        ----------
+        name : str
+            Sprite name
+        layout : Dict
+            Sprite layout
+        """
+        write_file(self._layout(name), json.dumps(layout).encode())
+
+    async def compose(self, name: str, function: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Compose sprite once for concurrent requests and store its layout,
+        sprite stored by composition finished meanwhile is not composed again
+
+        Parameters
+        ----------
+        name : str
+            Sprite name
+        function : Callable[[], Awaitable[Dict]]
+            Coroutine function composing sprite image and returning its layout
+
+        Returns
+        -------
+        Dict
+            Sprite layout
+        """
+        task = self._composing.get(name)
+        if task is None:
+            task = self._composing[name] = asyncio.ensure_future(self._compose(name, function))
+            task.add_done_callback(lambda _: self._composing.pop(name, None))
+        return await asyncio.shield(task)
+
+    async def _compose(self, name: str, function: Callable[[], Awaitable[Dict]]) -> Dict:
+        loop = asyncio.get_running_loop()
+        layout = await loop.run_in_executor(None, self.load, name)
+        if layout is None:
+            layout = await function()
+            await loop.run_in_executor(None, self.save, name, layout)
+        return layout
+
+    def expire(self) -> int:
+        """Remove sprites not loaded during ttl
+
+        Returns
+        -------
+        int
+            Number of removed sprites
+        """
+        if not self.path.is_dir():
+            return 0
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for layout in self.path.glob('*.json'):
+            try:
+                if layout.stat().st_mtime >= cutoff:
+                    continue
+                os.remove(layout)
+            except FileNotFoundError:
+                continue
+            try:
+                os.remove(self.image(layout.stem))
+            except (FileNotFoundError, TypeError):
+                pass
+            removed += 1
+        return removed
+
+
+async def expire_sprites(store: SpriteStore, interval: float, logger: logging.Logger) -> None:
+    """Remove unused sprites forever
+
+    Parameters
+    ----------
+    store : SpriteStore
+        Sprites storage
+    interval : float
+        Seconds between passes
+    logger : Logger
+        Instance for logger
+    """
+    extra = {'route': 'sprites', 'functionName': 'expire'}
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            removed = await loop.run_in_executor(None, store.expire)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            make_log(logger, 'error', f'Throws exception while expiring sprites: {e.__class__.__name__}', extra)
+        else:
+            if removed:
+                EXPIRED_SPRITES.inc(removed)
+                make_log(logger, 'info', f'Removed {removed} unused sprites', extra)
+        await asyncio.sleep(interval)
+
+
+async def sprites_context(app):
+    """Context coroutine run when app run and stop
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    settings = app['settings']['sprites']
+    app['Sprites'] = SpriteStore(app['settings']['project_root'] / settings['path'],
+                                 app['settings']['images']['extension'],
+                                 settings['ttl'])
+    task = asyncio.ensure_future(expire_sprites(app['Sprites'],
+                                                settings['interval'],
+                                                logging.getLogger(config['project']['name'])))
+    yield
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
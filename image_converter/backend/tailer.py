@@ -0,0 +1,319 @@
+"""Log tailer
+
+This file provides shared follower of log file for live log streams and contains the following
+
+Constants:
+
+    * RECORD - Log record line pattern of request formatter
+
+Classes:
+
+    * Subscription
+    * LogTailer
+
+Coroutines:
+
+    * tailer_context(app) - Context coroutine
+    * close_tailer(app) - Shutdown coroutine
+"""
+
+import os
+import re
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from image_converter.settings import config
+from image_converter.logger import LOG_PATH
+from image_converter.metrics import metrics
+from image_converter.backend.views.helpers import make_log
+
+
+RECORD = re.compile(r'^(?P<time>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d+): (?P<route>.*?): (?P<function>[^:]*): '
+                    r'(?P<level>[A-Z]+): (?P<message>.*)$')
+
+SUBSCRIBERS = metrics.gauge('log_stream_subscribers', 'Clients following log stream')
+DROPPED = metrics.counter('log_stream_dropped_total', 'Log records dropped for slow log stream clients')
+
+
+class Subscription:
+    """
+    A class that represent log stream client with bounded queue of records
+
+    Attributes
+    ----------
+    level : int
+        Minimal level of delivered records
+    route : str
+        Delivered records route must contain it if set
+    queue : asyncio.Queue
+        Records waiting for delivery, None marks closed stream
+    dropped : int
+        Records dropped since last delivery because queue was full
+
+    Methods
+    -------
+    matches(self, record: Dict) -> bool
+        Check record passes subscription filters
+    offer(self, record: Optional[Dict]) -> None
+        Queue record without waiting
+    """
+    def __init__(self, level: int, route: Optional[str], size: int):
+        self.level = level
+        self.route = route
+        self.queue = asyncio.Queue(size)
+        self.dropped = 0
+
+    def matches(self, record: Dict) -> bool:
+        """
+        Parameters
+        ----------
+        record : Dict
+            Parsed log record
+
+        Returns
+        -------
+        bool
+            True if record passes level and route filters
+        """
+        level = logging.getLevelName(record['level'])
+        if not isinstance(level, int) or level < self.level:
+            return False
+        return self.route is None or self.route in record['route']
+
+    def offer(self, record: Optional[Dict]) -> None:
+        """Queue record, record is dropped if client does not keep up
+
+        Parameters
+        ----------
+        record : Dict
+            Parsed log record or None to close stream
+        """
+        if record is None:
+            while self.queue.full():
+                self.queue.get_nowait()
+        elif self.queue.full():
+            self.dropped += 1
+            DROPPED.inc()
+            return
+        self.queue.put_nowait(record)
+
+
+class LogTailer:
+    """
+    A class that represent single follower of log file shared by all log stream clients
+
+    File is followed from its end while anyone is subscribed. Changes are
+    detected by polling file status, file is read only when it grew. Rotated
+    file is read to its end before new file is opened, truncated file is read
+    from start. Lines not matching record pattern, e.g. tracebacks, are appended
+    to previous record message
+
+    Attributes
+    ----------
+    path : str
+        Path to log file
+    interval : float
+        Seconds between file status polls
+    queue_size : int
+        Records buffered for each client
+    encoding : str
+        Log file encoding
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    subscribe(self, level: int, route: Optional[str]) -> Subscription
+        Add log stream client
+    unsubscribe(self, subscription: Subscription) -> None
+        Remove log stream client
+    close(self) -> None
+        Stop following and close all streams
+    """
+    def __init__(self, path: str, interval: float, queue_size: int, encoding: str, logger: logging.Logger):
+        self.path = path
+        self.interval = interval
+        self.queue_size = queue_size
+        self.encoding = encoding
+        self.logger = logger
+        self.extra = {'route': 'log', 'functionName': 'tail'}
+        self._subscriptions = set()
+        self._task = None
+        self._file = None
+        self._identity = None
+        self._partial = b''
+        self._last = None
+        self._created = False
+
+    def subscribe(self, level: int, route: Optional[str]) -> Subscription:
+        """Add log stream client, file following starts with first client
+
+        Parameters
+        ----------
+        level : int
+            Minimal level of delivered records
+        route : str
+            Delivered records route must contain it if set
+
+        Returns
+        -------
+        Subscription
+            Client subscription
+        """
+        subscription = Subscription(level, route, self.queue_size)
+        self._subscriptions.add(subscription)
+        SUBSCRIBERS.set(len(self._subscriptions))
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._follow())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove log stream client, file following stops after last client left
+
+        Parameters
+        ----------
+        subscription : Subscription
+            Client subscription
+        """
+        self._subscriptions.discard(subscription)
+        SUBSCRIBERS.set(len(self._subscriptions))
+
+    async def close(self) -> None:
+        """Stop following and close all streams
+        """
+        for subscription in self._subscriptions:
+            subscription.offer(None)
+        self._subscriptions.clear()
+        SUBSCRIBERS.set(0)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _open(self, start: bool) -> None:
+        self._file = open(self.path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._file.seek(0 if start else stat.st_size)
+        self._partial = b''
+
+    def _release(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._identity = None
+        self._partial = b''
+
+    def _read(self) -> List[bytes]:
+        """Read complete lines added since previous read
+
+        Returns
+        -------
+        List[bytes]
+            New lines
+        """
+        lines = []
+        if self._file is None:
+            try:
+                self._open(start=self._created)
+            except FileNotFoundError:
+                self._created = True
+                return lines
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+
+        if stat is not None and (stat.st_dev, stat.st_ino) != self._identity:
+            lines = self._lines(self._file.read(), final=True)
+            self._release()
+            self._open(start=True)
+            make_log(self.logger, 'info', 'Log file rotated', self.extra)
+        elif stat is not None and stat.st_size < self._file.tell():
+            self._file.seek(0)
+            self._partial = b''
+        elif stat is None or stat.st_size == self._file.tell():
+            return lines
+
+        return lines + self._lines(self._file.read())
+
+    def _lines(self, data: bytes, final: bool = False) -> List[bytes]:
+        data = self._partial + data
+        lines = data.split(b'\n')
+        self._partial = b'' if final else lines.pop()
+        return [line for line in lines if line]
+
+    def _parse(self, lines: List[bytes]) -> List[Dict]:
+        records = []
+        for line in lines:
+            text = line.decode(self.encoding, errors='replace').rstrip('\r')
+            match = RECORD.match(text)
+            if match is not None:
+                self._last = match.groupdict()
+                records.append(self._last)
+            elif records:
+                records[-1]['message'] += '\n' + text
+            elif self._last is not None:
+                records.append(dict(self._last, message=text))
+        return records
+
+    async def _follow(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._created = False
+        try:
+            while self._subscriptions:
+                try:
+                    lines = await loop.run_in_executor(None, self._read)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    make_log(self.logger, 'error', f'Throws exception while tailing log: {e.__class__.__name__}',
+                             self.extra)
+                    self._release()
+                else:
+                    for record in self._parse(lines):
+                        for subscription in self._subscriptions:
+                            if subscription.matches(record):
+                                subscription.offer(record)
+                await asyncio.sleep(self.interval)
+        finally:
+            self._release()
+
+
+async def tailer_context(app):
+    """Context coroutine run when app run and stop
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    settings = app['settings']['logging']['stream']
+    app['LogTailer'] = LogTailer(LOG_PATH,
+                                 settings['interval'],
+                                 settings['queue'],
+                                 app['settings']['project']['encoding'],
+                                 logging.getLogger(config['project']['name']))
+    yield
+    await app['LogTailer'].close()
+
+
+async def close_tailer(app):
+    """Shutdown coroutine closing open log streams
+
+    Runs before server waits for handlers to finish, so open streams
+    do not hold graceful shutdown until its timeout
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    await app['LogTailer'].close()
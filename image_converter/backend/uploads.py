@@ -0,0 +1,301 @@
+"""Resumable uploads storage
+
+This file provides storage for resumable chunked uploads and contains the following
+
+Classes:
+
+    * UploadTooLarge
+    * UploadStore
+
+Coroutines:
+
+    * expire_uploads(store: UploadStore, interval: float, logger: Logger) -> None
+    * uploads_context(app) - Context coroutine
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, Optional, AsyncIterator
+
+import aiofiles
+
+from image_converter.settings import config
+from image_converter.metrics import metrics
+from image_converter.backend.views.helpers import make_log
+
+
+RECEIVED_BYTES = metrics.counter('upload_bytes_received_total', 'Bytes appended to resumable uploads')
+EXPIRED_UPLOADS = metrics.counter('upload_expired_total', 'Abandoned resumable uploads removed')
+
+
+class UploadTooLarge(Exception):
+    """Appended data exceeds declared upload length
+    """
+
+
+class UploadStore:
+    """
+    A class that represent storage of resumable upload sessions
+
+    Upload data is appended to path / {id}.part spool file, session
+    metadata is stored in path / {id}.json. Current offset is spool file size,
+    so it survives restarts and interrupted requests keep received bytes.
+
+    Attributes
+    ----------
+    path : Path
+        Uploads folder
+    ttl : float
+        Seconds of inactivity after which upload is abandoned
+    max_size : int
+        Maximal upload length in bytes
+    chunk : int
+        Size of chunk read from request body
+
+    Methods
+    -------
+    create(self, owner: str, length: int, mimetype: str, params: Dict) -> Dict
+        Create upload session
+    get(self, upload_id: str, owner: str) -> Optional[Dict]
+        Upload session of owner
+    lock(self, upload_id: str) -> asyncio.Lock
+        Lock serializing writes to upload
+    spool(self, upload_id: str) -> Path
+        Path to upload data
+    append(self, upload: Dict, content: AsyncIterator[bytes]) -> int
+        Append request body to upload
+    remove(self, upload_id: str) -> None
+        Remove upload session and data
+    expire(self) -> int
+        Remove abandoned uploads
+    """
+    upload_id_pattern = re.compile(r'^[0-9a-f]{32}$')
+
+    def __init__(self, path: Path, ttl: float, max_size: int, chunk: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.chunk = chunk
+        self._locks = {}
+
+    def _meta(self, upload_id: str) -> Path:
+        return self.path / f'{upload_id}.json'
+
+    def spool(self, upload_id: str) -> Path:
+        """Path to upload data
+
+        Parameters
+        ----------
+        upload_id : str
+            Upload id
+
+        Returns
+        -------
+        Path
+            Path to spool file
+        """
+        return self.path / f'{upload_id}.part'
+
+    def create(self, owner: str, length: int, mimetype: str, params: Dict) -> Dict:
+        """Create upload session
+
+        Parameters
+        ----------
+        owner : str
+            Token of user created upload
+        length : int
+            Declared upload length in bytes
+        mimetype : str
+            Declared image mimetype
+        params : Dict
+            Conversion params
+
+        Returns
+        -------
+        Dict
+            Upload session
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        upload = {'id': uuid.uuid4().hex,
+                  'owner': owner,
+                  'length': length,
+                  'mimetype': mimetype,
+                  'params': params,
+                  'created': time.time()}
+        self.spool(upload['id']).touch()
+        self._meta(upload['id']).write_text(json.dumps(upload), encoding='utf-8')
+        upload['offset'] = 0
+        return upload
+
+    def get(self, upload_id: str, owner: str) -> Optional[Dict]:
+        """Upload session of owner
+
+        Parameters
+        ----------
+        upload_id : str
+            Upload id
+        owner : str
+            Token of requesting user
+
+        Returns
+        -------
+        Optional[Dict]
+            Upload session with current offset or None if not found
+        """
+        if not self.upload_id_pattern.match(upload_id):
+            return None
+        try:
+            upload = json.loads(self._meta(upload_id).read_text(encoding='utf-8'))
+            upload['offset'] = self.spool(upload_id).stat().st_size
+        except (FileNotFoundError, ValueError):
+            return None
+        return upload if upload['owner'] == owner else None
+
+    def lock(self, upload_id: str) -> asyncio.Lock:
+        """Lock serializing writes to upload
+
+        Parameters
+        ----------
+        upload_id : str
+            Upload id
+
+        Returns
+        -------
+        asyncio.Lock
+            Upload lock
+        """
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    async def append(self, upload: Dict, content: AsyncIterator[bytes]) -> int:
+        """Append request body to upload, memory usage is bounded by chunk size
+
+        Bytes received before connection is lost are kept, body exceeding
+        declared length is discarded as whole
+
+        Parameters
+        ----------
+        upload : Dict
+            Upload session
+        content : AsyncIterator[bytes]
+            Request body chunks
+
+        Returns
+        -------
+        int
+            New offset
+        """
+        offset = start = upload['offset']
+        async with aiofiles.open(self.spool(upload['id']), 'ab') as f:
+            try:
+                async for chunk in content:
+                    if offset + len(chunk) > upload['length']:
+                        raise UploadTooLarge
+                    await f.write(chunk)
+                    offset += len(chunk)
+            except UploadTooLarge:
+                await f.truncate(start)
+                raise
+            finally:
+                RECEIVED_BYTES.inc(offset - start)
+        return offset
+
+    def remove(self, upload_id: str) -> None:
+        """Remove upload session and data
+
+        Parameters
+        ----------
+        upload_id : str
+            Upload id
+        """
+        self._locks.pop(upload_id, None)
+        for path in (self._meta(upload_id), self.spool(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def expire(self) -> int:
+        """Remove uploads without appended data during ttl
+
+        Returns
+        -------
+        int
+            Number of removed uploads
+        """
+        if not self.path.is_dir():
+            return 0
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for meta in self.path.glob('*.json'):
+            upload_id = meta.stem
+            lock = self._locks.get(upload_id)
+            if lock is not None and lock.locked():
+                continue
+            try:
+                spool = self.spool(upload_id)
+                mtime = spool.stat().st_mtime if spool.exists() else meta.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if mtime < cutoff:
+                self.remove(upload_id)
+                removed += 1
+        return removed
+
+
+async def expire_uploads(store: UploadStore, interval: float, logger: logging.Logger) -> None:
+    """Remove abandoned uploads forever
+
+    Parameters
+    ----------
+    store : UploadStore
+        Uploads storage
+    interval : float
+        Seconds between passes
+    logger : Logger
+        Instance for logger
+    """
+    extra = {'route': 'uploads', 'functionName': 'expire'}
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            removed = await loop.run_in_executor(None, store.expire)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            make_log(logger, 'error', f'Throws exception while expiring uploads: {e.__class__.__name__}', extra)
+        else:
+            if removed:
+                EXPIRED_UPLOADS.inc(removed)
+                make_log(logger, 'info', f'Removed {removed} abandoned uploads', extra)
+        await asyncio.sleep(interval)
+
+
+async def uploads_context(app):
+    """Context coroutine run when app run and stop
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    settings = app['settings']['uploads']
+    app['Uploads'] = UploadStore(app['settings']['project_root'] / settings['path'],
+                                 settings['ttl'],
+                                 settings['max_size'],
+                                 settings['chunk'])
+    task = asyncio.ensure_future(expire_uploads(app['Uploads'],
+                                                settings['interval'],
+                                                logging.getLogger(config['project']['name'])))
+    yield
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
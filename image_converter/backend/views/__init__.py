@@ -1,2 +1,7 @@
 from .image.view import ImageView
 from .log.view import LogView
+from .metrics.view import MetricsView
+from .profile.view import ProfileView
+from .upload.view import UploadView
+from .sprite.view import SpriteView
+from .export.view import ExportView
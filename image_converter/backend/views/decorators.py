@@ -5,18 +5,37 @@ functions:
 
     * request_log(method): - returns wrapped function with log features
     * auth(method) - returns wrapped function with authorization features
+    * rate_limit(method) - returns wrapped function with per token rate limiting
+    * deadline(method) - returns wrapped function with request deadline
+    * profile(method) - returns wrapped function with opt-in profiling
+    * authenticate(request: Request, function_name: str) -> Union[Response, str] - check request token
+    * continue_request(request: Request,
+                       max_size: Optional[int],
+                       content_types: Tuple[str, ...],
+                       function_name: str) -> Optional[Response] - expect handler checks
 """
 
+import math
+import time
+import uuid
+import random
+import asyncio
 import logging
 import functools
 from http import HTTPStatus
+from typing import Optional, Tuple, Union
 
 from sqlalchemy.exc import DBAPIError
-from aiohttp.web import Response
+from aiohttp import HttpVersion11
+from aiohttp.web import Response, Request
+from aiohttp.hdrs import RETRY_AFTER, EXPECT
 
 from image_converter.settings import config
+from image_converter.profiling import Profile, EXTENSIONS
+from image_converter.deadlines import EXCEEDED
 from image_converter.backend.models import User
-from image_converter.backend.views.helpers import create_code_description
+from image_converter.backend.views.helpers import create_code_description, create_descriptive_response, \
+    check_body_headers
 
 
 def request_log(method):
@@ -48,6 +67,133 @@ def request_log(method):
 def auth(method):
     """Provided decorated method with auth features
 
+    Parameters
+    ----------
+    method : Callable
+        wrapping method
+
+    Returns
+    -------
+    Callable
+        wrapped function
+    """
+
+    @functools.wraps(method)
+    async def inner(ref, request):
+        token = await authenticate(request, method.__name__)
+        if isinstance(token, Response):
+            return token
+        request['token'] = token
+        return await method(ref, request)
+
+    return inner
+
+
+async def authenticate(request: Request, function_name: str) -> Union[Response, str]:
+    """Check request token, tokens found in database are cached for a while
+
+    Parameters
+    ----------
+    request : Request
+        Client request
+    function_name : str
+        Name of called handler
+
+    Returns
+    -------
+    Union[Response, str]
+        Response if token is missing or unknown or token
+    """
+    log = logging.getLogger(config['project']['name'])
+    extra = {'route': request.url, 'functionName': function_name}
+    _token = request.headers.get('Authorization')
+    if not _token:
+        status = HTTPStatus.FORBIDDEN
+        log.info(f'User not provide token', extra=extra)
+        return Response(status=status, body=create_code_description(status))
+
+    log.info(f'Auth Request {_token}', extra=extra)
+
+    token = _token.split(' ')
+    if len(token) != 2:
+        status = HTTPStatus.BAD_REQUEST
+        log.info(f'Bad token data {_token} provided', extra=extra)
+        return Response(status=status, body=create_code_description(status))
+
+    token = token[1]
+    tokens = request.app['Tokens']
+    if not tokens.get(token):
+        session = request.app['db']
+        try:
+            async with session.begin():
+                user = await session.get(User, token)
+        except DBAPIError:
+            user = None
+
+        if user is None:
+            status = HTTPStatus.UNAUTHORIZED
+            log.info(f'User with token {_token} not found', extra=extra)
+            return Response(status=status, body=create_code_description(status))
+        tokens.add(token)
+
+    log.info(f'User {_token} Authorized', extra=extra)
+    return token
+
+
+async def continue_request(request: Request,
+                           max_size: Optional[int],
+                           content_types: Tuple[str, ...],
+                           function_name: str) -> Optional[Response]:
+    """Expect handler, token, declared body length and content type are checked
+    before client is asked to send body, so rejected upload costs only its headers.
+    Expect handler runs before middlewares, so session opened by token check is
+    released here
+
+    Parameters
+    ----------
+    request : Request
+        Client request with Expect header
+    max_size : int
+        Maximal body length in bytes or None
+    content_types : Tuple[str, ...]
+        Allowed body content types, any if empty
+    function_name : str
+        Name of handler receiving body
+
+    Returns
+    -------
+    Optional[Response]
+        Response if request rejected, body is not read then
+    """
+    log = logging.getLogger(config['project']['name'])
+    if request.version != HttpVersion11:
+        return None
+    if request.headers.get(EXPECT, '').lower() != '100-continue':
+        return create_descriptive_response(HTTPStatus.EXPECTATION_FAILED)
+
+    try:
+        token = await authenticate(request, function_name)
+    finally:
+        await request.app['db'].remove()
+    if isinstance(token, Response):
+        return token
+    request['token'] = token
+    rejected = check_body_headers(request, max_size, content_types)
+    if rejected is not None:
+        log.info(f'Body of {request.content_length} bytes of {request.content_type} rejected before upload',
+                 extra={'route': request.url, 'functionName': function_name})
+        return rejected
+
+    await request.writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+    request.writer.output_size = 0
+    return None
+
+
+def rate_limit(method):
+    """Provided decorated method with per token rate limiting
+
+    Must be applied after auth decorator
+
     Parameters
     ----------
     method : Callable
@@ -62,37 +208,136 @@ def auth(method):
 
     @functools.wraps(method)
     async def inner(ref, request):
-        extra = {'route': request.url, 'functionName': method.__name__}
-        _token = request.headers.get('Authorization')
-        if not _token:
-            status = HTTPStatus.FORBIDDEN
-            log.info(f'User not provide token',
+        token = request['token']
+        delay = request.app['RateLimiter'].acquire(token)
+        if delay:
+            log.info(f'Token {token} rate limited',
                      extra={'route': request.url, 'functionName': method.__name__})
-            return Response(status=status, body=create_code_description(status))
+            return create_descriptive_response(HTTPStatus.TOO_MANY_REQUESTS,
+                                               headers={RETRY_AFTER: str(math.ceil(delay))})
+        return await method(ref, request)
 
-        log.info(f'Auth Request {_token}', extra=extra)
+    return inner
 
-        token = _token.split(' ')
-        if len(token) == 2:
-            token = token[1]
-            session = request.app['db']
 
-            try:
-                async with session.begin():
-                    await session.get(User, token)
-            except DBAPIError:
-                status = HTTPStatus.UNAUTHORIZED
-                log.info(f'User with token {_token} not found',
-                         extra={'route': request.url, 'functionName': method.__name__})
-                return Response(status=status, body=create_code_description(status))
-            else:
-                log.info(f'User {_token} Authorized',
-                         extra={'route': request.url, 'functionName': method.__name__})
-                return await method(ref, request)
+def deadline(method):
+    """Provided decorated method with request deadline
+
+    Request timeout in seconds is taken from deadline header or from settings
+    and is limited by configured maximum. Deadline is stored in request as
+    epoch time for converter workers, request task is cancelled when it
+    expires, so multipart reading, database calls and waiting for conversion
+    slot are stopped too. Handler runs in request task, so it keeps request
+    session released by session middleware and may catch cancellation to
+    clean up when deadline_expired is set in request. Must be applied after
+    auth decorator
+
+    Parameters
+    ----------
+    method : Callable
+        wrapping method
+
+    Returns
+    -------
+    Callable
+        wrapped function
+    """
+    log = logging.getLogger(config['project']['name'])
+
+    @functools.wraps(method)
+    async def inner(ref, request):
+        settings = request.app['settings']['deadlines']
+        timeout = settings['default']
+        try:
+            requested = float(request.headers[settings['header']])
+        except (KeyError, ValueError):
+            pass
         else:
-            status = HTTPStatus.BAD_REQUEST
-            log.info(f'Bad token data {_token} provided',
-                     extra={'route': request.url, 'functionName': method.__name__})
-            return Response(status=status, body=create_code_description(status))
+            if 0 < requested < math.inf:
+                timeout = requested
+        if settings['max'] and (not timeout or timeout > settings['max']):
+            timeout = settings['max']
+        if not timeout:
+            return await method(ref, request)
+
+        request['deadline'] = time.time() + timeout
+        task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+
+        def expire():
+            request['deadline_expired'] = True
+            task.cancel()
+
+        timer = loop.call_at(loop.time() + timeout, expire)
+        try:
+            return await method(ref, request)
+        except asyncio.CancelledError:
+            if not request.get('deadline_expired'):
+                raise
+            return create_descriptive_response(HTTPStatus.GATEWAY_TIMEOUT)
+        finally:
+            timer.cancel()
+            if request.get('deadline_expired'):
+                if hasattr(task, 'uncancel'):
+                    task.uncancel()
+                EXCEEDED.inc(stage='request')
+                log.info(f'Request deadline of {timeout}s exceeded',
+                         extra={'route': request.url, 'functionName': method.__name__})
+
+    return inner
+
+
+def profile(method):
+    """Provided decorated method with opt-in profiling
+
+    Profiling is enabled by profiling header sent with privileged token
+    or by sampling rate. Profiling mode is stored in request for
+    profiling inside converter worker. Must be applied after auth
+    decorator. cpu profile of handler includes all code run by event loop
+    while handler is awaited.
+
+    Parameters
+    ----------
+    method : Callable
+        wrapping method
+
+    Returns
+    -------
+    Callable
+        wrapped function
+    """
+    log = logging.getLogger(config['project']['name'])
+
+    @functools.wraps(method)
+    async def inner(ref, request):
+        settings = request.app['settings']['profiling']
+        mode = request.headers.get(settings['header'])
+        if mode is not None and (mode not in EXTENSIONS or request['token'] not in settings['tokens']):
+            mode = None
+        if mode is None and settings['sample_rate'] and random.random() < settings['sample_rate']:
+            mode = settings['mode']
+        if mode is None:
+            return await method(ref, request)
+
+        request_id = uuid.uuid4().hex
+        request['profile'] = mode
+        request['request_id'] = request_id
+        handler = Profile(mode) if Profile.available(mode) else None
+        log.info(f'Profiling request {request_id} in {mode} mode',
+                 extra={'route': request.url, 'functionName': method.__name__})
+
+        if handler is not None:
+            handler.start()
+        try:
+            result = await method(ref, request)
+        finally:
+            if handler is not None:
+                handler.stop()
+
+        if handler is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, request.app['Profiles'].save, request_id, 'handler', mode, handler.dump())
+        result.headers['X-Profile-Id'] = request_id
+        return result
 
     return inner
@@ -0,0 +1 @@
+from .get import GetLogic
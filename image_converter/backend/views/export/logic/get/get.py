@@ -0,0 +1,126 @@
+"""Export View get logic
+
+This file provides export view logic class and contains the following
+
+Classes:
+
+    * GetLogic
+"""
+
+from logging import Logger
+from http import HTTPStatus
+from typing import Dict, Union
+
+from aiohttp.web import Response, StreamResponse, Request
+
+from image_converter.backend.export import ExportStream
+from image_converter.backend.views.helpers import make_log, create_descriptive_response
+from image_converter.backend.views.image.logic.list.helpers import decode_cursor
+
+
+class GetLogic:
+    """
+    A class that represent export view get request processing logic
+
+    Attributes
+    ----------
+    request : Request
+        User's request
+    extra : Dict
+        Log formatting extra's dict
+    db_session : Session
+        Open database session
+    path : str
+        Path to images folder
+    extension : str
+        Extension of stored file
+    settings : Dict
+        Export settings
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    check_access(self) -> Union[Response, None]
+        Allow export only to privileged tokens
+    get_request_params(self) -> Union[Response, Dict]
+        Parse cursor of previous export from query
+    create_stream(self, params: Dict) -> StreamResponse
+        Stream tar archive of images and rows
+    """
+    content_type = 'application/x-tar'
+
+    def __init__(self, request: Request, logger: Logger, function_name: str):
+        self.request = request
+        self.extra = {'route': request.url, 'functionName': function_name}
+        self.db_session = self.request.app['db']
+        self.path = self.request.app['settings']['images_path']
+        self.extension = self.request.app['Converter'].extension
+        self.settings = self.request.app['settings']['export']
+        self.logger = logger
+
+    def check_access(self) -> Union[Response, None]:
+        """Allow export only to tokens listed in settings
+
+        Returns
+        -------
+        Response | None
+            Response if access denied
+        """
+        if self.request['token'] not in self.settings['tokens']:
+            make_log(self.logger,
+                     'info',
+                     f'Token {self.request["token"]} is not allowed to export',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.FORBIDDEN)
+        return None
+
+    def get_request_params(self) -> Union[Response, Dict]:
+        """Parse cursor of previous export from since query param
+
+        Returns
+        -------
+        Union[Response, Dict]
+            Response if cursor malformed or parsed params
+        """
+        since = self.request.query.get('since')
+        try:
+            return {'after': decode_cursor(since) if since else None}
+        except ValueError:
+            make_log(self.logger,
+                     'debug',
+                     f'Bad export cursor {since}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.BAD_REQUEST)
+
+    async def create_stream(self, params: Dict) -> StreamResponse:
+        """Stream tar archive of images created after cursor, cursor of next
+        export is the last archive member
+
+        Parameters
+        ----------
+        params : Dict
+            Parsed request params
+
+        Returns
+        -------
+        StreamResponse for user's request
+        """
+        export = ExportStream(self.db_session,
+                              self.path,
+                              self.extension,
+                              params['after'],
+                              self.settings['chunk'],
+                              self.settings['settle'])
+        response = StreamResponse(status=HTTPStatus.OK,
+                                  headers={"Content-disposition": "attachment; filename=images.tar"})
+        response.content_type = self.content_type
+        await response.prepare(self.request)
+        async for data in export.chunks():
+            await response.write(data)
+        await response.write_eof()
+        make_log(self.logger,
+                 'info',
+                 f'Exported {export.images} images, next cursor {export.cursor}',
+                 self.extra)
+        return response
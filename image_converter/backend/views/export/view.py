@@ -0,0 +1,56 @@
+"""Export View class
+
+This file provides images export routing view class and contains the following
+
+Classes:
+
+    * ExportView
+"""
+
+import logging
+
+from aiohttp.web import Response, StreamResponse, Request
+
+from image_converter.settings import config
+from image_converter.backend.views.decorators import request_log, auth
+from image_converter.backend.views.export.logic import GetLogic
+
+
+log = logging.getLogger(config['project']['name'])
+
+
+class ExportView:
+    """
+    A class that represent images export routes handlers
+
+    Methods
+    -------
+    get(self, request: Request) -> StreamResponse
+        Stream archive of images created after cursor
+    """
+
+    @request_log
+    @auth
+    async def get(self, request: Request) -> StreamResponse:
+        """Coroutine handler for export request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        StreamResponse
+            Tar archive of images with NDJSON manifest of their rows
+        """
+        logic = GetLogic(request, log, self.get.__name__)
+        denied = logic.check_access()
+        if isinstance(denied, Response):
+            return denied
+        params = logic.get_request_params()
+        if isinstance(params, Response):
+            return params
+        session = request.app['db']
+        async with session.begin():
+            return await logic.create_stream(params)
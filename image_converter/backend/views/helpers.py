@@ -11,8 +11,12 @@ functions:
         Log data with provided msg
     * create_code_description(status_code: int) -> str:
         Format msg with server response status description
-    * create_descriptive_response(status: int) -> Response:
+    * create_descriptive_response(status: int, headers: Dict = None) -> Response:
         Create response with specific status and status description
+    * check_body_headers(request: Request,
+                         max_size: Optional[int],
+                         content_types: Tuple[str, ...] = ()) -> Optional[Response]:
+        Reject request by its headers before body is read
     * file_sender(writer, file_path=None)
         Create asynchronous write stream for read file
 """
@@ -20,12 +24,13 @@ functions:
 import asyncio
 from logging import Logger
 from http.client import responses
-from typing import Dict
+from typing import Dict, Optional, Tuple
 from pathlib import Path
+from http import HTTPStatus
 
 
 from aiohttp import streamer
-from aiohttp.web import Response
+from aiohttp.web import Response, Request
 
 
 def make_log(logger: Logger, level: str, msg: str, extra: Dict) -> None:
@@ -58,19 +63,44 @@ def create_code_description(status_code: int) -> str:
     return body
 
 
-def create_descriptive_response(status: int) -> Response:
+def create_descriptive_response(status: int, headers: Dict = None) -> Response:
     """Create response with status description body
 
     Parameters
     ----------
     status : Server response status code
+    headers : Additional response headers
 
     Returns
     -------
     Response
         aiohttp.Response instance with set body
     """
-    return Response(status=status, body=create_code_description(status))
+    return Response(status=status, body=create_code_description(status), headers=headers)
+
+
+def check_body_headers(request: Request,
+                       max_size: Optional[int],
+                       content_types: Tuple[str, ...] = ()) -> Optional[Response]:
+    """Reject request by declared body length and content type before body is read,
+    chunked body without Content-Length is not checked
+
+    Parameters
+    ----------
+    request : Client request
+    max_size : Maximal body length in bytes or None
+    content_types : Allowed body content types, any if empty
+
+    Returns
+    -------
+    Optional[Response]
+        Response if request rejected
+    """
+    if max_size and request.content_length is not None and request.content_length > max_size:
+        return create_descriptive_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    if content_types and request.content_type not in content_types:
+        return create_descriptive_response(HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+    return None
 
 
 @streamer
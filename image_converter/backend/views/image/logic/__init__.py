@@ -1,2 +1,4 @@
 from .get import GetLogic
+from .list import ListLogic
+from .meta import MetaLogic
 from .post import PostLogic
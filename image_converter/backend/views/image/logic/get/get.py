@@ -7,17 +7,30 @@ Classes:
     * GetLogic
 """
 
+import math
+import asyncio
 from logging import Logger
 from http import HTTPStatus
-from typing import Union
+from typing import Dict, Tuple, Union
 from pathlib import Path
 
 from sqlalchemy.exc import DBAPIError
 from aiohttp.web import Response, Request
+from aiohttp.hdrs import ACCEPT, IF_NONE_MATCH, RETRY_AFTER
 
+from image_converter.metrics import metrics
+from image_converter.images.formats import OutputFormat
+from image_converter.images.converter import TILES
+from image_converter.backend.limits import Overloaded
 from image_converter.backend.views.helpers import make_log, file_sender, create_descriptive_response
-from image_converter.backend.views.image.logic.get.helpers import add_extension_to_name
-from image_converter.backend.models import Image
+from image_converter.backend.views.image.logic.get.helpers import add_extension_to_name, negotiate_format
+from image_converter.backend.models import Image, Status
+
+
+BYTES_SERVED = metrics.counter('image_bytes_served_total', 'Image bytes sent to clients by format')
+BYTES_SAVED = metrics.counter('image_bytes_saved_total', 'Bytes saved by serving alternate format instead of primary')
+RENDERS = metrics.counter('image_renders_total', 'Alternate format renditions generated on demand')
+PYRAMIDS = metrics.counter('image_tile_pyramids_total', 'Tile pyramids generated on first tile request')
 
 
 class GetLogic:
@@ -34,8 +47,14 @@ class GetLogic:
         Open database session
     path : str
         Path to images folder
+    converter: ImageConverter
+        Converter for alternate formats rendering
+    limiter: ConcurrencyLimiter
+        Admission control for conversions
+    cache: ImageCache
+        Hot images cache
     extension : str
-        Extension for creating file
+        Extension of stored file
     logger : Logger
         Instance for logger
 
@@ -43,18 +62,35 @@ class GetLogic:
     -------
     get_request_data_id(self) -> str
         Get image id data from request
-    receive_data_from_db(self, entity, _id) -> Union[Response, str]:
-        Connect to database and try to receive image by orm
-    create_stream(self, _id: str) -> Response:
+    get_output_format(self) -> Union[Response, OutputFormat]
+        Negotiate output format from format query param or Accept header
+    receive_data_from_db(self, entity, _id) -> Union[Response, Image]:
+        Connect to database and try to receive converted image by orm
+    ensure_rendition(self, _id: str, output: OutputFormat) -> Path
+        Get path to image file in output format, render it if required
+    create_file_response(self, key: Tuple[str, str], file_name: Path, size: int, headers: Dict) -> Response
+        Send file to Client and offer it to cache
+    create_stream(self, data: Image, output: OutputFormat) -> Response:
         Send file to Client
+    create_rendition_stream(self, data: Image) -> Response:
+        Send stored rendition file to Client
+    get_request_tile(self, data: Image) -> Union[Response, Tuple[int, int, int]]
+        Get tile level, column and row from request
+    ensure_tile(self, _id: str, z: int, x: int, y: int) -> Path
+        Get path to tile file, make image tiles if required
+    create_tile_stream(self, data: Image) -> Response:
+        Send tile file to Client
     """
 
-    def __init__(self, request: Request, logger: Logger, function_name: str, extension: str):
+    def __init__(self, request: Request, logger: Logger, function_name: str):
         self.request = request
         self.extra = {'route': request.url, 'functionName': function_name}
         self.db_session = self.request.app['db']
         self.path = self.request.app['settings']['images_path']
-        self.extension = extension
+        self.converter = self.request.app['Converter']
+        self.limiter = self.request.app['Limiter']
+        self.cache = self.request.app['Cache']
+        self.extension = self.converter.extension
         self.logger = logger
 
     def get_request_data_id(self) -> str:
@@ -67,56 +103,313 @@ class GetLogic:
         """
         return self.request.match_info.get('image_id')
 
-    async def receive_data_from_db(self, entity: Image, _id: str) -> Union[Response, str]:
-        """Connect to database and try to get entity by id
+    def get_output_format(self) -> Union[Response, OutputFormat]:
+        """Negotiate output format from format query param or Accept header
+
+        Returns
+        -------
+        Union[Response, OutputFormat]
+            Response if requested format not available or output format
+        """
+        formats = self.converter.formats
+        name = self.request.query.get('format')
+        if name is None:
+            return negotiate_format(self.request.headers.get(ACCEPT), formats)
+        if name not in formats:
+            make_log(self.logger,
+                     'debug',
+                     f'Requested format {name} not available',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.NOT_ACCEPTABLE)
+        return formats[name]
+
+    async def receive_data_from_db(self, entity: Image, _id: str) -> Union[Response, Image]:
+        """Connect to database and try to get converted entity by id
 
         Parameters
         ----------
         entity : Image
-            Reader for multipart connection
+            Database ORM class
         _id : str
             Entity id
 
         Returns
         -------
-        Union[Response, str]:
-            Response if error occurs or image id
+        Union[Response, Image]:
+            Response if error occurs or image entity
         """
         try:
             data = await self.db_session.get(entity, _id)
-            data_id = data.id
         except DBAPIError:
+            data = None
+        if data is None or data.status != Status.READY:
             make_log(self.logger,
                      'debug',
                      f'DB entity Image with uuid {_id} not found',
                      self.extra)
             return create_descriptive_response(HTTPStatus.NOT_FOUND)
-        else:
-            return data_id
+        return data
 
-    async def create_stream(self, _id: str) -> Response:
-        """Coroutine for read file and write to stream
+    async def ensure_rendition(self, _id: str, output: OutputFormat) -> Path:
+        """Get path to image file in output format, render it if required
 
         Parameters
         ----------
         _id : str
             Entity id
+        output : OutputFormat
+            Requested output format
+
+        Returns
+        -------
+        Path
+            Path to image file
+        """
+        file_name = add_extension_to_name(self.path, _id, output.extension)
+        if not file_name.is_file():
+            async with self.limiter.slot():
+                await self.converter.async_render(_id, output.name)
+            RENDERS.inc(format=output.name)
+            make_log(self.logger,
+                     'debug',
+                     f'Image {_id} rendered to {output.name}',
+                     self.extra)
+        return file_name
+
+    async def create_file_response(self, key: Tuple[str, str], file_name: Path, size: int, headers: Dict) -> Response:
+        """Send file to Client, file small enough for cache is read at once and offered to cache,
+        file missing on disk is reported as not found before headers are sent
+
+        Parameters
+        ----------
+        key : Tuple[str, str]
+            Image id and rendition name
+        file_name : Path
+            Path to file
+        size : int
+            File size
+        headers : Dict
+            Response headers
 
         Returns
         -------
         Response for user's request
         """
-        file_name = add_extension_to_name(self.path, _id, self.extension)
         try:
-            if not Path(file_name).is_file():
-                raise FileNotFoundError  # TODO: Clear db entry
-            data = file_sender(file_path=file_name)
-        except FileNotFoundError:
+            if size > self.cache.max_item:
+                if not file_name.is_file():
+                    raise FileNotFoundError(file_name)
+                return Response(status=HTTPStatus.OK, body=file_sender(file_path=file_name), headers=headers)
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(None, file_name.read_bytes)
+        except OSError:
             make_log(self.logger,
                      'error',
-                     f'Image file {_id} not found',
+                     f'Image file {file_name.name} not found',
                      self.extra)
             return create_descriptive_response(HTTPStatus.NOT_FOUND)
-        else:
-            headers = {"Content-disposition": f"attachment; filename={file_name}"}
-            return Response(status=HTTPStatus.OK, body=data, headers=headers)
+        self.cache.admit(key, body)
+        headers.pop("Content-Length", None)
+        return Response(status=HTTPStatus.OK, body=body, headers=headers)
+
+    async def create_stream(self, data: Image, output: OutputFormat) -> Response:
+        """Coroutine for read file and write to stream
+
+        File metadata is taken from database entity instead of stored file,
+        cached file is sent from memory
+
+        Parameters
+        ----------
+        data : Image
+            Database entity
+        output : OutputFormat
+            Requested output format
+
+        Returns
+        -------
+        Response for user's request
+        """
+        _id = str(data.id)
+        cached = self.cache.get((_id, output.name))
+        if cached is not None:
+            etag = data.hash
+            if output.extension != self.extension:
+                BYTES_SAVED.inc(max(0, data.size - len(cached)), format=output.name)
+                etag = f'{etag}-{output.name}'
+            BYTES_SERVED.inc(len(cached), format=output.name)
+            headers = {"Content-disposition": f"attachment; filename={_id}.{output.extension}",
+                       "Content-Type": output.mimetype,
+                       "ETag": f'"{etag}"',
+                       "Vary": ACCEPT}
+            return Response(status=HTTPStatus.OK, body=cached, headers=headers)
+
+        file_name = add_extension_to_name(self.path, _id, self.extension)
+        size = data.size
+        etag = data.hash
+        if output.extension != self.extension:
+            try:
+                rendition = await self.ensure_rendition(_id, output)
+                rendition_size = rendition.stat().st_size
+            except Exception as e:
+                make_log(self.logger,
+                         'error',
+                         f'Throws exception while rendering {output.name}: {e.__class__.__name__}',
+                         self.extra)
+                output = self.converter.formats[self.extension]
+            else:
+                BYTES_SAVED.inc(max(0, size - rendition_size), format=output.name)
+                file_name, size, etag = rendition, rendition_size, f'{etag}-{output.name}'
+
+        BYTES_SERVED.inc(size, format=output.name)
+        headers = {"Content-disposition": f"attachment; filename={file_name.name}",
+                   "Content-Type": output.mimetype,
+                   "Content-Length": str(size),
+                   "ETag": f'"{etag}"',
+                   "Vary": ACCEPT}
+        return await self.create_file_response((_id, output.name), file_name, size, headers)
+
+    async def create_rendition_stream(self, data: Image) -> Response:
+        """Coroutine for read stored rendition file and write to stream
+
+        Renditions are pages of multi-frame image, first page is stored image
+        itself, and downscaled widths
+
+        Parameters
+        ----------
+        data : Image
+            Database entity
+
+        Returns
+        -------
+        Response for user's request
+        """
+        name = self.request.match_info.get('rendition')
+        metadata = (data.renditions or {}).get(name)
+        if metadata is None:
+            make_log(self.logger,
+                     'debug',
+                     f'Rendition {name} of image {data.id} not found',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.NOT_FOUND)
+
+        stored_name = str(data.id) if name == 'p0' else f'{data.id}.{name}'
+        file_name = add_extension_to_name(self.path, stored_name, self.extension)
+        output = self.converter.formats[self.extension]
+        BYTES_SERVED.inc(metadata['size'], format=output.name)
+        headers = {"Content-disposition": f"attachment; filename={file_name.name}",
+                   "Content-Type": output.mimetype,
+                   "ETag": f'"{metadata["hash"]}"'}
+        key = (str(data.id), name)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return Response(status=HTTPStatus.OK, body=cached, headers=headers)
+        headers["Content-Length"] = str(metadata['size'])
+        return await self.create_file_response(key, file_name, metadata['size'], headers)
+
+    def get_request_tile(self, data: Image) -> Union[Response, Tuple[int, int, int]]:
+        """Get tile level, column and row from request and check tile exists in image pyramid
+
+        Parameters
+        ----------
+        data : Image
+            Database entity
+
+        Returns
+        -------
+        Union[Response, Tuple[int, int, int]]
+            Response if image has no such tile or tile level, column and row
+        """
+        z, x, y = (int(self.request.match_info[key]) for key in ('z', 'x', 'y'))
+        if 0 <= z < self.converter.tile_levels(data.width, data.height):
+            width, height = self.converter.level_size(data.width, data.height, z)
+            if x < math.ceil(width / self.converter.tile_size) and y < math.ceil(height / self.converter.tile_size):
+                return z, x, y
+        make_log(self.logger,
+                 'debug',
+                 f'Tile {z}/{x}/{y} of image {data.id} not found',
+                 self.extra)
+        return create_descriptive_response(HTTPStatus.NOT_FOUND)
+
+    async def ensure_tile(self, _id: str, z: int, x: int, y: int) -> Path:
+        """Get path to tile file, make all image tiles if required
+
+        Parameters
+        ----------
+        _id : str
+            Entity id
+        z : int
+            Level
+        x : int
+            Column
+        y : int
+            Row
+
+        Returns
+        -------
+        Path
+            Path to tile file
+        """
+        file_name = self.converter.tile_path(_id, z, x, y)
+        if not file_name.is_file():
+            async with self.limiter.slot():
+                count = await self.converter.async_tiles(_id)
+            PYRAMIDS.inc()
+            make_log(self.logger,
+                     'debug',
+                     f'Image {_id} split into {count} tiles',
+                     self.extra)
+        return file_name
+
+    async def create_tile_stream(self, data: Image) -> Response:
+        """Coroutine for read tile file and write to stream
+
+        Tiles never change, so they are cacheable by clients and proxies forever
+
+        Parameters
+        ----------
+        data : Image
+            Database entity
+
+        Returns
+        -------
+        Response for user's request
+        """
+        tile = self.get_request_tile(data)
+        if isinstance(tile, Response):
+            return tile
+
+        z, x, y = tile
+        _id = str(data.id)
+        output = self.converter.formats[self.extension]
+        headers = {"Content-Type": output.mimetype,
+                   "Cache-Control": "public, max-age=31536000, immutable",
+                   "ETag": f'"{data.hash}-{z}-{x}-{y}"'}
+        if self.request.headers.get(IF_NONE_MATCH) == headers["ETag"]:
+            return Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        key = (_id, f'{TILES}/{z}/{x}/{y}')
+        cached = self.cache.get(key)
+        if cached is not None:
+            BYTES_SERVED.inc(len(cached), format=TILES)
+            return Response(status=HTTPStatus.OK, body=cached, headers=headers)
+
+        try:
+            file_name = await self.ensure_tile(_id, z, x, y)
+            size = file_name.stat().st_size
+        except Overloaded as e:
+            make_log(self.logger,
+                     'warning',
+                     f'Conversion queue is full, retry after {e.retry_after}s',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.SERVICE_UNAVAILABLE,
+                                               headers={RETRY_AFTER: str(e.retry_after)})
+        except Exception as e:
+            make_log(self.logger,
+                     'error',
+                     f'Throws exception while making tiles: {e.__class__.__name__}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.INTERNAL_SERVER_ERROR)
+
+        BYTES_SERVED.inc(size, format=TILES)
+        headers["Content-Length"] = str(size)
+        return await self.create_file_response(key, file_name, size, headers)
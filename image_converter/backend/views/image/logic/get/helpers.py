@@ -6,9 +6,14 @@ for get requests and contains the following
 Functions:
 
     * add_extension_to_name(path: Path, data: str, extension) -> Path:
+    * parse_accept(header: str) -> Dict[str, float]:
+    * negotiate_format(header: str, formats: Dict[str, OutputFormat]) -> OutputFormat:
 """
 
 from pathlib import Path
+from typing import Dict
+
+from image_converter.images.formats import OutputFormat
 
 
 def add_extension_to_name(path: Path, data: str, extension: str) -> Path:
@@ -29,3 +34,67 @@ def add_extension_to_name(path: Path, data: str, extension: str) -> Path:
         Full Image path with name and extension
     """
     return path / f'{data}.{extension}'
+
+
+def parse_accept(header: str) -> Dict[str, float]:
+    """Parse Accept header media ranges
+
+    Parameters
+    ----------
+    header : str
+        Accept header value
+
+    Returns
+    -------
+    Dict[str, float]
+        Media ranges with their quality values
+    """
+    ranges = {}
+    for item in header.split(','):
+        media_range, *params = item.strip().split(';')
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges[media_range.strip().lower()] = q
+    return ranges
+
+
+def negotiate_format(header: str, formats: Dict[str, OutputFormat]) -> OutputFormat:
+    """Choose output format for Accept header
+
+    Alternate formats are chosen only when listed explicitly, primary format
+    (the first one) also matches wildcards. Ties are resolved by formats order
+    with alternates preferred over primary.
+
+    Parameters
+    ----------
+    header : str
+        Accept header value
+    formats : Dict[str, OutputFormat]
+        Available formats, primary format first
+
+    Returns
+    -------
+    OutputFormat
+        Chosen format
+    """
+    primary, *alternates = formats.values()
+    if not header:
+        return primary
+
+    ranges = parse_accept(header)
+    primary_q = ranges.get(primary.mimetype,
+                           ranges.get(f"{primary.mimetype.split('/')[0]}/*", ranges.get('*/*', 0.0)))
+    best, best_q = primary, primary_q
+    for output in alternates:
+        q = ranges.get(output.mimetype, 0.0)
+        if q > 0 and (q > best_q or (q == best_q and best is primary)):
+            best, best_q = output, q
+    return best
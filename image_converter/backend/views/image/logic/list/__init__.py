@@ -0,0 +1 @@
+from .list import ListLogic
@@ -0,0 +1,58 @@
+"""Image View list logic helpers
+
+This file provides helper functions for keyset pagination cursors
+and contains the following
+
+Functions:
+
+    * encode_cursor(created_at: datetime, _id: UUID) -> str
+    * decode_cursor(cursor: str) -> Tuple[datetime, UUID]
+"""
+
+import uuid
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, _id: uuid.UUID) -> str:
+    """Create opaque cursor pointing after row
+
+    Parameters
+    ----------
+    created_at : datetime
+        Row creation time
+    _id : UUID
+        Row id
+
+    Returns
+    -------
+    str
+        Url safe cursor
+    """
+    return base64.urlsafe_b64encode(f'{created_at.isoformat()}|{_id}'.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Parse cursor created by encode_cursor
+
+    Parameters
+    ----------
+    cursor : str
+        Url safe cursor
+
+    Returns
+    -------
+    Tuple[datetime, UUID]
+        Row creation time and id
+
+    Raises
+    ------
+    ValueError
+        If cursor is malformed
+    """
+    try:
+        created_at, _id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(cursor) from e
+    return datetime.fromisoformat(created_at), uuid.UUID(_id)
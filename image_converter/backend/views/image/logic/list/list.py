@@ -0,0 +1,140 @@
+"""Image View list logic
+
+This file provides image view logic class for listing requests and contains the following
+
+Classes:
+
+    * ListLogic
+"""
+
+import json
+import uuid
+from logging import Logger
+from http import HTTPStatus
+from typing import Dict, Union
+
+from sqlalchemy import select, tuple_, literal
+from sqlalchemy.sql import Select
+from aiohttp.web import Response, StreamResponse, Request
+
+from image_converter.backend.views.helpers import make_log, create_descriptive_response
+from image_converter.backend.views.image.logic.list.helpers import encode_cursor, decode_cursor
+from image_converter.backend.models import Image
+
+
+class ListLogic:
+    """
+    A class that represent image view listing request processing logic
+
+    Pages are selected by keyset on (created_at, image_id) so each page
+    costs one index range scan regardless of its depth
+
+    Attributes
+    ----------
+    request : Request
+        User's request
+    extra : Dict
+        Log formatting extra's dict
+    db_session : Session
+        Open database session
+    default_limit : int
+        Page size if limit not provided
+    max_limit : int
+        Maximum page size
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    get_request_params(self) -> Union[Response, Dict]
+        Parse cursor, limit and filters from query
+    create_query(self, entity: Image, params: Dict) -> Select
+        Create page select statement
+    create_stream(self, query: Select) -> StreamResponse
+        Stream page rows as NDJSON
+    """
+    content_type = 'application/x-ndjson'
+    chunk_rows = 100
+
+    def __init__(self, request: Request, logger: Logger, function_name: str):
+        self.request = request
+        self.extra = {'route': request.url, 'functionName': function_name}
+        self.db_session = self.request.app['db']
+        self.default_limit = self.request.app['settings']['listing']['limit']
+        self.max_limit = self.request.app['settings']['listing']['max_limit']
+        self.logger = logger
+
+    def get_request_params(self) -> Union[Response, Dict]:
+        """Parse cursor, limit and filters from query
+
+        Returns
+        -------
+        Union[Response, Dict]
+            Response if params malformed or parsed params
+        """
+        query = self.request.query
+        try:
+            params = {'after': decode_cursor(query['after']) if 'after' in query else None,
+                      'limit': min(int(query.get('limit', self.default_limit)), self.max_limit),
+                      'owner': uuid.UUID(query['owner']) if 'owner' in query else None,
+                      'status': query.get('status')}
+            if params['limit'] < 1:
+                raise ValueError(params['limit'])
+        except ValueError:
+            make_log(self.logger,
+                     'debug',
+                     f'Bad listing params {dict(query)}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.BAD_REQUEST)
+        return params
+
+    def create_query(self, entity: Image, params: Dict) -> Select:
+        """Create page select statement
+
+        Parameters
+        ----------
+        entity : Image
+            Database ORM class
+        params : Dict
+            Parsed request params
+
+        Returns
+        -------
+        Select
+            Page statement
+        """
+        query = select(entity).order_by(entity.created_at, entity.id).limit(params['limit'])
+        if params['after'] is not None:
+            created_at, _id = params['after']
+            query = query.where(tuple_(entity.created_at, entity.id) >
+                                tuple_(literal(created_at, entity.created_at.type), literal(_id, entity.id.type)))
+        if params['owner'] is not None:
+            query = query.where(entity.owner_id == params['owner'])
+        if params['status'] is not None:
+            query = query.where(entity.status == params['status'])
+        return query
+
+    async def create_stream(self, query: Select) -> StreamResponse:
+        """Stream page rows as NDJSON, each row carries cursor of next page
+
+        Parameters
+        ----------
+        query : Select
+            Page statement
+
+        Returns
+        -------
+        StreamResponse for user's request
+        """
+        response = StreamResponse(status=HTTPStatus.OK)
+        response.content_type = self.content_type
+        await response.prepare(self.request)
+
+        result = await self.db_session.stream_scalars(query)
+        async for images in result.partitions(self.chunk_rows):
+            lines = (json.dumps(dict(image.to_dict(), cursor=encode_cursor(image.created_at, image.id)))
+                     for image in images)
+            await response.write(''.join(f'{line}\n' for line in lines).encode())
+
+        await response.write_eof()
+        return response
@@ -0,0 +1 @@
+from .meta import MetaLogic
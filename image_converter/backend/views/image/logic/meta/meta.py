@@ -0,0 +1,135 @@
+"""Image View metadata logic
+
+This file provides image view logic class for head and metadata requests
+answered from database without filesystem access and contains the following
+
+Classes:
+
+    * MetaLogic
+"""
+
+from logging import Logger
+from http import HTTPStatus
+from typing import Union
+from datetime import timezone
+from email.utils import format_datetime
+
+from sqlalchemy.exc import DBAPIError
+from aiohttp.web import Response, Request, json_response
+
+from image_converter.backend.views.helpers import make_log, create_descriptive_response
+from image_converter.backend.models import Image, Status
+
+
+class MetaLogic:
+    """
+    A class that represent image view metadata request processing logic
+
+    Attributes
+    ----------
+    request : Request
+        User's request
+    extra : Dict
+        Log formatting extra's dict
+    db_session : Session
+        Open database session
+    mimetype : str
+        Stored file mimetype
+    converter : ImageConverter
+        Converter with deep zoom tiles settings
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    get_request_data_id(self) -> str
+        Get image id data from request
+    receive_data_from_db(self, entity, _id) -> Union[Response, Image]:
+        Connect to database and try to receive image by orm
+    create_head_response(self, data: Image) -> Response:
+        Response with stored file headers
+    create_json_response(self, data: Image) -> Response:
+        Response with image metadata
+    """
+
+    def __init__(self, request: Request, logger: Logger, function_name: str):
+        self.request = request
+        self.extra = {'route': request.url, 'functionName': function_name}
+        self.db_session = self.request.app['db']
+        self.mimetype = self.request.app['settings']['images']['mimetype']
+        self.converter = self.request.app['Converter']
+        self.logger = logger
+
+    def get_request_data_id(self) -> str:
+        """Get image id data from request
+
+        Returns
+        -------
+        str
+            Image id request data
+        """
+        return self.request.match_info.get('image_id')
+
+    async def receive_data_from_db(self, entity: Image, _id: str) -> Union[Response, Image]:
+        """Connect to database and try to get entity by id
+
+        Parameters
+        ----------
+        entity : Image
+            Database ORM class
+        _id : str
+            Entity id
+
+        Returns
+        -------
+        Union[Response, Image]:
+            Response if error occurs or image entity
+        """
+        try:
+            data = await self.db_session.get(entity, _id)
+        except DBAPIError:
+            data = None
+        if data is None:
+            make_log(self.logger,
+                     'debug',
+                     f'DB entity Image with uuid {_id} not found',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.NOT_FOUND)
+        return data
+
+    async def create_head_response(self, data: Image) -> Response:
+        """Response with stored file headers
+
+        Parameters
+        ----------
+        data : Image
+            Database entity
+
+        Returns
+        -------
+        Response for user's request
+        """
+        if data.status != Status.READY:
+            return Response(status=HTTPStatus.NOT_FOUND)
+        headers = {"Content-Type": self.mimetype,
+                   "Content-Length": str(data.size),
+                   "ETag": f'"{data.hash}"',
+                   "Last-Modified": format_datetime(data.created_at.astimezone(timezone.utc), usegmt=True)}
+        return Response(status=HTTPStatus.OK, headers=headers)
+
+    async def create_json_response(self, data: Image) -> Response:
+        """Response with image metadata, tiles key has deep zoom tile size and
+        number of levels or None if image has no tiles
+
+        Parameters
+        ----------
+        data : Image
+            Database entity
+
+        Returns
+        -------
+        Response for user's request
+        """
+        levels = self.converter.tile_levels(data.width, data.height)
+        tiles = {'size': self.converter.tile_size, 'levels': levels} if levels else None
+        return json_response(dict(data.to_dict(), mimetype=self.mimetype, tiles=tiles))
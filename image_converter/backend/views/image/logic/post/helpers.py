@@ -25,7 +25,7 @@ from aiohttp.hdrs import CONTENT_TYPE
 
 
 def dict_from_string(data: str) -> Dict:
-    """Parse params data
+    """Parse params data, quoted values are unquoted, integer values are converted
 
     Parameters
     ----------
@@ -41,7 +41,11 @@ def dict_from_string(data: str) -> Dict:
     data = re.sub(r'[{}]', '', data)
     for params in data.split(','):
         k, v = params.split('=')
-        metadata[k] = int(v)
+        k, v = k.strip(), v.strip().strip('\'"')
+        try:
+            metadata[k] = int(v)
+        except ValueError:
+            metadata[k] = v
     return metadata
 
 
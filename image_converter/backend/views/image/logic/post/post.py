@@ -7,19 +7,30 @@ Classes:
     * PostLogic
 """
 
+import uuid
 import asyncio
 from logging import Logger
 from http import HTTPStatus
-from typing import Tuple, Union, Dict
+from typing import List, Tuple, Union, Dict
 
+from sqlalchemy import delete, update
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm.decl_api import DeclarativeMeta
 from aiohttp import MultipartReader
-from aiohttp.web import Response, Request
-
-from image_converter.backend.views.helpers import make_log, create_descriptive_response
+from aiohttp.web import Response, Request, json_response
+from aiohttp.hdrs import ACCEPT, LOCATION, RETRY_AFTER
+
+from image_converter.metrics import metrics
+from image_converter.deadlines import DeadlineExceeded
+from image_converter.images.quality import available as ssim_available
+from image_converter.backend.limits import Overloaded
+from image_converter.backend.jobs import write_source
+from image_converter.backend.views.helpers import make_log, create_descriptive_response, check_body_headers
 from image_converter.backend.views.image.logic.post.helpers import read_multipart_data, process_params
-from image_converter.backend.models import Image
+from image_converter.backend.models import Image, Status
+
+
+SKIPPED = metrics.counter('image_conversions_skipped_total', 'Uploads stored without re-encoding')
 
 
 class PostLogic:
@@ -42,9 +53,23 @@ class PostLogic:
         Requests parameters keys for image processing
     converter: ImageConverter
         Converter for image processing
+    batcher: InsertBatcher
+        Batched database inserts
+    limiter: ConcurrencyLimiter
+        Admission control for conversions
+    jobs: JobQueue
+        Conversion jobs queue, conversion runs in web process if not set
+    deadline_header: str
+        Request header with client deadline, queued job keeps only client deadline
+    max_body: int
+        Maximal request body length in bytes
 
     Methods
     -------
+    check_body_headers(self) -> Union[Response, None]
+        Reject request by body headers before body is read
+    check_admission(self) -> Union[Response, None]
+        Reject request early if conversion queue is full
     get_multipart_reader(self) -> Union[Response, MultipartReader]
         Initialize multipart connection
     process_data(self, reader: MultipartReader) -> Union[Tuple[Dict, bytes], Response]
@@ -53,13 +78,33 @@ class PostLogic:
         Check data contains content
     check_data_params(self, data: Dict) -> Tuple[int, int, int]
         Get params from request body
+    check_data_preset(self, data: Dict) -> Union[List[int], None, Response]
+        Get renditions widths of requested or configured preset
+    check_data_target(self, data: Dict) -> Union[Dict, None, Response]
+        Get quality target from request parameters
     add_data_to_db(self, entity: DeclarativeMeta) -> Union[Image, Response]
         Create image in database
-    rollback_db(self, data: Image) -> Response
+    rollback_db(self, data: Image, status: int, headers: Dict) -> Response
         Rollback for database if error occurred while processing image
-    create_image_processing_task(self, data: Image, _bytes: bytes, *args) -> Response:
+    store_profile(self, data: bytes) -> None
+        Store converter worker profile
+    update_data_in_db(self, data: Image, metadata: Dict) -> Response
+        Store converted image metadata
+    create_image_processing_job(self, data: Image,
+                                _bytes: bytes,
+                                *args,
+                                widths: List[int] = None,
+                                target: Dict = None) -> Response:
+        Queue image processing for conversion workers
+    create_image_processing_task(self, data: Image,
+                                 _bytes: bytes,
+                                 *args,
+                                 widths: List[int] = None,
+                                 target: Dict = None) -> Response:
         Create async task for image processing
     """
+    content_types = ('multipart/form-data',)
+
     def __init__(self, request: Request,
                  logger: Logger,
                  function_name: str,
@@ -74,6 +119,62 @@ class PostLogic:
         self.allowed_file_formats = mimetypes
         self.data_keys = keys
         self.converter = self.request.app['Converter']
+        self.batcher = self.request.app['Batcher']
+        self.limiter = self.request.app['Limiter']
+        self.jobs = self.request.app['Jobs']
+        self.preset = self.request.app['settings']['images']['preset']
+        self.presets = self.request.app['settings']['images']['presets'] or {}
+        self.deadline_header = self.request.app['settings']['deadlines']['header']
+        self.max_body = self.request.app['settings']['limits']['max_body']
+
+    def create_overloaded_response(self, retry_after: int) -> Response:
+        """Create response for rejected by admission control request
+
+        Parameters
+        ----------
+        retry_after : int
+            Seconds client should wait before retry
+
+        Returns
+        -------
+        Response
+            Server Response
+        """
+        make_log(self.logger,
+                 'warning',
+                 f'Conversion queue is full, retry after {retry_after}s',
+                 self.extra)
+        return create_descriptive_response(HTTPStatus.SERVICE_UNAVAILABLE,
+                                           headers={RETRY_AFTER: str(retry_after)})
+
+    def check_body_headers(self) -> Union[Response, None]:
+        """Reject request with too long body or not multipart body before body is read,
+        client sending Expect header is rejected before it sends body
+
+        Returns
+        -------
+        Response | None
+            Response if request rejected
+        """
+        rejected = check_body_headers(self.request, self.max_body, self.content_types)
+        if rejected is not None:
+            make_log(self.logger,
+                     'debug',
+                     f'Body of {self.request.content_length} bytes of {self.request.content_type} rejected',
+                     self.extra)
+        return rejected
+
+    async def check_admission(self) -> Union[Response, None]:
+        """Reject request before reading body if conversion queue is full
+
+        Returns
+        -------
+        Response | None
+            Response if request rejected
+        """
+        if self.limiter.full():
+            return self.create_overloaded_response(self.limiter.retry_after())
+        return None
 
     async def get_multipart_reader(self) -> Union[Response, MultipartReader]:
         """Initialize multipart connection
@@ -162,9 +263,73 @@ class PostLogic:
         quality, x, y = process_params(data, self.data_keys)
         return quality, x, y
 
+    async def check_data_preset(self, data: Dict) -> Union[List[int], None, Response]:
+        """Get renditions widths of preset from request parameters or configured preset
+
+        Parameters
+        ----------
+        data : Dict
+            Request parameters
+
+        Returns
+        -------
+        List[int] | None | Response
+            Preset widths, None if no preset or Response if preset is unknown
+        """
+        name = (data or {}).get('preset') or self.preset
+        if name is None:
+            return None
+        if name not in self.presets:
+            make_log(self.logger,
+                     'debug',
+                     f'Unknown preset {name}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.UNPROCESSABLE_ENTITY)
+        return self.presets[name]
+
+    async def check_data_target(self, data: Dict) -> Union[Dict, None, Response]:
+        """Get quality target from request parameters, SSIM in (0, 1) and size in bytes
+
+        Parameters
+        ----------
+        data : Dict
+            Request parameters
+
+        Returns
+        -------
+        Dict | None | Response
+            target_ssim and max_bytes, None if no target or Response if target is invalid
+        """
+        data = data or {}
+        if 'target_ssim' not in data and 'max_bytes' not in data:
+            return None
+        try:
+            target = {'target_ssim': float(data['target_ssim']) if 'target_ssim' in data else None,
+                      'max_bytes': int(data['max_bytes']) if 'max_bytes' in data else None}
+            if target['target_ssim'] is not None and not 0 < target['target_ssim'] < 1:
+                raise ValueError(target['target_ssim'])
+            if target['max_bytes'] is not None and target['max_bytes'] < 1:
+                raise ValueError(target['max_bytes'])
+        except ValueError:
+            make_log(self.logger,
+                     'debug',
+                     f'Wrong quality target {data.get("target_ssim")} {data.get("max_bytes")}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.UNPROCESSABLE_ENTITY)
+        if target['target_ssim'] is not None and not ssim_available():
+            make_log(self.logger,
+                     'warning',
+                     'SSIM target requires numpy',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.NOT_IMPLEMENTED)
+        return target
+
     async def add_data_to_db(self, entity: DeclarativeMeta) -> Union[Image, Response]:
         """Add data to database
 
+        Entity id is generated by application and row is inserted by batcher
+        together with rows of concurrent requests
+
         Parameters
         ----------
         entity : DeclarativeMeta
@@ -176,11 +341,11 @@ class PostLogic:
             Image entity or Response if error occurs
         """
         try:
-            data = entity()
-            self.db_session.add(data)
-            await self.db_session.flush()
-            await self.db_session.refresh(data)
-            _id = str(data.id)
+            mapper = entity.__mapper__
+            row = await self.batcher.insert({mapper.primary_key[0].key: uuid.uuid4(),
+                                             entity.status.key: Status.PENDING,
+                                             entity.owner_id.key: uuid.UUID(self.request['token'])})
+            data = entity(**{prop.key: row[prop.columns[0].key] for prop in mapper.column_attrs})
         except Exception as e:
             make_log(self.logger,
                      'error',
@@ -190,13 +355,19 @@ class PostLogic:
         else:
             return data
 
-    async def rollback_db(self, data: Image) -> Response:
+    async def rollback_db(self, data: Image,
+                          status: int = HTTPStatus.UNPROCESSABLE_ENTITY,
+                          headers: Dict = None) -> Response:
         """Rollback for database if error occurred while processing image
 
         Parameters
         ----------
         data : DeclarativeMeta instance
             Database ORM entity
+        status : int
+            Response status after successful rollback
+        headers : Dict
+            Response headers after successful rollback
 
         Returns
         -------
@@ -204,8 +375,8 @@ class PostLogic:
             Server Response
         """
         try:
-            await self.db_session.delete(data)
-            await self.db_session.flush()
+            entity = type(data)
+            await self.db_session.execute(delete(entity).where(entity.id == data.id))
         except DBAPIError:
             make_log(self.logger,
                      'critical',
@@ -217,10 +388,114 @@ class PostLogic:
                      'debug',
                      f'DB entity Image with uuid {data.id} deleted',
                      self.extra)
-            return create_descriptive_response(HTTPStatus.UNPROCESSABLE_ENTITY)
+            return create_descriptive_response(status, headers=headers)
+
+    async def store_profile(self, data: bytes) -> None:
+        """Store converter worker profile next to handler profile
+
+        Parameters
+        ----------
+        data : bytes
+            Serialized profile
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.request.app['Profiles'].save,
+                                   self.request['request_id'], 'worker', self.request['profile'], data)
+
+    async def update_data_in_db(self, data: Image, metadata: Dict) -> Response:
+        """Store converted image metadata and mark image ready
+
+        Image id is returned as text, with placeholder as JSON if client accepts it
+
+        Parameters
+        ----------
+        data : DeclarativeMeta instance
+            Database ORM entity
+        metadata : Dict
+            Converted image width, height, size and hash
+
+        Returns
+        -------
+        Response
+            Server Response
+        """
+        try:
+            entity = type(data)
+            await self.db_session.execute(update(entity)
+                                          .where(entity.id == data.id)
+                                          .values(status=Status.READY, **metadata))
+        except DBAPIError as e:
+            make_log(self.logger,
+                     'error',
+                     f'Throws exception while updating DB entity Image with uuid {data.id}: '
+                     f'{e.__class__.__name__}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.INTERNAL_SERVER_ERROR)
+        else:
+            if 'application/json' in self.request.headers.get(ACCEPT, ''):
+                return json_response({'id': str(data.id), 'placeholder': metadata.get('placeholder')})
+            return Response(status=HTTPStatus.OK, body=str(data.id))
 
-    async def create_image_processing_task(self, data: Image, _bytes: bytes, *args) -> Response:
-        """Create async task for image processing
+    async def create_image_processing_job(self, data: Image,
+                                          _bytes: bytes,
+                                          *args,
+                                          widths: List[int] = None,
+                                          target: Dict = None) -> Response:
+        """Store source in shared storage and queue image processing for conversion workers
+
+        Job is dropped by worker after deadline only if client sent its deadline,
+        configured default deadline is meant for waiting clients
+
+        Parameters
+        ----------
+        data : DeclarativeMeta instance
+            Database ORM entity
+        _bytes: bytes
+            Image coded in bytes or path to spooled file
+        args: List
+            quality, x, y params
+        widths: List[int]
+            Optional widths of downscaled renditions
+        target: Dict
+            Optional quality target
+
+        Returns
+        -------
+        Response
+            Accepted Response with image id
+        """
+        loop = asyncio.get_running_loop()
+        source = str(data.id)
+        quality, x, y = args
+        params = {'quality': quality, 'x': x, 'y': y, 'widths': widths, 'target': target}
+        if self.deadline_header in self.request.headers:
+            params['deadline'] = self.request.get('deadline')
+        try:
+            await loop.run_in_executor(None, write_source, self.jobs.path / source, _bytes)
+            await self.jobs.enqueue(self.db_session, data.id, source, params)
+        except Exception as e:
+            make_log(self.logger,
+                     'error',
+                     f'Throws exception while queueing Image conversion: {e.__class__.__name__}',
+                     self.extra)
+            return await self.rollback_db(data, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+        headers = {LOCATION: f'/{data.id}/meta'}
+        if 'application/json' in self.request.headers.get(ACCEPT, ''):
+            return json_response({'id': str(data.id), 'status': data.status},
+                                 status=HTTPStatus.ACCEPTED, headers=headers)
+        return Response(status=HTTPStatus.ACCEPTED, body=str(data.id), headers=headers)
+
+    async def create_image_processing_task(self, data: Image,
+                                           _bytes: bytes,
+                                           *args,
+                                           widths: List[int] = None,
+                                           target: Dict = None) -> Response:
+        """Create async task for image processing, task is queued for workers if jobs are enabled
+
+        Conversion is stopped when request deadline passes or request task is
+        cancelled by deadline decorator, image is deleted and Gateway Timeout
+        is returned
 
         Parameters
         ----------
@@ -230,15 +505,48 @@ class PostLogic:
             Image coded in bytes
         args: List
             quality, x, y params
+        widths: List[int]
+            Optional widths of downscaled renditions
+        target: Dict
+            Optional quality target
 
         Returns
         -------
         Response
             Server Response
         """
+        if self.jobs is not None:
+            return await self.create_image_processing_job(data, _bytes, *args, widths=widths, target=target)
         try:
-            await asyncio.create_task(
-                self.converter.async_image_process(_bytes, data.id, *args))
+            async with self.limiter.slot():
+                metadata = await asyncio.create_task(
+                    self.converter.async_image_process(_bytes, data.id, *args,
+                                                       profile=self.request.get('profile'),
+                                                       widths=widths,
+                                                       deadline=self.request.get('deadline'),
+                                                       target=target))
+        except asyncio.CancelledError:
+            if not self.request.get('deadline_expired'):
+                raise
+            make_log(self.logger,
+                     'warning',
+                     'Image conversion cancelled by request deadline',
+                     self.extra)
+            return await self.rollback_db(data, HTTPStatus.GATEWAY_TIMEOUT)
+        except Overloaded as e:
+            make_log(self.logger,
+                     'warning',
+                     f'Conversion queue is full, retry after {e.retry_after}s',
+                     self.extra)
+            return await self.rollback_db(data,
+                                          HTTPStatus.SERVICE_UNAVAILABLE,
+                                          {RETRY_AFTER: str(e.retry_after)})
+        except DeadlineExceeded as e:
+            make_log(self.logger,
+                     'warning',
+                     f'Image conversion stopped by deadline at {e.stage} stage',
+                     self.extra)
+            return await self.rollback_db(data, HTTPStatus.GATEWAY_TIMEOUT)
         except Exception as e:
             make_log(self.logger,
                      'error',
@@ -246,4 +554,8 @@ class PostLogic:
                      self.extra)
             return await self.rollback_db(data)
         else:
-            return Response(status=HTTPStatus.OK, body=str(data.id))
+            if 'profile' in metadata:
+                await self.store_profile(metadata.pop('profile'))
+            if metadata.pop('passthrough', False):
+                SKIPPED.inc()
+            return await self.update_data_in_db(data, metadata)
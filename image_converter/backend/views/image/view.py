@@ -7,13 +7,15 @@ classes:
 """
 
 import logging
+from typing import Optional
 
-from aiohttp.web import Response, Request
+from aiohttp.web import Response, StreamResponse, Request
 
 from image_converter.settings import config
 from image_converter.backend.models import Image
-from image_converter.backend.views.decorators import request_log, auth
-from image_converter.backend.views.image.logic import GetLogic, PostLogic
+from image_converter.backend.views.decorators import request_log, auth, rate_limit, deadline, profile, \
+    continue_request
+from image_converter.backend.views.image.logic import GetLogic, ListLogic, MetaLogic, PostLogic
 
 
 log = logging.getLogger(config['project']['name'])
@@ -57,6 +59,8 @@ class ImageView:
 
     @request_log
     @auth
+    @rate_limit
+    @profile
     async def get(self, request: Request) -> Response:
         """Coroutine handler for image get request
 
@@ -70,17 +74,143 @@ class ImageView:
         Response
             Response for user's request
         """
-        logic = GetLogic(request, log, self.get.__name__, 'jpg')
+        logic = GetLogic(request, log, self.get.__name__)
+        output = logic.get_output_format()
+        if isinstance(output, Response):
+            return output
         session = request.app['db']
         async with session.begin():
             data_id = logic.get_request_data_id()
             data = await logic.receive_data_from_db(Image, data_id)
             if isinstance(data, Response):
                 return data
-            return await logic.create_stream(data_id)
+        return await logic.create_stream(data, output)
 
     @request_log
     @auth
+    @rate_limit
+    async def rendition(self, request: Request) -> Response:
+        """Coroutine handler for image rendition get request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = GetLogic(request, log, self.rendition.__name__)
+        session = request.app['db']
+        async with session.begin():
+            data = await logic.receive_data_from_db(Image, logic.get_request_data_id())
+            if isinstance(data, Response):
+                return data
+        return await logic.create_rendition_stream(data)
+
+    @request_log
+    @auth
+    @rate_limit
+    async def tile(self, request: Request) -> Response:
+        """Coroutine handler for deep zoom tile get request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = GetLogic(request, log, self.tile.__name__)
+        session = request.app['db']
+        async with session.begin():
+            data = await logic.receive_data_from_db(Image, logic.get_request_data_id())
+            if isinstance(data, Response):
+                return data
+        return await logic.create_tile_stream(data)
+
+    @request_log
+    @auth
+    @rate_limit
+    async def list(self, request: Request) -> StreamResponse:
+        """Coroutine handler for images listing request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        StreamResponse
+            NDJSON stream of images metadata
+        """
+        logic = ListLogic(request, log, self.list.__name__)
+        params = logic.get_request_params()
+        if isinstance(params, Response):
+            return params
+        session = request.app['db']
+        async with session.begin():
+            return await logic.create_stream(logic.create_query(Image, params))
+
+    @request_log
+    @auth
+    @rate_limit
+    async def head(self, request: Request) -> Response:
+        """Coroutine handler for image head request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = MetaLogic(request, log, self.head.__name__)
+        session = request.app['db']
+        async with session.begin():
+            data = await logic.receive_data_from_db(Image, logic.get_request_data_id())
+            if isinstance(data, Response):
+                return data
+            return await logic.create_head_response(data)
+
+    @request_log
+    @auth
+    @rate_limit
+    async def meta(self, request: Request) -> Response:
+        """Coroutine handler for image metadata request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = MetaLogic(request, log, self.meta.__name__)
+        session = request.app['db']
+        async with session.begin():
+            data = await logic.receive_data_from_db(Image, logic.get_request_data_id())
+            if isinstance(data, Response):
+                return data
+            return await logic.create_json_response(data)
+
+    @request_log
+    @auth
+    @rate_limit
+    @deadline
+    @profile
     async def post(self, request: Request) -> Response:
         """Coroutine handler for image post request
 
@@ -99,6 +229,12 @@ class ImageView:
                           self.allowed_file_formats,
                           self.data_keys)
 
+        rejected = logic.check_body_headers()
+        if rejected is not None:
+            return rejected
+        rejected = await logic.check_admission()
+        if rejected is not None:
+            return rejected
         session = request.app['db']
         async with session.begin():
             reader = await logic.get_multipart_reader()
@@ -111,8 +247,32 @@ class ImageView:
             data = await logic.check_data_content(_bytes)
             if isinstance(data, Response):
                 return data
+            widths = await logic.check_data_preset(params)
+            if isinstance(widths, Response):
+                return widths
+            target = await logic.check_data_target(params)
+            if isinstance(target, Response):
+                return target
             params = await logic.check_data_params(params)
             entity = await logic.add_data_to_db(Image)
             if isinstance(entity, Response):
                 return entity
-            return await logic.create_image_processing_task(entity, data, *params)
+            return await logic.create_image_processing_task(entity, data, *params, widths=widths, target=target)
+
+    async def expect(self, request: Request) -> Optional[Response]:
+        """Coroutine expect handler for image post request
+
+        Parameters
+        ----------
+        request : Request
+            Client request with Expect header
+
+        Returns
+        -------
+        Optional[Response]
+            Response if upload rejected before it is sent
+        """
+        return await continue_request(request,
+                                      request.app['settings']['limits']['max_body'],
+                                      PostLogic.content_types,
+                                      self.post.__name__)
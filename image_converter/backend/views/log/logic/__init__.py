@@ -1 +1,2 @@
 from .get import GetLogic
+from .stream import StreamLogic
@@ -0,0 +1,121 @@
+"""Log View stream logic
+
+This file provides log view logic class for live log stream requests and contains the following
+
+Classes:
+
+    * StreamLogic
+"""
+
+import json
+import asyncio
+import logging
+from logging import Logger
+from http import HTTPStatus
+from typing import Dict, Union
+
+from aiohttp.web import Response, StreamResponse, Request
+from aiohttp.hdrs import CACHE_CONTROL
+
+from image_converter.backend.views.helpers import make_log, create_descriptive_response
+
+
+class StreamLogic:
+    """
+    A class that represent log view live stream request processing logic
+
+    Records are pushed as Server-Sent Events from tailer shared by all
+    clients, records dropped because client did not keep up are reported
+    with dropped event, comment is sent when there are no records so
+    disconnected client is noticed
+
+    Attributes
+    ----------
+    request : Request
+        User's request
+    extra : Dict
+        Log formatting extra's dict
+    tailer : LogTailer
+        Shared log file follower
+    keepalive : float
+        Seconds without records before keepalive comment
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    get_request_filters(self) -> Union[Response, Dict]
+        Parse level and route filters from query
+    create_stream(self, filters: Dict) -> StreamResponse
+        Push new log records as Server-Sent Events
+    """
+    content_type = 'text/event-stream'
+
+    def __init__(self, request: Request, logger: Logger, function_name: str):
+        self.request = request
+        self.extra = {'route': request.url, 'functionName': function_name}
+        self.tailer = self.request.app['LogTailer']
+        self.keepalive = self.request.app['settings']['logging']['stream']['keepalive']
+        self.logger = logger
+
+    def get_request_filters(self) -> Union[Response, Dict]:
+        """Parse minimal level and route substring from query
+
+        Returns
+        -------
+        Union[Response, Dict]
+            Response if level is unknown or parsed filters
+        """
+        name = self.request.query.get('level', 'NOTSET').upper()
+        level = logging.getLevelName(name)
+        if not isinstance(level, int):
+            make_log(self.logger,
+                     'debug',
+                     f'Unknown log level {name}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.BAD_REQUEST)
+        return {'level': level, 'route': self.request.query.get('route') or None}
+
+    async def create_stream(self, filters: Dict) -> StreamResponse:
+        """Push new log records as Server-Sent Events until client disconnects or server stops
+
+        Parameters
+        ----------
+        filters : Dict
+            Parsed level and route filters
+
+        Returns
+        -------
+        StreamResponse for user's request
+        """
+        response = StreamResponse(status=HTTPStatus.OK, headers={CACHE_CONTROL: 'no-cache'})
+        response.content_type = self.content_type
+        await response.prepare(self.request)
+
+        subscription = self.tailer.subscribe(filters['level'], filters['route'])
+        try:
+            while True:
+                try:
+                    record = await asyncio.wait_for(subscription.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    await response.write(b': keepalive\n\n')
+                    continue
+                if record is None:
+                    break
+                events = []
+                if subscription.dropped:
+                    events.append(f'event: dropped\ndata: {subscription.dropped}\n\n')
+                    subscription.dropped = 0
+                events.append(f'event: log\ndata: {json.dumps(record)}\n\n')
+                await response.write(''.join(events).encode())
+        except ConnectionResetError:
+            make_log(self.logger,
+                     'debug',
+                     'Log stream client disconnected',
+                     self.extra)
+            return response
+        finally:
+            self.tailer.unsubscribe(subscription)
+
+        await response.write_eof()
+        return response
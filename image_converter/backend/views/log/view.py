@@ -9,12 +9,12 @@ Classes:
 
 import logging
 
-from aiohttp.web import Response, Request
+from aiohttp.web import Response, StreamResponse, Request
 
 from image_converter.settings import config
 from image_converter.logger import LOG_PATH
-from image_converter.backend.views.decorators import request_log, auth
-from image_converter.backend.views.log.logic import GetLogic
+from image_converter.backend.views.decorators import request_log, auth, rate_limit
+from image_converter.backend.views.log.logic import GetLogic, StreamLogic
 
 
 log = logging.getLogger(config['project']['name'])
@@ -33,11 +33,14 @@ class LogView:
     -------
     get(self, request: Request) -> Response
         Read and return data contains in log file
+    stream(self, request: Request) -> StreamResponse
+        Push new log records as Server-Sent Events
     """
     log_path = LOG_PATH
 
     @request_log
     @auth
+    @rate_limit
     async def get(self, request: Request) -> Response:
         """Coroutine handler for log get request
 
@@ -53,3 +56,25 @@ class LogView:
         """
         logic = GetLogic(request, log, self.get.__name__, self.log_path)
         return await logic.create_stream()
+
+    @request_log
+    @auth
+    @rate_limit
+    async def stream(self, request: Request) -> StreamResponse:
+        """Coroutine handler for live log stream request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        StreamResponse
+            Server-Sent Events stream of new log records
+        """
+        logic = StreamLogic(request, log, self.stream.__name__)
+        filters = logic.get_request_filters()
+        if isinstance(filters, Response):
+            return filters
+        return await logic.create_stream(filters)
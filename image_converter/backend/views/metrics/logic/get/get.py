@@ -0,0 +1,56 @@
+"""Metrics View get logic
+
+This file provides metrics view logic class and contains the following
+
+Classes:
+
+    * GetLogic
+"""
+
+from logging import Logger
+from http import HTTPStatus
+
+from aiohttp.web import Response, Request
+
+from image_converter.metrics import Registry
+
+
+class GetLogic:
+    """
+    A class that represent metrics view get request processing logic
+
+    Attributes
+    ----------
+    request : Request
+        User's request
+    logger : Logger
+        Instance for logger
+    function_name : str
+        Name of called function
+    registry: Registry
+        Project metrics registry
+
+    Methods
+    -------
+    create_response(self) -> Response
+        Render metrics in text format
+    """
+    content_type = 'text/plain'
+
+    def __init__(self, request: Request, logger: Logger, function_name: str, registry: Registry):
+        self.request = request
+        self.extra = {'route': request.url, 'functionName': function_name}
+        self.registry = registry
+        self.logger = logger
+
+    async def create_response(self) -> Response:
+        """Render metrics in text format
+
+        Returns
+        -------
+        Response for user's request
+        """
+        return Response(status=HTTPStatus.OK,
+                        text=self.registry.render(),
+                        content_type=self.content_type,
+                        headers={'Cache-Control': 'no-store'})
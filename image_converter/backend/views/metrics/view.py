@@ -0,0 +1,55 @@
+"""Metrics View class
+
+This file provides metrics routing view class and contains the following
+
+Classes:
+
+    * MetricsView
+"""
+
+import logging
+
+from aiohttp.web import Response, Request
+
+from image_converter.settings import config
+from image_converter.metrics import metrics
+from image_converter.backend.views.decorators import request_log, auth
+from image_converter.backend.views.metrics.logic import GetLogic
+
+
+log = logging.getLogger(config['project']['name'])
+
+
+class MetricsView:
+    """
+    A class that represent metrics routes handlers
+
+    Fields
+    ----------
+    registry : Registry
+        Project metrics registry
+
+    Methods
+    -------
+    get(self, request: Request) -> Response
+        Render project metrics
+    """
+    registry = metrics
+
+    @request_log
+    @auth
+    async def get(self, request: Request) -> Response:
+        """Coroutine handler for metrics get request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = GetLogic(request, log, self.get.__name__, self.registry)
+        return await logic.create_response()
@@ -0,0 +1,76 @@
+"""Profile View get logic
+
+This file provides profile view logic class and contains the following
+
+Classes:
+
+    * GetLogic
+"""
+
+import asyncio
+from logging import Logger
+from http import HTTPStatus
+
+from aiohttp.web import Response, Request, json_response
+
+from image_converter.backend.profiles import ProfileStore
+from image_converter.backend.views.helpers import make_log, create_descriptive_response, file_sender
+
+
+class GetLogic:
+    """
+    A class that represent profile view get request processing logic
+
+    Attributes
+    ----------
+    request : Request
+        User's request
+    logger : Logger
+        Instance for logger
+    function_name : str
+        Name of called function
+    store: ProfileStore
+        Captured profiles storage
+
+    Methods
+    -------
+    create_list_response(self) -> Response
+        List stored profiles
+    create_stream(self) -> Response
+        Read and return stored profile file
+    """
+    def __init__(self, request: Request, logger: Logger, function_name: str, store: ProfileStore):
+        self.request = request
+        self.extra = {'route': request.url, 'functionName': function_name}
+        self.store = store
+        self.logger = logger
+
+    async def create_list_response(self) -> Response:
+        """List stored profiles
+
+        Returns
+        -------
+        Response for user's request
+        """
+        loop = asyncio.get_running_loop()
+        return json_response(await loop.run_in_executor(None, self.store.list))
+
+    async def create_stream(self) -> Response:
+        """Coroutine for read file and write to stream
+
+        Returns
+        -------
+        Response for user's request
+        """
+        request_id = self.request.match_info.get('request_id')
+        filename = self.request.match_info.get('filename')
+        path = self.store.file(request_id, filename)
+        if path is None:
+            make_log(self.logger,
+                     'debug',
+                     f'Profile {request_id}/{filename} not found',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.NOT_FOUND)
+
+        headers = {"Content-disposition": f"attachment; filename={request_id}-{filename}"}
+        return Response(status=HTTPStatus.OK, body=file_sender(file_path=path), headers=headers)
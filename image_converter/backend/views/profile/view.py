@@ -0,0 +1,68 @@
+"""Profile View class
+
+This file provides captured profiles routing view class and contains the following
+
+Classes:
+
+    * ProfileView
+"""
+
+import logging
+
+from aiohttp.web import Response, Request
+
+from image_converter.settings import config
+from image_converter.backend.views.decorators import request_log, auth
+from image_converter.backend.views.profile.logic import GetLogic
+
+
+log = logging.getLogger(config['project']['name'])
+
+
+class ProfileView:
+    """
+    A class that represent captured profiles routes handlers
+
+    Methods
+    -------
+    list(self, request: Request) -> Response
+        List stored profiles
+    get(self, request: Request) -> Response
+        Download stored profile
+    """
+
+    @request_log
+    @auth
+    async def list(self, request: Request) -> Response:
+        """Coroutine handler for profiles list request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = GetLogic(request, log, self.list.__name__, request.app['Profiles'])
+        return await logic.create_list_response()
+
+    @request_log
+    @auth
+    async def get(self, request: Request) -> Response:
+        """Coroutine handler for profile download request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = GetLogic(request, log, self.get.__name__, request.app['Profiles'])
+        return await logic.create_stream()
@@ -0,0 +1,256 @@
+"""Sprite View get logic
+
+This file provides sprite view logic class and contains the following
+
+Classes:
+
+    * GetLogic
+"""
+
+import uuid
+import asyncio
+from logging import Logger
+from http import HTTPStatus
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from sqlalchemy import select
+from aiohttp.web import Response, Request, json_response
+from aiohttp.hdrs import IF_NONE_MATCH, RETRY_AFTER
+
+from image_converter.metrics import metrics
+from image_converter.backend.limits import Overloaded
+from image_converter.backend.sprites import SpriteStore
+from image_converter.backend.views.helpers import make_log, file_sender, create_descriptive_response
+from image_converter.backend.views.image.logic.get.helpers import add_extension_to_name
+from image_converter.backend.models import Image, Status
+
+
+SPRITES = metrics.counter('sprites_composed_total', 'Sprites composed on first request')
+
+
+class GetLogic:
+    """
+    A class that represent sprite view get request processing logic
+
+    Sprite of requested images is composed once and stored by hash of cell
+    side and ids, so same gallery page gets stored sprite and its layout
+
+    Attributes
+    ----------
+    request : Request
+        User's request
+    extra : Dict
+        Log formatting extra's dict
+    db_session : Session
+        Open database session
+    path : str
+        Path to images folder
+    converter: ImageConverter
+        Converter for sprites composition
+    limiter: ConcurrencyLimiter
+        Admission control for conversions
+    store: SpriteStore
+        Sprites storage
+    settings : Dict
+        Sprites settings
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    get_request_params(self) -> Union[Response, Tuple[List[str], int]]
+        Parse image ids and cell side from query
+    receive_data_from_db(self, entity: Image, ids: List[str]) -> Union[Response, List[Image]]
+        Get converted images in ids order
+    choose_source(self, data: Image, cell: int) -> Path
+        Path to smallest stored file covering cell
+    ensure_sprite(self, name: str, data: List[Image], cell: int) -> Dict
+        Get sprite layout, compose sprite if required
+    create_layout_response(self, data: List[Image], cell: int) -> Response
+        Send sprite layout with thumbnails coordinates
+    create_stream(self) -> Response
+        Send sprite file to Client
+    """
+    def __init__(self, request: Request, logger: Logger, function_name: str, store: SpriteStore):
+        self.request = request
+        self.extra = {'route': request.url, 'functionName': function_name}
+        self.db_session = self.request.app['db']
+        self.path = self.request.app['settings']['images_path']
+        self.converter = self.request.app['Converter']
+        self.limiter = self.request.app['Limiter']
+        self.store = store
+        self.settings = self.request.app['settings']['sprites']
+        self.logger = logger
+
+    def get_request_params(self) -> Union[Response, Tuple[List[str], int]]:
+        """Parse comma separated image ids and cell side from query, repeated ids are dropped
+
+        Returns
+        -------
+        Union[Response, Tuple[List[str], int]]
+            Response if params malformed or image ids and cell side
+        """
+        query = self.request.query
+        try:
+            ids = list(dict.fromkeys(str(uuid.UUID(_id)) for _id in query.get('ids', '').split(',') if _id))
+            cell = int(query.get('cell', self.settings['cell']))
+            if not ids or len(ids) > self.settings['max_images'] or not 0 < cell <= self.settings['max_cell']:
+                raise ValueError(len(ids), cell)
+        except ValueError:
+            make_log(self.logger,
+                     'debug',
+                     f'Bad sprite params {dict(query)}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.BAD_REQUEST)
+        return ids, cell
+
+    async def receive_data_from_db(self, entity: Image, ids: List[str]) -> Union[Response, List[Image]]:
+        """Connect to database and get converted entities by ids
+
+        Parameters
+        ----------
+        entity : Image
+            Database ORM class
+        ids : List[str]
+            Entities ids
+
+        Returns
+        -------
+        Union[Response, List[Image]]:
+            Response if any image not found or entities in ids order
+        """
+        result = await self.db_session.execute(select(entity).where(entity.id.in_(ids),
+                                                                    entity.status == Status.READY))
+        found = {str(data.id): data for data in result.scalars()}
+        missing = [_id for _id in ids if _id not in found]
+        if missing:
+            make_log(self.logger,
+                     'debug',
+                     f'DB entities Image with uuids {", ".join(missing)} not found',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.NOT_FOUND)
+        return [found[_id] for _id in ids]
+
+    def choose_source(self, data: Image, cell: int) -> Path:
+        """Path to smallest stored width rendition covering cell, stored image otherwise
+
+        Parameters
+        ----------
+        data : Image
+            Database entity
+        cell : int
+            Cell side
+
+        Returns
+        -------
+        Path
+            Path to image file
+        """
+        widths = [int(name[1:]) for name in (data.renditions or {}) if name.startswith('w') and name[1:].isdigit()]
+        widths = [width for width in widths if width >= cell]
+        name = f'{data.id}.w{min(widths)}' if widths else str(data.id)
+        return add_extension_to_name(self.path, name, self.converter.extension)
+
+    async def ensure_sprite(self, name: str, data: List[Image], cell: int) -> Dict:
+        """Get stored sprite layout, compose sprite in converter worker if required,
+        concurrent requests of the same sprite wait for one composition
+
+        Parameters
+        ----------
+        name : str
+            Sprite name
+        data : List[Image]
+            Database entities in sprite order
+        cell : int
+            Cell side
+
+        Returns
+        -------
+        Dict
+            Sprite layout
+        """
+        loop = asyncio.get_running_loop()
+        layout = await loop.run_in_executor(None, self.store.load, name)
+        if layout is not None:
+            return layout
+
+        async def compose() -> Dict:
+            sources = [self.choose_source(image, cell) for image in data]
+            async with self.limiter.slot():
+                composed = await self.converter.async_sprite(name, sources, cell, self.store.image(name),
+                                                             self.settings['quality'])
+            SPRITES.inc()
+            make_log(self.logger,
+                     'debug',
+                     f'Sprite {name} of {len(data)} images composed',
+                     self.extra)
+            return composed
+
+        return await self.store.compose(name, compose)
+
+    async def create_layout_response(self, data: List[Image], cell: int) -> Response:
+        """Send sprite url and thumbnails coordinates by image id
+
+        Parameters
+        ----------
+        data : List[Image]
+            Database entities in sprite order
+        cell : int
+            Cell side
+
+        Returns
+        -------
+        Response for user's request
+        """
+        ids = [str(image.id) for image in data]
+        name = self.store.name(ids, cell)
+        try:
+            layout = await self.ensure_sprite(name, data, cell)
+        except Overloaded as e:
+            make_log(self.logger,
+                     'warning',
+                     f'Conversion queue is full, retry after {e.retry_after}s',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.SERVICE_UNAVAILABLE,
+                                               headers={RETRY_AFTER: str(e.retry_after)})
+        except Exception as e:
+            make_log(self.logger,
+                     'error',
+                     f'Throws exception while composing sprite: {e.__class__.__name__}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.INTERNAL_SERVER_ERROR)
+
+        keys = ('x', 'y', 'width', 'height')
+        return json_response({'sprite': f'/sprites/{name}',
+                              'width': layout['width'],
+                              'height': layout['height'],
+                              'cell': layout['cell'],
+                              'images': {_id: dict(zip(keys, box)) for _id, box in zip(ids, layout['cells'])}})
+
+    async def create_stream(self) -> Response:
+        """Coroutine for read sprite file and write to stream
+
+        Sprite name is hash of its content list, so it is cacheable by clients
+        and proxies forever
+
+        Returns
+        -------
+        Response for user's request
+        """
+        name = self.request.match_info.get('name')
+        file_name = self.store.image(name)
+        if file_name is None or not file_name.is_file():
+            make_log(self.logger,
+                     'debug',
+                     f'Sprite {name} not found',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.NOT_FOUND)
+
+        output = self.converter.formats[self.converter.extension]
+        headers = {"Content-Type": output.mimetype,
+                   "Cache-Control": "public, max-age=31536000, immutable",
+                   "ETag": f'"{name}"'}
+        if self.request.headers.get(IF_NONE_MATCH) == headers["ETag"]:
+            return Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+        return Response(status=HTTPStatus.OK, body=file_sender(file_path=file_name), headers=headers)
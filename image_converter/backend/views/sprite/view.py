@@ -0,0 +1,83 @@
+"""Sprite View class
+
+This file provides thumbnail sprites routing view class and contains the following
+
+Classes:
+
+    * SpriteView
+"""
+
+import logging
+
+from aiohttp.web import Response, Request
+
+from image_converter.settings import config
+from image_converter.backend.models import Image
+from image_converter.backend.views.decorators import request_log, auth, rate_limit
+from image_converter.backend.views.sprite.logic import GetLogic
+
+
+log = logging.getLogger(config['project']['name'])
+
+
+class SpriteView:
+    """
+    A class that represent thumbnail sprites routes handlers
+
+    Gallery gets one sprite of all its thumbnails and their coordinates
+    instead of requesting every thumbnail separately
+
+    Methods
+    -------
+    layout(self, request: Request) -> Response
+        Compose sprite of images and return its layout
+    get(self, request: Request) -> Response
+        Download sprite
+    """
+
+    @request_log
+    @auth
+    @rate_limit
+    async def layout(self, request: Request) -> Response:
+        """Coroutine handler for sprite layout request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = GetLogic(request, log, self.layout.__name__, request.app['Sprites'])
+        params = logic.get_request_params()
+        if isinstance(params, Response):
+            return params
+        ids, cell = params
+        session = request.app['db']
+        async with session.begin():
+            data = await logic.receive_data_from_db(Image, ids)
+            if isinstance(data, Response):
+                return data
+        return await logic.create_layout_response(data, cell)
+
+    @request_log
+    @auth
+    @rate_limit
+    async def get(self, request: Request) -> Response:
+        """Coroutine handler for sprite download request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = GetLogic(request, log, self.get.__name__, request.app['Sprites'])
+        return await logic.create_stream()
@@ -0,0 +1,3 @@
+from .head import HeadLogic
+from .post import PostLogic
+from .put import PutLogic
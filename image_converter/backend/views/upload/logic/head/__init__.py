@@ -0,0 +1 @@
+from .head import HeadLogic
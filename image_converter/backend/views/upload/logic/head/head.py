@@ -0,0 +1,67 @@
+"""Upload View head logic
+
+This file provides upload view logic class for head requests and contains the following
+
+Classes:
+
+    * HeadLogic
+"""
+
+from logging import Logger
+from http import HTTPStatus
+from typing import Dict, Union
+
+from aiohttp.web import Response, Request
+
+from image_converter.backend.views.upload.logic.helpers import receive_upload, upload_headers
+
+
+class HeadLogic:
+    """
+    A class that represent upload view head request processing logic
+
+    Attributes
+    ----------
+    request : Request
+        User's request
+    extra : Dict
+        Log formatting extra's dict
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    receive_upload(self) -> Union[Dict, Response]
+        Get upload session of requesting user
+    create_head_response(self, upload: Dict) -> Response
+        Response with upload offset
+    """
+    def __init__(self, request: Request, logger: Logger, function_name: str):
+        self.request = request
+        self.extra = {'route': request.url, 'functionName': function_name}
+        self.logger = logger
+
+    async def receive_upload(self) -> Union[Dict, Response]:
+        """Get upload session of requesting user
+
+        Returns
+        -------
+        Dict | Response
+            Upload session or Response if not found
+        """
+        return await receive_upload(self.request, self.logger, self.extra)
+
+    async def create_head_response(self, upload: Dict) -> Response:
+        """Response with upload offset, client resumes upload from it
+
+        Parameters
+        ----------
+        upload : Dict
+            Upload session
+
+        Returns
+        -------
+        Response
+            Server Response
+        """
+        return Response(status=HTTPStatus.OK, headers=upload_headers(upload))
@@ -0,0 +1,82 @@
+"""Upload View logic helpers
+
+This file provides helper functions to upload view logic classes and contains the following
+
+Constants:
+
+    * UPLOAD_OFFSET - Header with upload offset
+    * UPLOAD_LENGTH - Header with declared upload length
+    * UPLOAD_TYPE - Header with declared image mimetype
+
+Functions:
+
+    * upload_headers(upload: Dict) -> Dict
+
+Coroutines:
+
+    * receive_upload(request: Request, logger: Logger, extra: Dict) -> Union[Dict, Response]
+"""
+
+import asyncio
+from logging import Logger
+from http import HTTPStatus
+from typing import Dict, Union
+
+from aiohttp.web import Request, Response
+from aiohttp.hdrs import CACHE_CONTROL
+
+from image_converter.backend.views.helpers import make_log, create_descriptive_response
+
+
+UPLOAD_OFFSET = 'Upload-Offset'
+UPLOAD_LENGTH = 'Upload-Length'
+UPLOAD_TYPE = 'Upload-Type'
+
+
+def upload_headers(upload: Dict) -> Dict:
+    """Headers describing upload progress
+
+    Parameters
+    ----------
+    upload : Dict
+        Upload session
+
+    Returns
+    -------
+    Dict
+        Response headers
+    """
+    return {UPLOAD_OFFSET: str(upload['offset']),
+            UPLOAD_LENGTH: str(upload['length']),
+            CACHE_CONTROL: 'no-store'}
+
+
+async def receive_upload(request: Request, logger: Logger, extra: Dict) -> Union[Dict, Response]:
+    """Get upload session of requesting user
+
+    Upload of other user is reported as not found
+
+    Parameters
+    ----------
+    request : Request
+        User's request
+    logger : Logger
+        Instance for logger
+    extra : Dict
+        Log formatting extra's dict
+
+    Returns
+    -------
+    Dict | Response
+        Upload session or Response if not found
+    """
+    loop = asyncio.get_running_loop()
+    upload_id = request.match_info.get('upload_id')
+    upload = await loop.run_in_executor(None, request.app['Uploads'].get, upload_id, request['token'])
+    if upload is None:
+        make_log(logger,
+                 'debug',
+                 f'Upload {upload_id} not found',
+                 extra)
+        return create_descriptive_response(HTTPStatus.NOT_FOUND)
+    return upload
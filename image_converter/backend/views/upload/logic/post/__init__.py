@@ -0,0 +1 @@
+from .post import PostLogic
@@ -0,0 +1,161 @@
+"""Upload View post logic
+
+This file provides upload view logic class for upload creation and
+finalization requests and contains the following
+
+Classes:
+
+    * PostLogic
+"""
+
+import asyncio
+from logging import Logger
+from http import HTTPStatus
+from typing import Dict, Tuple, Union
+
+from aiohttp.web import Response, Request, json_response
+from aiohttp.hdrs import LOCATION
+from sqlalchemy.orm.decl_api import DeclarativeMeta
+
+from image_converter.backend.views.helpers import make_log, create_descriptive_response
+from image_converter.backend.views.image.logic import PostLogic as ImagePostLogic
+from image_converter.backend.views.image.logic.post.helpers import process_params
+from image_converter.backend.views.upload.logic.helpers import (receive_upload, upload_headers,
+                                                                UPLOAD_LENGTH, UPLOAD_TYPE)
+
+
+class PostLogic(ImagePostLogic):
+    """
+    A class that represent upload view post request processing logic
+
+    Image creation and conversion are shared with image view post logic,
+    converter reads image from upload spool file instead of request body
+
+    Attributes
+    ----------
+    store : UploadStore
+        Resumable uploads storage
+
+    Methods
+    -------
+    create_upload(self) -> Response
+        Create upload session
+    receive_upload(self) -> Union[Dict, Response]
+        Get upload session of requesting user
+    finalize_upload(self, upload: Dict, entity: DeclarativeMeta) -> Response
+        Convert completed upload
+    """
+    def __init__(self, request: Request,
+                 logger: Logger,
+                 function_name: str,
+                 mimetypes: Tuple,
+                 keys: Tuple):
+
+        super().__init__(request, logger, function_name, mimetypes, keys)
+        self.store = self.request.app['Uploads']
+
+    async def create_upload(self) -> Response:
+        """Create upload session from declared length, mimetype, conversion params, preset and quality target
+
+        Returns
+        -------
+        Response
+            Server Response with upload id and location
+        """
+        try:
+            length = int(self.request.headers[UPLOAD_LENGTH])
+        except (KeyError, ValueError):
+            make_log(self.logger,
+                     'debug',
+                     f'Wrong request Header: {UPLOAD_LENGTH}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.BAD_REQUEST)
+
+        if not 0 < length <= self.store.max_size:
+            make_log(self.logger,
+                     'debug',
+                     f'Upload length {length} exceeds limit {self.store.max_size}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+        mimetype = self.request.headers.get(UPLOAD_TYPE)
+        if mimetype not in self.allowed_file_formats:
+            make_log(self.logger,
+                     'debug',
+                     f'Wrong request Header: {UPLOAD_TYPE}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+
+        query = dict(self.request.query)
+        widths = await self.check_data_preset(query)
+        if isinstance(widths, Response):
+            return widths
+        target = await self.check_data_target(query)
+        if isinstance(target, Response):
+            return target
+        params = dict(zip(self.data_keys, process_params(query, self.data_keys)), widths=widths, target=target)
+        loop = asyncio.get_running_loop()
+        upload = await loop.run_in_executor(None, self.store.create, self.request['token'], length, mimetype, params)
+        make_log(self.logger,
+                 'debug',
+                 f'Upload {upload["id"]} of {length} bytes created',
+                 self.extra)
+        return json_response({'id': upload['id'], 'offset': upload['offset'], 'length': length},
+                             status=HTTPStatus.CREATED,
+                             headers={LOCATION: f'/uploads/{upload["id"]}', **upload_headers(upload)})
+
+    async def receive_upload(self) -> Union[Dict, Response]:
+        """Get upload session of requesting user
+
+        Returns
+        -------
+        Dict | Response
+            Upload session or Response if not found
+        """
+        return await receive_upload(self.request, self.logger, self.extra)
+
+    async def finalize_upload(self, upload: Dict, entity: DeclarativeMeta) -> Response:
+        """Convert completed upload and remove it
+
+        Upload is kept if conversion is rejected by admission control or
+        stopped by deadline, so finalization can be retried
+
+        Parameters
+        ----------
+        upload : Dict
+            Upload session
+        entity : DeclarativeMeta
+            Database ORM class
+
+        Returns
+        -------
+        Response
+            Server Response
+        """
+        lock = self.store.lock(upload['id'])
+        if lock.locked():
+            return create_descriptive_response(HTTPStatus.CONFLICT, headers=upload_headers(upload))
+
+        async with lock:
+            spool = self.store.spool(upload['id'])
+            upload['offset'] = spool.stat().st_size
+            if upload['offset'] != upload['length']:
+                make_log(self.logger,
+                         'debug',
+                         f'Upload {upload["id"]} is incomplete: {upload["offset"]} of {upload["length"]}',
+                         self.extra)
+                return create_descriptive_response(HTTPStatus.CONFLICT, headers=upload_headers(upload))
+
+            data = await self.add_data_to_db(entity)
+            if isinstance(data, Response):
+                return data
+            params = upload['params']
+            response = await self.create_image_processing_task(data, spool,
+                                                               *(params[k] for k in self.data_keys),
+                                                               widths=params.get('widths'),
+                                                               target=params.get('target'))
+
+        if response.status not in (HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.GATEWAY_TIMEOUT):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.store.remove, upload['id'])
+        return response
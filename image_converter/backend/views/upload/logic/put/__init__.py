@@ -0,0 +1 @@
+from .put import PutLogic
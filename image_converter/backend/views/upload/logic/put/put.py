@@ -0,0 +1,166 @@
+"""Upload View put logic
+
+This file provides upload view logic class for chunk put requests and contains the following
+
+Classes:
+
+    * PutLogic
+"""
+
+from logging import Logger
+from http import HTTPStatus
+from typing import Dict, Union
+
+from aiohttp.web import Response, Request
+
+from image_converter.backend.uploads import UploadTooLarge
+from image_converter.backend.views.helpers import make_log, create_descriptive_response, check_body_headers
+from image_converter.backend.views.upload.logic.helpers import receive_upload, upload_headers, UPLOAD_OFFSET
+
+
+class PutLogic:
+    """
+    A class that represent upload view put request processing logic
+
+    Attributes
+    ----------
+    request : Request
+        User's request
+    extra : Dict
+        Log formatting extra's dict
+    logger : Logger
+        Instance for logger
+    store : UploadStore
+        Resumable uploads storage
+
+    Methods
+    -------
+    check_body_headers(self) -> Union[Response, None]
+        Reject chunk longer than any upload before body is read
+    receive_upload(self) -> Union[Dict, Response]
+        Get upload session of requesting user
+    get_request_offset(self) -> Union[int, Response]
+        Get chunk offset from request
+    create_conflict_response(self, upload: Dict, offset: int) -> Response
+        Create response for chunk sent not at current offset
+    append_data(self, upload: Dict, offset: int) -> Response
+        Append request body to upload
+    """
+    def __init__(self, request: Request, logger: Logger, function_name: str):
+        self.request = request
+        self.extra = {'route': request.url, 'functionName': function_name}
+        self.logger = logger
+        self.store = self.request.app['Uploads']
+
+    def check_body_headers(self) -> Union[Response, None]:
+        """Reject chunk longer than maximal upload length before body is read,
+        client sending Expect header is rejected before it sends body
+
+        Returns
+        -------
+        Response | None
+            Response if request rejected
+        """
+        rejected = check_body_headers(self.request, self.store.max_size)
+        if rejected is not None:
+            make_log(self.logger,
+                     'debug',
+                     f'Chunk of {self.request.content_length} bytes rejected',
+                     self.extra)
+        return rejected
+
+    async def receive_upload(self) -> Union[Dict, Response]:
+        """Get upload session of requesting user
+
+        Returns
+        -------
+        Dict | Response
+            Upload session or Response if not found
+        """
+        return await receive_upload(self.request, self.logger, self.extra)
+
+    def get_request_offset(self) -> Union[int, Response]:
+        """Get chunk offset from request
+
+        Returns
+        -------
+        int | Response
+            Offset or Response if header is missing or malformed
+        """
+        try:
+            offset = int(self.request.headers[UPLOAD_OFFSET])
+            if offset < 0:
+                raise ValueError(offset)
+        except (KeyError, ValueError):
+            make_log(self.logger,
+                     'debug',
+                     f'Wrong request Header: {UPLOAD_OFFSET}',
+                     self.extra)
+            return create_descriptive_response(HTTPStatus.BAD_REQUEST)
+        return offset
+
+    def create_conflict_response(self, upload: Dict, offset: int) -> Response:
+        """Create response for chunk sent not at current offset or while other chunk is written
+
+        Parameters
+        ----------
+        upload : Dict
+            Upload session
+        offset : int
+            Chunk offset
+
+        Returns
+        -------
+        Response
+            Conflict Response with current offset
+        """
+        make_log(self.logger,
+                 'debug',
+                 f'Upload {upload["id"]} conflict: offset {offset}, expected {upload["offset"]}',
+                 self.extra)
+        return create_descriptive_response(HTTPStatus.CONFLICT, headers=upload_headers(upload))
+
+    async def append_data(self, upload: Dict, offset: int) -> Response:
+        """Append request body to upload
+
+        Chunk is accepted only at current offset and only one chunk of upload
+        is written at time, offset is read from spool file under upload lock,
+        so retried or concurrent request never duplicates data
+
+        Parameters
+        ----------
+        upload : Dict
+            Upload session
+        offset : int
+            Chunk offset
+
+        Returns
+        -------
+        Response
+            Server Response with new offset
+        """
+        lock = self.store.lock(upload['id'])
+        if lock.locked():
+            return self.create_conflict_response(upload, offset)
+
+        async with lock:
+            upload['offset'] = self.store.spool(upload['id']).stat().st_size
+            if offset != upload['offset']:
+                return self.create_conflict_response(upload, offset)
+            try:
+                upload['offset'] = await self.store.append(upload, self.request.content.iter_chunked(self.store.chunk))
+            except UploadTooLarge:
+                make_log(self.logger,
+                         'debug',
+                         f'Upload {upload["id"]} exceeds declared length {upload["length"]}',
+                         self.extra)
+                return create_descriptive_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                                   headers=upload_headers(upload))
+            except Exception as e:
+                upload['offset'] = self.store.spool(upload['id']).stat().st_size
+                make_log(self.logger,
+                         'warning',
+                         f'Upload {upload["id"]} interrupted at {upload["offset"]}: {e.__class__.__name__}',
+                         self.extra)
+                return create_descriptive_response(HTTPStatus.BAD_REQUEST, headers=upload_headers(upload))
+        return Response(status=HTTPStatus.NO_CONTENT, headers=upload_headers(upload))
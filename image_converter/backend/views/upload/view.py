@@ -0,0 +1,158 @@
+"""Upload View class
+
+This file provides resumable uploads routing view class and contains the following
+
+Classes:
+
+    * UploadView
+"""
+
+import logging
+
+from typing import Optional
+
+from aiohttp.web import Response, Request
+
+from image_converter.settings import config
+from image_converter.backend.models import Image
+from image_converter.backend.views.decorators import request_log, auth, rate_limit, deadline, continue_request
+from image_converter.backend.views.image.view import ImageView
+from image_converter.backend.views.upload.logic import HeadLogic, PostLogic, PutLogic
+
+
+log = logging.getLogger(config['project']['name'])
+
+
+class UploadView:
+    """
+    A class that represent resumable uploads routes handlers
+
+    Upload session is created with declared length, image data is sent by
+    chunks with offsets, after interruption client asks current offset and
+    resends only missing bytes, completed upload is finalized into image
+
+    Methods
+    -------
+    create(self, request: Request) -> Response
+        Create upload session
+    head(self, request: Request) -> Response
+        Current upload offset
+    put(self, request: Request) -> Response
+        Append chunk to upload
+    expect_put(self, request: Request) -> Optional[Response]
+        Check chunk request before chunk is sent
+    finalize(self, request: Request) -> Response
+        Convert completed upload to image
+    """
+    allowed_file_formats = ImageView.allowed_file_formats
+    data_keys = ImageView.data_keys
+
+    @request_log
+    @auth
+    @rate_limit
+    async def create(self, request: Request) -> Response:
+        """Coroutine handler for upload creation request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = PostLogic(request, log, self.create.__name__, self.allowed_file_formats, self.data_keys)
+        return await logic.create_upload()
+
+    @request_log
+    @auth
+    async def head(self, request: Request) -> Response:
+        """Coroutine handler for upload offset request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = HeadLogic(request, log, self.head.__name__)
+        upload = await logic.receive_upload()
+        if isinstance(upload, Response):
+            return upload
+        return await logic.create_head_response(upload)
+
+    @request_log
+    @auth
+    async def put(self, request: Request) -> Response:
+        """Coroutine handler for upload chunk request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = PutLogic(request, log, self.put.__name__)
+        rejected = logic.check_body_headers()
+        if rejected is not None:
+            return rejected
+        offset = logic.get_request_offset()
+        if isinstance(offset, Response):
+            return offset
+        upload = await logic.receive_upload()
+        if isinstance(upload, Response):
+            return upload
+        return await logic.append_data(upload, offset)
+
+    async def expect_put(self, request: Request) -> Optional[Response]:
+        """Coroutine expect handler for upload chunk request
+
+        Parameters
+        ----------
+        request : Request
+            Client request with Expect header
+
+        Returns
+        -------
+        Optional[Response]
+            Response if chunk rejected before it is sent
+        """
+        return await continue_request(request, request.app['Uploads'].max_size, (), self.put.__name__)
+
+    @request_log
+    @auth
+    @rate_limit
+    @deadline
+    async def finalize(self, request: Request) -> Response:
+        """Coroutine handler for upload finalization request
+
+        Parameters
+        ----------
+        request : Request
+            Client request
+
+        Returns
+        -------
+        Response
+            Response for user's request
+        """
+        logic = PostLogic(request, log, self.finalize.__name__, self.allowed_file_formats, self.data_keys)
+        rejected = await logic.check_admission()
+        if rejected is not None:
+            return rejected
+        upload = await logic.receive_upload()
+        if isinstance(upload, Response):
+            return upload
+        session = request.app['db']
+        async with session.begin():
+            return await logic.finalize_upload(upload, Image)
@@ -0,0 +1,147 @@
+"""Event loop watchdog
+
+This file provides measurement of event loop scheduling lag and reports of
+callbacks blocking the loop and contains the following
+
+Classes:
+
+    * LoopWatchdog
+
+Coroutines:
+
+    * watchdog_context(app) - Context coroutine
+"""
+
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from typing import Optional
+
+from image_converter.settings import config
+from image_converter.metrics import metrics
+from image_converter.backend.views.helpers import make_log
+
+
+LAG = metrics.histogram('event_loop_lag_seconds', 'Delay of event loop timer callbacks',
+                        buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10))
+STALLS = metrics.counter('event_loop_stalls_total', 'Event loop blocked longer than threshold')
+
+
+class LoopWatchdog:
+    """
+    A class that represent event loop lag watchdog
+
+    Timer task sleeps for interval and records how late it woke up, the lag
+    is time loop spent running other callbacks. Sampling thread checks timer
+    task beats, when loop does not beat for threshold it captures stack of
+    loop thread, i.e. code of blocking callback, and logs it once per stall
+
+    Attributes
+    ----------
+    interval : float
+        Seconds between timer task beats
+    threshold : float
+        Lag in seconds logged as stall
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    start(self) -> None
+        Start timer task and sampling thread in running loop
+    stop(self) -> None
+        Stop timer task and sampling thread
+    """
+    def __init__(self, interval: float, threshold: float, logger: logging.Logger):
+        self.interval = interval
+        self.threshold = threshold
+        self.logger = logger
+        self.extra = {'route': 'loop', 'functionName': 'watchdog'}
+        self._beat = time.monotonic()
+        self._reported = None
+        self._thread_id = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start timer task and sampling thread, must be called in loop thread
+        """
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.ensure_future(self._measure())
+        self._thread = threading.Thread(target=self._sample, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Stop timer task and sampling thread
+        """
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self._beat = time.monotonic()
+            LAG.observe(lag)
+            if lag >= self.threshold:
+                STALLS.inc()
+                make_log(self.logger, 'warning', f'Event loop was blocked for {lag:.3f}s', self.extra)
+
+    def _stack(self) -> Optional[str]:
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return None
+        return ''.join(traceback.format_stack(frame))
+
+    def _sample(self) -> None:
+        period = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(period):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or self._reported == beat:
+                continue
+            self._reported = beat
+            stack = self._stack()
+            if stack is not None:
+                make_log(self.logger,
+                         'warning',
+                         f'Event loop blocked for {blocked:.3f}s in:\n{stack.rstrip()}',
+                         self.extra)
+
+
+async def watchdog_context(app):
+    """Context coroutine run when app run and stop
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    settings = app['settings']['watchdog']
+    app['Watchdog'] = None
+    if settings['enabled']:
+        app['Watchdog'] = LoopWatchdog(settings['interval'],
+                                       settings['threshold'],
+                                       logging.getLogger(config['project']['name']))
+        app['Watchdog'].start()
+    yield
+    if app['Watchdog'] is not None:
+        await app['Watchdog'].stop()
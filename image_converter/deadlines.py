@@ -0,0 +1,95 @@
+"""Setup request deadlines
+
+This file provides deadlines carried from requests to converter workers and contains:
+    Classes:
+
+        * DeadlineExceeded
+            Exception raised when work can not finish before deadline
+
+    Functions:
+
+        * check(deadline: Optional[float], stage: str) -> None
+        * measured(function: Callable, *args) -> Tuple[Any, float]
+
+    Variables:
+
+        * EXCEEDED - Counter of deadlines exceeded by stage
+        * WASTED - Counter of converter CPU seconds spent on abandoned requests
+
+Deadline is an epoch time, so it keeps its meaning in worker processes and
+on worker hosts, None means no deadline
+"""
+
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from image_converter.metrics import metrics
+
+
+EXCEEDED = metrics.counter('deadline_exceeded_total', 'Requests and conversions stopped by deadline by stage')
+WASTED = metrics.counter('conversion_wasted_cpu_seconds_total', 'Converter CPU time spent on abandoned work by reason')
+
+
+class DeadlineExceeded(Exception):
+    """
+    Exception raised when work can not finish before deadline
+
+    Attributes
+    ----------
+    stage : str
+        Stage at which work was stopped
+    cpu : float
+        CPU seconds spent by stopped work
+    """
+    def __init__(self, stage: str, cpu: float = 0):
+        super().__init__(stage, cpu)
+        self.stage = stage
+        self.cpu = cpu
+
+
+def check(deadline: Optional[float], stage: str) -> None:
+    """Stop work if deadline passed
+
+    Parameters
+    ----------
+    deadline : float
+        Epoch deadline or None
+    stage : str
+        Stage about to start
+
+    Raises
+    ------
+    DeadlineExceeded
+        If deadline passed
+    """
+    if deadline is not None and time.time() >= deadline:
+        raise DeadlineExceeded(stage)
+
+
+def measured(function: Callable, *args) -> Tuple[Any, float]:
+    """Call function and measure CPU time of calling thread, stopped work
+    reports CPU time spent before it was stopped
+
+    Parameters
+    ----------
+    function : Callable
+        Called function
+    args : List
+        Function arguments
+
+    Returns
+    -------
+    Tuple[Any, float]
+        Function result and CPU seconds
+
+    Raises
+    ------
+    DeadlineExceeded
+        If function was stopped by deadline
+    """
+    started = time.thread_time()
+    try:
+        result = function(*args)
+    except DeadlineExceeded as e:
+        raise DeadlineExceeded(e.stage, time.thread_time() - started) from None
+    return result, time.thread_time() - started
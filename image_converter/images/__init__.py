@@ -0,0 +1 @@
+from .context import converter_context
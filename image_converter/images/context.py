@@ -0,0 +1,25 @@
+"""Image converter context for aiohttp
+
+This file provides converter context for aiohttp app
+
+    Coroutines:
+
+        * converter_context(app) - Context coroutine
+"""
+
+
+async def converter_context(app):
+    """Context coroutine run when app run and stop
+
+    Starts shared converter worker pool and shuts it down on exit
+
+    Parameters
+    ----------
+    app : aihttp.web.Application
+        aiohttp application
+
+    """
+    converter = app['Converter']
+    converter.start()
+    yield
+    converter.shutdown()
@@ -1,14 +1,100 @@
 """Image converter
 """
 
+import os
+import math
+import base64
+import shutil
 import asyncio
+import hashlib
+import subprocess
 import concurrent.futures
 from io import BytesIO
+from pathlib import Path
 from functools import partial
-from typing import Dict
+from typing import Callable, Dict, List, Tuple, Union, Optional
 
 from PIL import Image
 
+from image_converter.metrics import metrics
+from image_converter.profiling import Profile
+from image_converter.deadlines import DeadlineExceeded, EXCEEDED, WASTED, check, measured
+from image_converter.images.formats import load_formats, write_file
+from image_converter.images.quality import luma, ssim, search_quality
+from image_converter.images.executors import create_executor, encoder_pool, PROCESS, THREAD, HYBRID
+
+
+ORIENTATION = 0x0112
+TILES = 'tiles'
+SPRITE = 'sprite'
+JPEGTRAN = shutil.which('jpegtran')
+TRANSFORMS = {2: ('-flip', 'horizontal'),
+              3: ('-rotate', '180'),
+              4: ('-flip', 'vertical'),
+              5: ('-transpose',),
+              6: ('-rotate', '90'),
+              7: ('-transverse',),
+              8: ('-rotate', '270')}
+JPEGTRAN_TIMEOUT = 30
+# JFIF header and Adobe color transform are kept, other APPn segments and comments carry metadata
+KEPT_SEGMENTS = (0xE0, 0xEE)
+
+TASKS = metrics.counter('converter_tasks_total', 'Converter calls by executor backend')
+DROPPED = metrics.counter('converter_tasks_dropped_total', 'Converter calls cancelled before start')
+
+
+def account_abandoned(future: concurrent.futures.Future) -> None:
+    """Count CPU time of converter call finished after its caller was cancelled
+
+    Parameters
+    ----------
+    future : Future
+        Finished converter call
+    """
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is None:
+        WASTED.inc(future.result()[1], reason='abandoned')
+    elif isinstance(error, DeadlineExceeded):
+        WASTED.inc(error.cpu, reason='deadline')
+
+
+def strip_metadata(data: bytes) -> Optional[bytes]:
+    """Drop metadata segments of JPEG before its first scan without re-encoding
+
+    Parameters
+    ----------
+    data : bytes
+        JPEG image
+
+    Returns
+    -------
+    Optional[bytes]
+        JPEG without EXIF, XMP, ICC and comments or None if its headers are malformed
+    """
+    if data[:2] != b'\xff\xd8':
+        return None
+    kept = [data[:2]]
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker == 0xDA:
+            kept.append(data[position:])
+            return b''.join(kept)
+        end = position + 2 + int.from_bytes(data[position + 2:position + 4], 'big')
+        if end <= position + 3 or end > len(data):
+            return None
+        if not (0xE0 <= marker <= 0xEF and marker not in KEPT_SEGMENTS or marker == 0xFE):
+            kept.append(data[position:end])
+        position = end
+    return None
+
 
 class ImageConverter:
     """
@@ -18,35 +104,236 @@ class ImageConverter:
     ----------
     settings : Dict
         Settings for ImageConverter setup.
+    formats : Dict[str, OutputFormat]
+        Available output formats, primary format first
+    backend : str
+        Executor backend, process, thread, inline or hybrid
+    threshold_bytes : int
+        Hybrid backend input size above which process pool is used
+    threshold_pixels : int
+        Hybrid backend pixel count above which process pool is used
+    max_frames : int
+        Maximal number of converted frames of multi-frame image
+    placeholder_size : int
+        Placeholder bounding box side, placeholder is disabled if not set
+    tile_size : int
+        Side of deep zoom tile, tiles are disabled if not set
+    tile_min_size : int
+        Minimal larger side of image with tiles
+    tile_eager : bool
+        Tiles are made during conversion, otherwise on first request
+    min_quality : int
+        Lowest quality tried by quality targeted encoding
+    max_quality : int
+        Highest quality tried by quality targeted encoding
+    trials : int
+        Maximal trial encodes of each quality search
+    ssim_size : int
+        Larger side of luma plane compared by SSIM
 
     Methods
     -------
-    save(image: Image, filename: str, quality: int = None) -> None
-        Save image file
+    save(image: Image, filename: str, quality: int = None) -> Dict
+        Save image file and return its metadata
+    save_target(self, image: Image, filename: str, target: Dict) -> Dict
+        Save image with quality searched for target SSIM or size
+    store(self, data: bytes, filename: str, width: int, height: int) -> Dict
+        Store encoded image and return its metadata
+    original(self, image: Image, buf: BinaryIO) -> Optional[bytes]
+        Source bytes usable without re-encoding
+    transform(self, data: bytes, orientation: int) -> Optional[bytes]
+        Apply EXIF orientation with lossless JPEG transform
     convert(self, image: Image) -> Image
         Convert image file to specific format
     compress(self, image: Image, x: int, y: int) -> Image:
         Compress image file to provided resolution
-    process(self, _bytes: bytes,
+    placeholder(self, image: Image) -> Optional[str]
+        Tiny low quality JPEG data URI of image
+    tile_levels(self, width: int, height: int) -> int
+        Number of tile pyramid levels
+    level_size(self, width: int, height: int, z: int) -> Tuple[int, int]
+        Size of tile pyramid level
+    tiles_path(self, filename: str) -> Path
+        Directory of image tiles
+    tile_path(self, filename: str, z: int, x: int, y: int) -> Path
+        Path to tile file
+    save_tile(self, image: Image, box: Tuple[int, int, int, int], path: Path) -> int
+        Save image region as tile
+    pyramid(self, image: Image, filename: str, deadline: float = None) -> int
+        Save tiles of all levels encoded in parallel
+    sprite(self, sources: List[Path], cell: int, path: Path, quality: int = None) -> Dict
+        Save thumbnails of images composed into one image
+    open(self, _bytes: Union[bytes, Path]) -> BinaryIO
+        Open source data
+    cascade(self, image: Image,
+            filename: str,
+            widths: List[int],
+            quality: int = None,
+            deadline: float = None) -> Dict[str, Dict]
+        Save downscaled renditions encoded in parallel
+    process(self, _bytes: Union[bytes, Path],
             filename: str,
             quality: int = None,
             x: int = None,
-            y: int = None) -> None:
-        Process provided byte data with convert compress and save
-    async_image_process(self, _bytes: bytes,
+            y: int = None,
+            widths: List[int] = None,
+            target: Dict = None,
+            deadline: float = None) -> Dict:
+        Process provided byte data or spooled file with convert compress and save
+    page_name(filename: str, page: int) -> str
+        Stored name of multi-frame image page
+    page_ranges(self, frames: int, sequential: bool) -> List[Tuple[int, int]]
+        Split pages after first between workers
+    process_pages(self, _bytes: Union[bytes, Path],
+                  filename: str,
+                  start: int,
+                  stop: int,
+                  quality: int = None,
+                  x: int = None,
+                  y: int = None,
+                  deadline: float = None) -> Dict[str, Dict]
+        Convert and save range of multi-frame image pages
+    async_pages(self, _bytes: Union[bytes, Path],
+                filename: str,
+                metadata: Dict,
+                quality: int = None,
+                x: int = None,
+                y: int = None,
+                deadline: float = None) -> Dict[str, Dict]
+        Convert pages after first in parallel
+    profiled_process(self, mode: str, *args) -> Dict
+        Process with profiling, profile stored in result under profile key
+    async_image_process(self, _bytes: Union[bytes, Path],
                         filename: str,
                         quality: int = None,
                         x: int = None,
-                        y: int = None) -> None:
+                        y: int = None,
+                        profile: str = None,
+                        widths: List[int] = None,
+                        deadline: float = None,
+                        target: Dict = None) -> Dict:
         Create and execute process coroutine
+    dispatch(self, executor: Executor, function: Callable, deadline: float = None)
+        Run converter call in executor unless deadline passed
+    start(self) -> None
+        Create shared worker pools
+    shutdown(self) -> None
+        Shutdown shared worker pools
+    route(self, source: Union[bytes, Path, List[Path]]) -> str
+        Choose executor backend for source
+    executor_for(self, source: Union[bytes, Path, List[Path]]) -> Executor
+        Executor for source
+    render(self, filename: str, name: str) -> int
+        Encode stored image to alternate output format
+    async_render(self, filename: str, name: str) -> int
+        Create and execute render coroutine, shared between concurrent callers
+    build_tiles(self, filename: str) -> int
+        Save tiles of stored image
+    async_tiles(self, filename: str) -> int
+        Create and execute tiles coroutine, shared between concurrent callers
+    async_sprite(self, name: str, sources: List[Path], cell: int, path: Path, quality: int = None) -> Dict
+        Create and execute sprite coroutine, shared between concurrent callers
     """
     def __init__(self, settings: Dict):
         self.path = settings['images_path']
         self.format = settings['images']['format']
         self.extension = settings['images']['extension']
+        self.passthrough = settings['images']['passthrough']
+        self.max_frames = settings['images']['max_frames']
+        placeholder = settings['images']['placeholder'] or {}
+        self.placeholder_size = placeholder.get('size')
+        self.placeholder_quality = placeholder.get('quality')
+        tiles = settings['images']['tiles'] or {}
+        self.tile_size = tiles.get('size')
+        self.tile_quality = tiles.get('quality')
+        self.tile_min_size = tiles.get('min_size') or 0
+        self.tile_eager = tiles.get('eager', False)
+        target = settings['images']['target']
+        self.min_quality = target['min_quality']
+        self.max_quality = target['max_quality']
+        self.trials = target['trials']
+        self.ssim_size = target['size']
         self.compress_method = Image.Resampling.LANCZOS
+        self.formats = load_formats(settings)
+        self.workers = settings['limits']['conversions'] or os.cpu_count()
+        self.backend = settings['executor']['backend']
+        self.threshold_bytes = settings['executor']['threshold_bytes']
+        self.threshold_pixels = settings['executor']['threshold_pixels']
+        self._pools = {}
+        self._renders = {}
 
-    def save(self, image: Image, filename: str, quality: int = None) -> None:
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        state['_pools'] = {}
+        state['_renders'] = {}
+        return state
+
+    def start(self) -> None:
+        """Create shared worker pools, hybrid backend uses thread and process pools
+        """
+        for backend in ((THREAD, PROCESS) if self.backend == HYBRID else (self.backend,)):
+            if backend not in self._pools:
+                self._pools[backend] = create_executor(backend, self.workers)
+
+    def shutdown(self) -> None:
+        """Shutdown shared worker pools
+        """
+        while self._pools:
+            _, pool = self._pools.popitem()
+            pool.shutdown(wait=True)
+
+    def route(self, source: Union[bytes, Path, List[Path]]) -> str:
+        """Choose executor backend for source
+
+        Hybrid backend sends images larger than thresholds and compositions
+        of many images to process pool, pixel count is read from image header
+
+        Parameters
+        ----------
+        source : bytes | Path | List[Path]
+            Data in bytes, path to image file or paths to composed image files
+
+        Returns
+        -------
+        str
+            Executor backend
+        """
+        if self.backend != HYBRID:
+            return self.backend
+        if isinstance(source, list):
+            return PROCESS
+        try:
+            size = len(source) if isinstance(source, (bytes, bytearray, memoryview)) else os.stat(source).st_size
+            if self.threshold_bytes is not None and size > self.threshold_bytes:
+                return PROCESS
+            if self.threshold_pixels is not None:
+                with self.open(source) as buf, Image.open(buf) as image:
+                    if image.width * image.height > self.threshold_pixels:
+                        return PROCESS
+        except Exception:
+            return PROCESS
+        return THREAD
+
+    def executor_for(self, source: Union[bytes, Path, List[Path]]) -> concurrent.futures.Executor:
+        """Executor for source
+
+        Parameters
+        ----------
+        source : bytes | Path | List[Path]
+            Data in bytes, path to image file or paths to composed image files
+
+        Returns
+        -------
+        Executor
+            Shared executor
+        """
+        backend = self.route(source)
+        if backend not in self._pools:
+            self.start()
+        TASKS.inc(backend=backend)
+        return self._pools[backend]
+
+    def save(self, image: Image, filename: str, quality: int = None) -> Dict:
         """
         Parameters
         ----------
@@ -56,11 +343,119 @@ class ImageConverter:
             Path to output file
         quality : int
             Compression quality in %
+
+        Returns
+        -------
+        Dict
+            Stored image width, height, size and content hash
         """
-        if quality:
-            image.save(self.path / f'{filename}.{self.extension}', quality=quality, optimize=True)
-        else:
-            image.save(self.path / f'{filename}.{self.extension}')
+        data = self.formats[self.extension].encode(image, quality)
+        return self.store(data, filename, image.width, image.height)
+
+    def save_target(self, image: Image, filename: str, target: Dict) -> Dict:
+        """Save image with lowest quality reaching target SSIM, lowered further
+        if encoded image does not fit max bytes
+
+        Parameters
+        ----------
+        image : Image
+            PIL.Image
+        filename : str
+            Path to output file
+        target : Dict
+            Optional target_ssim and max_bytes
+
+        Returns
+        -------
+        Dict
+            Stored image width, height, size, content hash and chosen quality
+        """
+        output = self.formats[self.extension]
+        target_ssim = target.get('target_ssim')
+        reference = luma(image, self.ssim_size) if target_ssim is not None else None
+
+        def score(data: bytes) -> float:
+            with Image.open(BytesIO(data)) as encoded:
+                return ssim(reference, luma(encoded, self.ssim_size))
+
+        quality, data = search_quality(partial(output.encode, image), score, target_ssim, target.get('max_bytes'),
+                                       self.min_quality, self.max_quality, self.trials)
+        return dict(self.store(data, filename, image.width, image.height), quality=quality)
+
+    def store(self, data: bytes, filename: str, width: int, height: int) -> Dict:
+        """
+        Parameters
+        ----------
+        data : bytes
+            Encoded image
+        filename : str
+            Path to output file
+        width : int
+            Image width
+        height : int
+            Image height
+
+        Returns
+        -------
+        Dict
+            Stored image width, height, size and content hash
+        """
+        write_file(self.path / f'{filename}.{self.extension}', data)
+        return {'width': width,
+                'height': height,
+                'size': len(data),
+                'hash': hashlib.sha256(data).hexdigest()}
+
+    def original(self, image: Image, buf) -> Optional[bytes]:
+        """Source bytes of JPEG image already in output format, only header is parsed.
+        Metadata is dropped as re-encoding would drop it, other formats are re-encoded
+
+        Parameters
+        ----------
+        image : Image
+            PIL.Image opened from buf
+        buf : BinaryIO
+            Source data
+
+        Returns
+        -------
+        Optional[bytes]
+            Source bytes without metadata or None if image has to be re-encoded
+        """
+        if image.format != 'JPEG':
+            return None
+        orientation = image.getexif().get(ORIENTATION, 1)
+        buf.seek(0)
+        data = buf.read()
+        if orientation in TRANSFORMS:
+            return self.transform(data, orientation)
+        return strip_metadata(data)
+
+    def transform(self, data: bytes, orientation: int) -> Optional[bytes]:
+        """Apply EXIF orientation to JPEG with jpegtran without re-encoding
+
+        Parameters
+        ----------
+        data : bytes
+            JPEG image
+        orientation : int
+            EXIF orientation
+
+        Returns
+        -------
+        Optional[bytes]
+            Transformed JPEG, metadata is dropped, or None if jpegtran is not
+            installed, does not finish in time or transform is not lossless for image size
+        """
+        if JPEGTRAN is None:
+            return None
+        try:
+            result = subprocess.run([JPEGTRAN, '-copy', 'none', '-perfect', *TRANSFORMS[orientation]],
+                                    input=data, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    timeout=JPEGTRAN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            return None
+        return result.stdout if result.returncode == 0 and result.stdout else None
 
     def convert(self, image: Image) -> Image:
         """
@@ -97,32 +492,495 @@ class ImageConverter:
         image = image.resize((x, y), self.compress_method)
         return image
 
-    def process(self, _bytes: bytes,
+    def placeholder(self, image: Image) -> Optional[str]:
+        """Tiny low quality placeholder shown by clients while image loads
+
+        Not yet decoded JPEG is decoded at reduced scale
+
+        Parameters
+        ----------
+        image : Image
+            PIL.Image
+
+        Returns
+        -------
+        Optional[str]
+            JPEG data URI or None if placeholder is disabled
+        """
+        if not self.placeholder_size:
+            return None
+        scale = self.placeholder_size / max(image.width, image.height)
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image.draft('RGB', size)
+        image = image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0).convert('RGB')
+        with BytesIO() as buf:
+            image.save(buf, format='JPEG', quality=self.placeholder_quality)
+            return f'data:image/jpeg;base64,{base64.b64encode(buf.getvalue()).decode()}'
+
+    def tile_levels(self, width: int, height: int) -> int:
+        """
+        Parameters
+        ----------
+        width : int
+            Image width
+        height : int
+            Image height
+
+        Returns
+        -------
+        int
+            Number of levels, level 0 fits in one tile and last level is image
+            itself, 0 if tiles are disabled or image is too small
+        """
+        side = max(width or 0, height or 0)
+        if not self.tile_size or not side or side < self.tile_min_size:
+            return 0
+        return max(0, math.ceil(math.log2(side / self.tile_size))) + 1
+
+    def level_size(self, width: int, height: int, z: int) -> Tuple[int, int]:
+        """
+        Parameters
+        ----------
+        width : int
+            Image width
+        height : int
+            Image height
+        z : int
+            Level
+
+        Returns
+        -------
+        Tuple[int, int]
+            Level width and height, each level halves next one rounding up
+        """
+        scale = 2 ** (self.tile_levels(width, height) - 1 - z)
+        return -(-width // scale), -(-height // scale)
+
+    def tiles_path(self, filename: str) -> Path:
+        """
+        Parameters
+        ----------
+        filename : str
+            Stored image name
+
+        Returns
+        -------
+        Path
+            Directory of image tiles
+        """
+        return self.path / f'{filename}.{TILES}'
+
+    def tile_path(self, filename: str, z: int, x: int, y: int) -> Path:
+        """
+        Parameters
+        ----------
+        filename : str
+            Stored image name
+        z : int
+            Level
+        x : int
+            Column
+        y : int
+            Row
+
+        Returns
+        -------
+        Path
+            Path to tile file
+        """
+        return self.tiles_path(filename) / str(z) / f'{x}_{y}.{self.extension}'
+
+    def save_tile(self, image: Image, box: Tuple[int, int, int, int], path: Path) -> int:
+        """
+        Parameters
+        ----------
+        image : Image
+            Loaded PIL.Image of level
+        box : Tuple[int, int, int, int]
+            Tile region
+        path : Path
+            Path to tile file
+
+        Returns
+        -------
+        int
+            Tile size in bytes
+        """
+        data = self.formats[self.extension].encode(image.crop(box), self.tile_quality)
+        write_file(path, data)
+        return len(data)
+
+    def pyramid(self, image: Image, filename: str, deadline: float = None) -> int:
+        """Save tiles of all levels, each level is reduced from next larger one
+        and its tiles are encoded in thread pool while next level is reduced
+
+        Parameters
+        ----------
+        image : Image
+            PIL.Image
+        filename: str
+            Stored image name
+        deadline: float
+            Optional epoch time after which no level is started
+
+        Returns
+        -------
+        int
+            Number of saved tiles
+        """
+        pool = encoder_pool()
+        futures = []
+        levels = self.tile_levels(*image.size)
+        image.load()
+        for z in reversed(range(levels)):
+            check(deadline, 'tiles')
+            if z < levels - 1:
+                image = image.reduce(2)
+            directory = self.tiles_path(filename) / str(z)
+            directory.mkdir(parents=True, exist_ok=True)
+            for x in range(math.ceil(image.width / self.tile_size)):
+                for y in range(math.ceil(image.height / self.tile_size)):
+                    box = (x * self.tile_size,
+                           y * self.tile_size,
+                           min((x + 1) * self.tile_size, image.width),
+                           min((y + 1) * self.tile_size, image.height))
+                    futures.append(pool.submit(self.save_tile, image, box,
+                                               directory / f'{x}_{y}.{self.extension}'))
+        for future in futures:
+            future.result()
+        return len(futures)
+
+    def sprite(self, sources: List[Path], cell: int, path: Path, quality: int = None) -> Dict:
+        """Compose thumbnails of images into one image, thumbnails are laid out
+        in square grid of cells, JPEG sources are decoded at reduced scale
+
+        Parameters
+        ----------
+        sources : List[Path]
+            Paths to image files
+        cell : int
+            Cell side, thumbnail fits in cell
+        path : Path
+            Path to output file
+        quality : int
+            Compression quality in %
+
+        Returns
+        -------
+        Dict
+            Sprite width, height, cell side and x, y, width, height of thumbnails in sources order
+        """
+        columns = math.ceil(math.sqrt(len(sources)))
+        rows = math.ceil(len(sources) / columns)
+        sheet = Image.new('RGB', (columns * cell, rows * cell), 'white')
+        cells = []
+        for index, source in enumerate(sources):
+            x, y = index % columns * cell, index // columns * cell
+            with Image.open(source) as image:
+                image.thumbnail((cell, cell), self.compress_method)
+                sheet.paste(image.convert('RGB'), (x, y))
+                cells.append([x, y, image.width, image.height])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_file(path, self.formats[self.extension].encode(sheet, quality))
+        return {'width': sheet.width, 'height': sheet.height, 'cell': cell, 'cells': cells}
+
+    def open(self, _bytes: Union[bytes, Path]):
+        """
+        Parameters
+        ----------
+        _bytes : bytes | Path
+            Data in bytes or path to spooled file
+
+        Returns
+        -------
+        BinaryIO
+            Readable source
+        """
+        if isinstance(_bytes, (bytes, bytearray, memoryview)):
+            return BytesIO(_bytes)
+        return open(_bytes, 'rb')
+
+    def cascade(self, image: Image,
+                filename: str,
+                widths: List[int],
+                quality: int = None,
+                deadline: float = None) -> Dict[str, Dict]:
+        """Save renditions of widths smaller than image, each one is downscaled
+        from previous larger rendition and encoded in thread pool while next is resized
+
+        Parameters
+        ----------
+        image : Image
+            PIL.Image
+        filename: str
+            Stored image name
+        widths: List[int]
+            Renditions widths
+        quality: int
+            Compression quality in %
+        deadline: float
+            Optional epoch time after which no rendition is started
+
+        Returns
+        -------
+        Dict[str, Dict]
+            Stored renditions metadata by rendition name
+        """
+        pool = encoder_pool()
+        futures = {}
+        for width in sorted({width for width in widths if 0 < width < image.width}, reverse=True):
+            check(deadline, 'renditions')
+            image = image.resize((width, max(1, round(image.height * width / image.width))), self.compress_method)
+            futures[f'w{width}'] = pool.submit(self.save, image, f'{filename}.w{width}', quality)
+        return {name: future.result() for name, future in futures.items()}
+
+    def process(self, _bytes: Union[bytes, Path],
                 filename: str,
                 quality: int = None,
                 x: int = None,
-                y: int = None) -> None:
+                y: int = None,
+                widths: List[int] = None,
+                target: Dict = None,
+                deadline: float = None) -> Dict:
+        """Convert, compress and save image
+
+        JPEG image already in output format without quality, widths and target is
+        stored without re-encoding and without its metadata, result is marked with passthrough key.
+        Quality is searched for target if quality with size is not given, renditions
+        and pages are saved with chosen quality. Quality without size compresses
+        image keeping its size.
+        Only first page of multi-frame image is converted, result contains
+        frames count and sequential key if pages can only be decoded in order.
+        Renditions of widths, placeholder and eager tiles are made from the same decoded image.
+        Deadline is checked before each stage, call queued in pool after deadline
+        is dropped before decoding
+
+        Parameters
+        ----------
+        _bytes : bytes | Path
+            Data in bytes or path to spooled file
+        filename: str
+            Output path to file
+        quality: int
+            Compression quality in %
+        x: int
+            Width
+        y: int
+            Height
+        widths: List[int]
+            Optional widths of downscaled renditions
+        target: Dict
+            Optional target_ssim and max_bytes of quality targeted encoding
+        deadline: float
+            Optional epoch time after which conversion is stopped
+
+        Returns
+        -------
+        Dict
+            Stored image metadata
 
-        with BytesIO(_bytes) as buf:
+        Raises
+        ------
+        DeadlineExceeded
+            If deadline passed before conversion finished
+        """
+        check(deadline, 'start')
+        with self.open(_bytes) as buf:
             image = Image.open(buf)
+            if self.passthrough and image.format == self.format and not (quality or widths or target):
+                data = self.original(image, buf)
+                if data is not None:
+                    with Image.open(BytesIO(data)) as stored:
+                        return dict(self.store(data, filename, *stored.size),
+                                    placeholder=self.placeholder(stored),
+                                    passthrough=True)
+            frames = min(getattr(image, 'n_frames', 1), self.max_frames)
+            sequential = image.format == 'GIF'
             image = self.convert(image)
+            check(deadline, 'encode')
 
             if quality and x and y:
                 image = self.compress(image, x, y)
-                self.save(image, filename, quality=quality)
+                metadata = dict(self.save(image, filename, quality=quality), quality=quality)
+            elif target:
+                metadata = self.save_target(image, filename, target)
+                quality = metadata['quality']
+            elif quality:
+                metadata = dict(self.save(image, filename, quality=quality), quality=quality)
             else:
-                self.save(image, filename)
+                metadata = self.save(image, filename)
+            metadata['placeholder'] = self.placeholder(image)
+            if widths:
+                metadata['renditions'] = self.cascade(image, filename, widths, quality, deadline)
+            if self.tile_eager and self.tile_levels(*image.size):
+                self.pyramid(image, filename, deadline)
+
+        if frames > 1:
+            metadata.update(frames=frames, sequential=sequential)
+        return metadata
+
+    @staticmethod
+    def page_name(filename: str, page: int) -> str:
+        """
+        Parameters
+        ----------
+        filename : str
+            Stored image name
+        page: int
+            Page number
+
+        Returns
+        -------
+        str
+            Stored page name, first page is stored image itself
+        """
+        return f'{filename}.p{page}'
+
+    def page_ranges(self, frames: int, sequential: bool) -> List[Tuple[int, int]]:
+        """
+        Parameters
+        ----------
+        frames : int
+            Number of pages
+        sequential: bool
+            Pages can only be decoded in order, e.g. GIF frames depend on previous ones
+
+        Returns
+        -------
+        List[Tuple[int, int]]
+            Contiguous ranges of pages after first, one per worker
+        """
+        if sequential:
+            return [(1, frames)]
+        step = math.ceil((frames - 1) / self.workers)
+        return [(start, min(start + step, frames)) for start in range(1, frames, step)]
+
+    def process_pages(self, _bytes: Union[bytes, Path],
+                      filename: str,
+                      start: int,
+                      stop: int,
+                      quality: int = None,
+                      x: int = None,
+                      y: int = None,
+                      deadline: float = None) -> Dict[str, Dict]:
+        """Convert and save range of pages, only one page is decoded at time
+
+        Parameters
+        ----------
+        _bytes : bytes | Path
+            Data in bytes or path to spooled file
+        filename: str
+            Stored image name
+        start: int
+            First page
+        stop: int
+            Page after last
+        quality: int
+            Compression quality in %
+        x: int
+            Width
+        y: int
+            Height
+        deadline: float
+            Optional epoch time after which no page is started
+
+        Returns
+        -------
+        Dict[str, Dict]
+            Stored pages metadata by rendition name
+        """
+        renditions = {}
+        with self.open(_bytes) as buf, Image.open(buf) as image:
+            for page in range(start, stop):
+                check(deadline, 'pages')
+                image.seek(page)
+                frame = image.convert('RGB')
+                if quality and x and y:
+                    frame = self.compress(frame, x, y)
+                renditions[f'p{page}'] = self.save(frame, self.page_name(filename, page), quality=quality)
+        return renditions
+
+    async def async_pages(self, _bytes: Union[bytes, Path],
+                          filename: str,
+                          metadata: Dict,
+                          quality: int = None,
+                          x: int = None,
+                          y: int = None,
+                          deadline: float = None) -> Dict[str, Dict]:
+        """Convert ranges of pages in parallel, other ranges are cancelled if one fails
+
+        Parameters
+        ----------
+        _bytes : bytes | Path
+            Data in bytes or path to spooled file
+        filename: str
+            Stored image name
+        metadata: Dict
+            Stored first page metadata with frames count
+        quality: int
+            Compression quality in %
+        x: int
+            Width
+        y: int
+            Height
+        deadline: float
+            Optional epoch time after which conversion is stopped
+
+        Returns
+        -------
+        Dict[str, Dict]
+            Stored pages metadata by rendition name
+        """
+        ranges = self.page_ranges(metadata['frames'], metadata.pop('sequential'))
+        tasks = [asyncio.ensure_future(self.dispatch(self.executor_for(_bytes),
+                                                     partial(self.process_pages, _bytes, filename,
+                                                             start, stop, quality, x, y, deadline),
+                                                     deadline))
+                 for start, stop in ranges]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        renditions = {'p0': {key: metadata[key] for key in ('width', 'height', 'size', 'hash')}}
+        for result in results:
+            renditions.update(result)
+        return renditions
 
-    async def async_image_process(self, _bytes: bytes,
+    def profiled_process(self, mode: str, *args) -> Dict:
+        """
+        Parameters
+        ----------
+        mode : str
+            Profiling mode, cpu or memory
+        args: List
+            process arguments
+
+        Returns
+        -------
+        Dict
+            Stored image metadata with serialized profile
+        """
+        with Profile(mode) as profile:
+            metadata = self.process(*args)
+        metadata['profile'] = profile.dump()
+        return metadata
+
+    async def async_image_process(self, _bytes: Union[bytes, Path],
                                   filename: str,
                                   quality: int = None,
                                   x: int = None,
-                                  y: int = None) -> None:
+                                  y: int = None,
+                                  profile: str = None,
+                                  widths: List[int] = None,
+                                  deadline: float = None,
+                                  target: Dict = None) -> Dict:
         """
         Parameters
         ----------
-        _bytes : bytes
-            Data in bytes
+        _bytes : bytes | Path
+            Data in bytes or path to spooled file
         filename: str
             Output path to file
         quality: int
@@ -131,9 +989,173 @@ class ImageConverter:
             Width
         y: int
             Height
+        profile: str
+            Optional profiling mode, cpu or memory
+        widths: List[int]
+            Optional widths of downscaled renditions
+        deadline: float
+            Optional epoch time after which conversion is stopped
+        target: Dict
+            Optional target_ssim and max_bytes of quality targeted encoding
+
+        Returns
+        -------
+        Dict
+            Stored image metadata, pages of multi-frame image under renditions key
+
+        Raises
+        ------
+        DeadlineExceeded
+            If deadline passed before conversion finished
+        """
+        if profile:
+            function = partial(self.profiled_process, profile,
+                               _bytes, filename, quality, x, y, widths, target, deadline)
+        else:
+            function = partial(self.process, _bytes, filename, quality, x, y, widths, target, deadline)
+        metadata = await self.dispatch(self.executor_for(_bytes), function, deadline)
+        if metadata.get('frames', 1) > 1:
+            pages = await self.async_pages(_bytes, filename, metadata, metadata.get('quality', quality), x, y, deadline)
+            metadata['renditions'] = dict(metadata.get('renditions') or {}, **pages)
+        return metadata
+
+    async def dispatch(self, executor: concurrent.futures.Executor, function: Callable, deadline: float = None):
+        """Run converter call in executor unless deadline passed
+
+        Call still queued in executor when caller is cancelled, e.g. by client
+        disconnect or request deadline, is dropped. CPU time of running call
+        finished after cancellation and of call stopped by deadline is counted
+        as wasted
+
+        Parameters
+        ----------
+        executor : Executor
+            Converter executor
+        function: Callable
+            Converter call
+        deadline: float
+            Optional epoch time after which call is not dispatched
+
+        Returns
+        -------
+        Any
+            Call result
+
+        Raises
+        ------
+        DeadlineExceeded
+            If deadline passed before call finished
+        """
+        future = None
+        try:
+            check(deadline, 'dispatch')
+            future = executor.submit(measured, function)
+            result, _ = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancel():
+                DROPPED.inc()
+            else:
+                future.add_done_callback(account_abandoned)
+            raise
+        except DeadlineExceeded as e:
+            EXCEEDED.inc(stage=e.stage)
+            WASTED.inc(e.cpu, reason='deadline')
+            raise
+        return result
+
+    def render(self, filename: str, name: str) -> int:
+        """
+        Parameters
+        ----------
+        filename : str
+            Stored image name
+        name: str
+            Output format name
+
+        Returns
+        -------
+        int
+            Rendition size in bytes
+        """
+        output = self.formats[name]
+        target = self.path / f'{filename}.{output.extension}'
+        with Image.open(self.path / f'{filename}.{self.extension}') as image:
+            output.save(image, target)
+        return target.stat().st_size
+
+    async def async_render(self, filename: str, name: str) -> int:
+        """
+        Parameters
+        ----------
+        filename : str
+            Stored image name
+        name: str
+            Output format name
+
+        Returns
+        -------
+        int
+            Rendition size in bytes
+        """
+        source = self.path / f'{filename}.{self.extension}'
+        return await self._shared((str(filename), name), source, partial(self.render, filename, name))
+
+    def build_tiles(self, filename: str) -> int:
+        """
+        Parameters
+        ----------
+        filename : str
+            Stored image name
+
+        Returns
+        -------
+        int
+            Number of saved tiles
+        """
+        with Image.open(self.path / f'{filename}.{self.extension}') as image:
+            return self.pyramid(image, filename)
+
+    async def async_tiles(self, filename: str) -> int:
+        """
+        Parameters
+        ----------
+        filename : str
+            Stored image name
+
+        Returns
+        -------
+        int
+            Number of saved tiles
         """
+        source = self.path / f'{filename}.{self.extension}'
+        return await self._shared((str(filename), TILES), source, partial(self.build_tiles, filename))
 
-        loop = asyncio.get_running_loop()
+    async def async_sprite(self, name: str, sources: List[Path], cell: int, path: Path, quality: int = None) -> Dict:
+        """
+        Parameters
+        ----------
+        name : str
+            Sprite name
+        sources : List[Path]
+            Paths to image files
+        cell : int
+            Cell side
+        path : Path
+            Path to output file
+        quality : int
+            Compression quality in %
+
+        Returns
+        -------
+        Dict
+            Sprite layout
+        """
+        return await self._shared((name, SPRITE), sources, partial(self.sprite, sources, cell, path, quality))
 
-        with concurrent.futures.ProcessPoolExecutor() as pool:
-            return await loop.run_in_executor(pool, partial(self.process, _bytes, filename, quality, x, y))
+    async def _shared(self, key: Tuple[str, str], source: Union[Path, List[Path]], function: Callable):
+        task = self._renders.get(key)
+        if task is None:
+            loop = asyncio.get_running_loop()
+            task = self._renders[key] = loop.run_in_executor(self.executor_for(source), function)
+            task.add_done_callback(lambda _: self._renders.pop(key, None))
+        return await asyncio.shield(task)
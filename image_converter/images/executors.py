@@ -0,0 +1,104 @@
+"""Converter executors
+
+This file provides executor backends for image converter and contains the following
+
+Constants:
+
+    * PROCESS - Process pool backend
+    * THREAD - Thread pool backend
+    * INLINE - Calling thread backend
+    * HYBRID - Thread pool for small images, process pool for large ones
+
+Classes:
+
+    * InlineExecutor
+
+Functions:
+
+    * create_executor(backend: str, workers: int) -> Executor
+    * encoder_pool() -> ThreadPoolExecutor
+"""
+
+import os
+import threading
+import concurrent.futures
+
+
+PROCESS = 'process'
+THREAD = 'thread'
+INLINE = 'inline'
+HYBRID = 'hybrid'
+BACKENDS = (PROCESS, THREAD, INLINE, HYBRID)
+
+_encoders = None
+_encoders_lock = threading.Lock()
+
+
+class InlineExecutor(concurrent.futures.Executor):
+    """
+    A class that represent executor running calls in calling thread
+
+    Calls block event loop, backend is intended for debugging and profiling
+    and for hosts where conversions are tiny
+
+    Methods
+    -------
+    submit(self, fn, *args, **kwargs) -> Future
+        Run call and return completed future
+    """
+    def __init__(self):
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs) -> concurrent.futures.Future:
+        if self._shutdown:
+            raise RuntimeError('cannot schedule new futures after shutdown')
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._shutdown = True
+
+
+def create_executor(backend: str, workers: int) -> concurrent.futures.Executor:
+    """Create executor for single backend
+
+    Parameters
+    ----------
+    backend : str
+        process, thread or inline
+    workers : int
+        Pool size
+
+    Returns
+    -------
+    Executor
+        Executor instance
+    """
+    if backend == PROCESS:
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    if backend == THREAD:
+        return concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='converter')
+    if backend == INLINE:
+        return InlineExecutor()
+    raise ValueError(backend)
+
+
+def encoder_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Thread pool of current process for parallel encoding inside conversion,
+    Pillow releases GIL while encoding
+
+    Returns
+    -------
+    ThreadPoolExecutor
+        Shared per process thread pool
+    """
+    global _encoders
+    with _encoders_lock:
+        if _encoders is None:
+            _encoders = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count(),
+                                                              thread_name_prefix='encoder')
+    return _encoders
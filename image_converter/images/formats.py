@@ -0,0 +1,151 @@
+"""Image output formats
+
+This file provides output format plugins for image converter and contains the following
+
+Classes:
+
+    * OutputFormat
+
+Functions:
+
+    * write_file(path: Path, data: bytes) -> None
+    * load_formats(settings: Dict) -> Dict[str, OutputFormat]
+"""
+
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict
+
+from PIL import Image
+
+
+class OutputFormat:
+    """
+    A class that represent image output format
+
+    Attributes
+    ----------
+    name : str
+        Format name used in requests
+    format : str
+        PIL format name
+    extension : str
+        File extension
+    mimetype : str
+        Format mimetype
+    options : Dict
+        Additional encoder options
+
+    Methods
+    -------
+    available(self) -> bool
+        Check PIL can encode format
+    encode(self, image: Image, quality: int = None) -> bytes
+        Encode image in format
+    save(self, image: Image, path: Path, quality: int = None) -> None
+        Save image file in format
+    """
+    def __init__(self, name: str, format: str, extension: str, mimetype: str, **options):
+        self.name = name
+        self.format = format
+        self.extension = extension
+        self.mimetype = mimetype
+        self.options = options
+
+    def available(self) -> bool:
+        """Check PIL can encode format
+
+        Returns
+        -------
+        bool
+            True if encoder plugin registered
+        """
+        Image.init()
+        return self.format in Image.SAVE
+
+    def encode(self, image: Image, quality: int = None) -> bytes:
+        """Encode image in format
+
+        Parameters
+        ----------
+        image : Image
+            PIL.Image
+        quality : int
+            Compression quality in %
+
+        Returns
+        -------
+        bytes
+            Encoded image
+        """
+        options = dict(self.options)
+        if quality:
+            options.update(quality=quality, optimize=True)
+        with BytesIO() as buf:
+            image.save(buf, format=self.format, **options)
+            return buf.getvalue()
+
+    def save(self, image: Image, path: Path, quality: int = None) -> None:
+        """Save image file in format
+
+        Parameters
+        ----------
+        image : Image
+            PIL.Image
+        path : Path
+            Path to output file
+        quality : int
+            Compression quality in %
+        """
+        write_file(path, self.encode(image, quality))
+
+
+def write_file(path: Path, data: bytes) -> None:
+    """Write file through temporary file so readers never see partial data,
+    each writer has its own temporary file, so concurrent writers of the same
+    path never mix their data
+
+    Parameters
+    ----------
+    path : Path
+        Path to output file
+    data : bytes
+        File content
+    """
+    fd, tmp = tempfile.mkstemp(prefix=f'{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def load_formats(settings: Dict) -> Dict[str, OutputFormat]:
+    """Create output formats from settings
+
+    Parameters
+    ----------
+    settings : Dict
+        Project settings
+
+    Returns
+    -------
+    Dict[str, OutputFormat]
+        Available formats by name, primary format first
+    """
+    images = settings['images']
+    primary = OutputFormat(images['extension'], images['format'], images['extension'], images['mimetype'])
+    formats = {primary.name: primary}
+    for name, params in (images.get('renditions') or {}).items():
+        output = OutputFormat(name, **params)
+        if output.available():
+            formats[name] = output
+    return formats
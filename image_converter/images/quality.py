@@ -0,0 +1,165 @@
+"""Perceptual quality
+
+This file provides quality targeted encoding for image converter and contains the following
+
+Functions:
+
+    * available() -> bool
+    * luma(image: Image, size: int) -> ndarray
+    * ssim(reference: ndarray, distorted: ndarray, window: int = 8) -> float
+    * search_quality(encode: Callable[[int], bytes],
+                     score: Callable[[bytes], float],
+                     target_ssim: Optional[float],
+                     max_bytes: Optional[int],
+                     low: int,
+                     high: int,
+                     trials: int) -> Tuple[int, bytes]
+
+numpy is optional and is imported on first use, only SSIM target requires it
+"""
+
+import math
+import importlib.util
+from typing import Callable, Dict, Optional, Tuple
+
+
+C1 = (.01 * 255) ** 2
+C2 = (.03 * 255) ** 2
+
+
+def available() -> bool:
+    """
+    Returns
+    -------
+    bool
+        True if numpy is installed and SSIM can be computed
+    """
+    return importlib.util.find_spec('numpy') is not None
+
+
+def luma(image, size: int):
+    """Luma plane downsampled by integer factor so its larger side fits size
+
+    Parameters
+    ----------
+    image : Image
+        PIL.Image
+    size : int
+        Maximal larger side
+
+    Returns
+    -------
+    ndarray
+        Luma values as float array
+    """
+    import numpy
+
+    gray = image.convert('L')
+    factor = math.ceil(max(gray.size) / size)
+    if factor > 1:
+        gray = gray.reduce(factor)
+    return numpy.asarray(gray, dtype=numpy.float64)
+
+
+def ssim(reference, distorted, window: int = 8) -> float:
+    """Mean structural similarity over sliding square windows, window means
+    are computed at once from summed area tables
+
+    Parameters
+    ----------
+    reference : ndarray
+        Reference luma plane
+    distorted : ndarray
+        Distorted luma plane of the same shape
+    window : int
+        Window side
+
+    Returns
+    -------
+    float
+        SSIM, 1 for identical planes
+    """
+    import numpy
+
+    window = max(1, min(window, *reference.shape))
+
+    def mean(plane):
+        table = numpy.pad(plane, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+        return (table[window:, window:] - table[:-window, window:]
+                - table[window:, :-window] + table[:-window, :-window]) / window ** 2
+
+    mu_r, mu_d = mean(reference), mean(distorted)
+    var_r = mean(reference * reference) - mu_r * mu_r
+    var_d = mean(distorted * distorted) - mu_d * mu_d
+    covariance = mean(reference * distorted) - mu_r * mu_d
+    similarity = (((2 * mu_r * mu_d + C1) * (2 * covariance + C2))
+                  / ((mu_r * mu_r + mu_d * mu_d + C1) * (var_r + var_d + C2)))
+    return float(similarity.mean())
+
+
+def search_quality(encode: Callable[[int], bytes],
+                   score: Callable[[bytes], float],
+                   target_ssim: Optional[float],
+                   max_bytes: Optional[int],
+                   low: int,
+                   high: int,
+                   trials: int) -> Tuple[int, bytes]:
+    """Binary search of encoder quality
+
+    Lowest quality reaching target SSIM is searched first, then highest
+    lower quality fitting max bytes if it does not fit. Each search stops
+    after trials encodes and uses its safe bound, which is encoded once
+    more if it was not tried
+
+    Parameters
+    ----------
+    encode : Callable[[int], bytes]
+        Encoder of image with quality
+    score : Callable[[bytes], float]
+        SSIM of encoded image
+    target_ssim : float
+        Optional minimal SSIM
+    max_bytes : int
+        Optional maximal encoded size
+    low : int
+        Minimal quality
+    high : int
+        Maximal quality
+    trials : int
+        Maximal number of trial encodes of each search
+
+    Returns
+    -------
+    Tuple[int, bytes]
+        Chosen quality and encoded image
+    """
+    encoded: Dict[int, bytes] = {}
+
+    def trial(quality: int) -> bytes:
+        if quality not in encoded:
+            encoded[quality] = encode(quality)
+        return encoded[quality]
+
+    best = high
+    if target_ssim is not None:
+        lower, upper = low, high
+        while lower < upper and len(encoded) < trials:
+            middle = (lower + upper) // 2
+            if score(trial(middle)) >= target_ssim:
+                upper = middle
+            else:
+                lower = middle + 1
+        best = upper
+
+    if max_bytes is not None and len(trial(best)) > max_bytes:
+        lower, upper = low, best - 1
+        tried = len(encoded)
+        while lower < upper and len(encoded) - tried < trials:
+            middle = (lower + upper + 1) // 2
+            if len(trial(middle)) <= max_bytes:
+                lower = middle
+            else:
+                upper = middle - 1
+        best = lower
+
+    return best, trial(best)
@@ -11,16 +11,39 @@ from aiohttp.web import Application, run_app
 # from image_converter.policy import setup_policies
 from image_converter.settings import config
 from image_converter.backend.routes import setup_routes
+from image_converter.images import converter_context
 from image_converter.images.converter import ImageConverter
-from image_converter.backend.db import context
+from image_converter.backend.db import context, session_middleware
+from image_converter.backend.db.batcher import batcher_context
+from image_converter.backend.limits import limits_context
+from image_converter.backend.jobs import jobs_context
+from image_converter.backend.cache import cache_context
+from image_converter.backend.reconciler import reconciler_context
+from image_converter.backend.profiles import profiles_context
+from image_converter.backend.uploads import uploads_context
+from image_converter.backend.tailer import tailer_context, close_tailer
+from image_converter.backend.sprites import sprites_context
+from image_converter.backend.watchdog import watchdog_context
 from image_converter.logger import setup_logging
 
 # setup_policies()
-app = Application()
+app = Application(middlewares=[session_middleware])
 setup_routes(app)
 setup_logging()
 
 app.cleanup_ctx.append(context)
+app.cleanup_ctx.append(batcher_context)
+app.cleanup_ctx.append(converter_context)
+app.cleanup_ctx.append(limits_context)
+app.cleanup_ctx.append(cache_context)
+app.cleanup_ctx.append(jobs_context)
+app.cleanup_ctx.append(reconciler_context)
+app.cleanup_ctx.append(profiles_context)
+app.cleanup_ctx.append(uploads_context)
+app.cleanup_ctx.append(tailer_context)
+app.cleanup_ctx.append(sprites_context)
+app.cleanup_ctx.append(watchdog_context)
+app.on_shutdown.append(close_tailer)
 app['settings'] = {k: v for k, v in config.items()}
 app['Converter'] = ImageConverter(app['settings'])
 
@@ -0,0 +1,264 @@
+"""Setup metrics
+
+This file provides in-process metrics registry and contains:
+    Constants:
+        * DEFAULT_BUCKETS - Default histogram buckets in seconds
+
+    Classes:
+
+        * Counter
+            Monotonically increasing value
+        * Gauge
+            Value that can go up and down
+        * Histogram
+            Distribution of observed values
+        * Registry
+            Collection of metrics rendered in Prometheus text format
+
+    Variables:
+
+        * metrics - Registry of project metrics
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Tuple, List
+
+
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+
+def _labels_key(labels: Dict) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Tuple, extra: Tuple = ()) -> str:
+    items = key + extra
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+
+class Counter:
+    """
+    A class that represent monotonically increasing metric
+
+    Attributes
+    ----------
+    name : str
+        Metric name
+    description : str
+        Metric help string
+
+    Methods
+    -------
+    inc(self, amount: float = 1, **labels) -> None
+        Increase metric value
+    render(self) -> List[str]
+        Metric lines in text format
+    """
+    kind = 'counter'
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase metric value
+
+        Parameters
+        ----------
+        amount : float
+            Increment
+        labels : Dict
+            Metric labels
+        """
+        key = _labels_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Get current metric value
+
+        Parameters
+        ----------
+        labels : Dict
+            Metric labels
+
+        Returns
+        -------
+        float
+            Current value
+        """
+        return self._values.get(_labels_key(labels), 0)
+
+    def render(self) -> List[str]:
+        """Metric lines in text format
+
+        Returns
+        -------
+        List[str]
+            Rendered lines
+        """
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(key)} {value}' for key, value in values]
+
+
+class Gauge(Counter):
+    """
+    A class that represent metric which value can go up and down
+
+    Methods
+    -------
+    set(self, value: float, **labels) -> None
+        Set metric value
+    dec(self, amount: float = 1, **labels) -> None
+        Decrease metric value
+    """
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        """Set metric value
+
+        Parameters
+        ----------
+        value : float
+            New value
+        labels : Dict
+            Metric labels
+        """
+        with self._lock:
+            self._values[_labels_key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrease metric value
+
+        Parameters
+        ----------
+        amount : float
+            Decrement
+        labels : Dict
+            Metric labels
+        """
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """
+    A class that represent distribution of observed values
+
+    Attributes
+    ----------
+    name : str
+        Metric name
+    description : str
+        Metric help string
+    buckets : Tuple
+        Upper bounds of buckets
+
+    Methods
+    -------
+    observe(self, value: float, **labels) -> None
+        Add observation
+    render(self) -> List[str]
+        Metric lines in text format
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, buckets: Tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """Add observation
+
+        Parameters
+        ----------
+        value : float
+            Observed value
+        labels : Dict
+            Metric labels
+        """
+        key = _labels_key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self) -> List[str]:
+        """Metric lines in text format
+
+        Returns
+        -------
+        List[str]
+            Rendered lines
+        """
+        lines = []
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(key, (("le", bound),))} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    """
+    A class that represent collection of project metrics
+
+    Methods
+    -------
+    counter(self, name: str, description: str) -> Counter
+        Get or create counter
+    gauge(self, name: str, description: str) -> Gauge
+        Get or create gauge
+    histogram(self, name: str, description: str, buckets: Tuple = DEFAULT_BUCKETS) -> Histogram
+        Get or create histogram
+    render(self) -> str
+        All metrics in Prometheus text format
+    """
+    def __init__(self):
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name: str, *args):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args)
+        return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str, buckets: Tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, buckets)
+
+    def render(self) -> str:
+        """All metrics in Prometheus text format
+
+        Returns
+        -------
+        str
+            Rendered metrics
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.description}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Registry()
@@ -0,0 +1,134 @@
+"""Setup profiling
+
+This file provides opt-in profiling of code blocks and contains:
+    Constants:
+        * CPU - cProfile profiling mode
+        * MEMORY - tracemalloc profiling mode
+        * EXTENSIONS - Stored profile extension by mode
+
+    Classes:
+
+        * Profile
+            Profile of code block in cpu or memory mode
+"""
+
+import marshal
+import cProfile
+import threading
+import tracemalloc
+
+
+CPU = 'cpu'
+MEMORY = 'memory'
+EXTENSIONS = {CPU: 'prof', MEMORY: 'txt'}
+
+_lock = threading.Lock()
+_tracing = 0
+_local = threading.local()
+
+
+class Profile:
+    """
+    A class that represent profile of code block
+
+    Cpu profile is stored in pstats format and can be loaded with
+    pstats.Stats(path), memory profile is a text top of allocations
+    made between start and stop.
+
+    Attributes
+    ----------
+    mode : str
+        cpu or memory
+    limit : int
+        Number of memory statistics lines
+
+    Methods
+    -------
+    available(mode: str) -> bool
+        Check profile can be started in current thread
+    start(self) -> None
+        Start profiling
+    stop(self) -> None
+        Stop profiling
+    dump(self) -> bytes
+        Serialized profile
+    """
+    def __init__(self, mode: str, limit: int = 50):
+        if mode not in EXTENSIONS:
+            raise ValueError(mode)
+        self.mode = mode
+        self.limit = limit
+        self._profile = None
+        self._snapshot = None
+        self._result = b''
+
+    @staticmethod
+    def available(mode: str) -> bool:
+        """Check profile can be started in current thread, only one cpu profile
+        can be active per thread
+
+        Parameters
+        ----------
+        mode : str
+            cpu or memory
+
+        Returns
+        -------
+        bool
+            True if profile can be started
+        """
+        return mode != CPU or not getattr(_local, 'active', False)
+
+    def start(self) -> None:
+        """Start profiling
+        """
+        global _tracing
+        if self.mode == CPU:
+            if not self.available(CPU):
+                raise RuntimeError('cpu profile already active in thread')
+            _local.active = True
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            with _lock:
+                if not _tracing:
+                    tracemalloc.start()
+                _tracing += 1
+            self._snapshot = tracemalloc.take_snapshot()
+
+    def stop(self) -> None:
+        """Stop profiling
+        """
+        global _tracing
+        if self.mode == CPU:
+            self._profile.disable()
+            _local.active = False
+            self._profile.create_stats()
+            self._result = marshal.dumps(self._profile.stats)
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            with _lock:
+                _tracing -= 1
+                if not _tracing:
+                    tracemalloc.stop()
+            lines = [f'current: {current} B, peak: {peak} B']
+            lines.extend(str(stat) for stat in snapshot.compare_to(self._snapshot, 'lineno')[:self.limit])
+            self._result = '\n'.join(lines).encode()
+
+    def dump(self) -> bytes:
+        """Serialized profile
+
+        Returns
+        -------
+        bytes
+            pstats data for cpu mode or text for memory mode
+        """
+        return self._result
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,261 @@
+"""Conversion worker
+
+This file provides standalone conversion worker which runs queued conversion
+jobs on any number of hosts and contains the following
+
+Classes:
+
+    * Worker
+
+Coroutines:
+
+    * run_worker() -> None
+
+Functions:
+
+    * main() -> None
+"""
+
+import os
+import signal
+import socket
+import asyncio
+import logging
+from typing import Dict
+
+import asyncpg
+from sqlalchemy.engine import RowMapping
+
+from image_converter.settings import config
+from image_converter.logger import setup_logging
+from image_converter.deadlines import DeadlineExceeded, check
+from image_converter.images.converter import ImageConverter
+from image_converter.backend.db.settings import ENGINE, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
+from image_converter.backend.views.helpers import make_log
+from image_converter.backend.jobs import JobQueue
+
+
+class Worker:
+    """
+    A class that represent conversion worker
+
+    Worker leases jobs while it has free slots, it is woken up by
+    notification on new job and polls queue to pick up retries and jobs
+    of crashed workers
+
+    Attributes
+    ----------
+    converter : ImageConverter
+        Converter for image processing
+    queue : JobQueue
+        Conversion jobs queue
+    name : str
+        Worker name, host and process id
+    concurrency : int
+        Number of jobs converted at once
+    heartbeat : float
+        Seconds between lease extensions
+    poll : float
+        Seconds between queue polls without notifications
+    logger : Logger
+        Instance for logger
+
+    Methods
+    -------
+    notify(self, *args) -> None
+        Wake up worker
+    stop(self) -> None
+        Stop claiming jobs
+    process(self, job: RowMapping) -> None
+        Convert job image and store result
+    run(self) -> None
+        Run worker until stopped
+    """
+    def __init__(self, converter: ImageConverter, queue: JobQueue, settings: Dict, logger: logging.Logger):
+        self.converter = converter
+        self.queue = queue
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.concurrency = settings['concurrency'] or converter.workers
+        self.heartbeat = settings['heartbeat']
+        self.poll = settings['poll']
+        self.logger = logger
+        self.extra = {'route': 'worker', 'functionName': self.name}
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = set()
+
+    def notify(self, *args) -> None:
+        """Wake up worker, called on notification and finished job
+        """
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        """Stop claiming jobs, running jobs are finished
+        """
+        self._stopping = True
+        self._wakeup.set()
+
+    async def _listen(self):
+        try:
+            connection = await asyncpg.connect(user=DB_USER, password=str(DB_PASSWORD),
+                                               host=DB_HOST, port=DB_PORT, database=DB_NAME)
+            await connection.add_listener(self.queue.channel, self.notify)
+        except Exception as e:
+            make_log(self.logger,
+                     'warning',
+                     f'Notifications unavailable, polling queue: {e.__class__.__name__}',
+                     self.extra)
+            return None
+        return connection
+
+    async def _extend(self, job: RowMapping, task: asyncio.Task) -> bool:
+        """Extend job lease until cancelled, converting task is cancelled when
+        lease is lost or expires before next extension because extensions fail
+
+        Returns
+        -------
+        bool
+            True if converting task was cancelled
+        """
+        loop = asyncio.get_running_loop()
+        visibility = self.queue.visibility.total_seconds()
+        expires = loop.time() + visibility
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            started = loop.time()
+            try:
+                extended = await self.queue.extend(job, self.name)
+            except Exception as e:
+                make_log(self.logger, 'warning', f'Throws exception while extending lease: {e.__class__.__name__}',
+                         self.extra)
+                if loop.time() + self.heartbeat < expires:
+                    continue
+                make_log(self.logger, 'warning', f'Lease of job {job["job_id"]} expires, conversion stopped',
+                         self.extra)
+                task.cancel()
+                return True
+            if not extended:
+                make_log(self.logger, 'warning', f'Lease of job {job["job_id"]} lost, conversion stopped', self.extra)
+                task.cancel()
+                return True
+            expires = started + visibility
+
+    async def process(self, job: RowMapping) -> None:
+        """Convert job image and store result, failed job is retried or buried
+
+        Job with passed client deadline is buried without conversion, conversion
+        is stopped when deadline passes or when job lease is lost, so worker
+        that lost its job does not write files of job claimed again
+
+        Parameters
+        ----------
+        job : RowMapping
+            Claimed job
+        """
+        loop = asyncio.get_running_loop()
+        params = job['params']
+        if job['attempts'] > job['max_attempts']:
+            if await self.queue.fail(job, self.name, 'lease expired'):
+                await loop.run_in_executor(None, self.queue.remove_source, job)
+            make_log(self.logger, 'error', f'Job {job["job_id"]} is dead: lease expired', self.extra)
+            return
+        try:
+            check(params.get('deadline'), 'start')
+        except DeadlineExceeded:
+            if await self.queue.fail(job, self.name, 'deadline exceeded', retry=False):
+                await loop.run_in_executor(None, self.queue.remove_source, job)
+            make_log(self.logger, 'warning', f'Job {job["job_id"]} dropped: deadline exceeded', self.extra)
+            return
+
+        heartbeat = asyncio.ensure_future(self._extend(job, asyncio.current_task()))
+        try:
+            metadata = await self.converter.async_image_process(self.queue.source(job),
+                                                                job['image_id'],
+                                                                params.get('quality'),
+                                                                params.get('x'),
+                                                                params.get('y'),
+                                                                widths=params.get('widths'),
+                                                                deadline=params.get('deadline'),
+                                                                target=params.get('target'))
+            metadata.pop('passthrough', None)
+            completed = await self.queue.complete(job, self.name, metadata)
+        except asyncio.CancelledError:
+            if not (heartbeat.done() and not heartbeat.cancelled() and heartbeat.result()):
+                raise
+            return
+        except Exception as e:
+            dead = await self.queue.fail(job, self.name, f'{e.__class__.__name__}: {e}',
+                                         retry=not isinstance(e, DeadlineExceeded))
+            make_log(self.logger,
+                     'error' if dead else 'warning',
+                     f'Job {job["job_id"]} attempt {job["attempts"]} failed: {e.__class__.__name__}',
+                     self.extra)
+            if dead:
+                await loop.run_in_executor(None, self.queue.remove_source, job)
+        else:
+            if not completed:
+                make_log(self.logger, 'warning', f'Job {job["job_id"]} result discarded: lease lost', self.extra)
+                return
+            await loop.run_in_executor(None, self.queue.remove_source, job)
+            make_log(self.logger, 'debug', f'Job {job["job_id"]} done', self.extra)
+        finally:
+            heartbeat.cancel()
+
+    async def run(self) -> None:
+        """Run worker until stopped
+        """
+        listener = await self._listen()
+        self.converter.start()
+        make_log(self.logger, 'info', f'Worker started with {self.concurrency} slots', self.extra)
+        try:
+            while not self._stopping:
+                self._wakeup.clear()
+                while len(self._tasks) < self.concurrency and not self._stopping:
+                    try:
+                        job = await self.queue.claim(self.name)
+                    except Exception as e:
+                        make_log(self.logger, 'error', f'Throws exception while claiming: {e.__class__.__name__}',
+                                 self.extra)
+                        break
+                    if job is None:
+                        break
+                    task = asyncio.ensure_future(self.process(job))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                    task.add_done_callback(self.notify)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            if listener is not None:
+                await listener.close()
+            self.converter.shutdown()
+            make_log(self.logger, 'info', 'Worker stopped', self.extra)
+
+
+async def run_worker() -> None:
+    """Run worker with project settings, SIGINT and SIGTERM stop it gracefully
+    """
+    settings = {k: v for k, v in config.items()}
+    queue = JobQueue(ENGINE, settings['project_root'] / settings['jobs']['path'], settings['jobs'])
+    worker = Worker(ImageConverter(settings), queue, settings['jobs'], logging.getLogger(config['project']['name']))
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except (NotImplementedError, AttributeError):
+            pass
+    try:
+        await worker.run()
+    finally:
+        await ENGINE.dispose()
+
+
+def main() -> None:
+    """Worker entrypoint
+    """
+    setup_logging()
+    asyncio.run(run_worker())
@@ -0,0 +1,163 @@
+"""Converter executor calibration
+
+Converts synthetic images of growing size on thread and process pools of
+configured size, finds the input size above which process pool is faster on
+current host and writes it to hybrid executor thresholds in settings.yaml.
+Thresholds are null if thread pool is faster even for the largest sample,
+so hybrid executor never sends images to process pool then
+
+    Example:
+
+        python ./scripts/calibrate_executor.py --rounds 4 --backend hybrid
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+from PIL import Image
+
+sys.path.append(str(Path(__file__).parents[1]))
+
+from image_converter.settings import CONFIG_PATH, ENCODING, get_config
+from image_converter.images.converter import ImageConverter
+from image_converter.images.executors import BACKENDS, PROCESS, THREAD
+
+
+SIDES = (64, 128, 256, 512, 1024, 2048, 3072, 4096)
+
+
+def create_sample(side: int) -> bytes:
+    """Noise PNG image, PNG input is always decoded and re-encoded
+
+    Parameters
+    ----------
+    side : int
+        Image width and height
+
+    Returns
+    -------
+    bytes
+        Encoded image
+    """
+    image = Image.merge('RGB', [Image.effect_noise((side, side), 64 + 32 * i) for i in range(3)])
+    with BytesIO() as buf:
+        image.save(buf, format='PNG')
+        return buf.getvalue()
+
+
+def measure(converter: ImageConverter, backend: str, sample: bytes, count: int) -> float:
+    """Seconds per conversion with all pool workers busy
+
+    Parameters
+    ----------
+    converter : ImageConverter
+        Converter instance
+    backend : str
+        Executor backend
+    sample : bytes
+        Encoded image
+    count : int
+        Number of conversions
+
+    Returns
+    -------
+    float
+        Wall time per conversion
+    """
+    executor = converter._pools[backend]
+    list(executor.map(converter.process, [sample] * converter.workers,
+                      [f'warmup{i}' for i in range(converter.workers)]))
+    start = time.perf_counter()
+    list(executor.map(converter.process, [sample] * count, [f'sample{i}' for i in range(count)]))
+    return (time.perf_counter() - start) / count
+
+
+def calibrate(settings: Dict, rounds: int) -> List[Tuple[int, int, float, float]]:
+    """Measure thread and process pools on samples of growing size
+
+    Parameters
+    ----------
+    settings : Dict
+        Project settings
+    rounds : int
+        Conversions per worker for each sample
+
+    Returns
+    -------
+    List[Tuple[int, int, float, float]]
+        Input bytes, pixels, thread and process seconds per conversion
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as path:
+        settings = dict(settings, images_path=Path(path), executor=dict(settings['executor'], backend='hybrid'))
+        converter = ImageConverter(settings)
+        converter.start()
+        try:
+            for side in SIDES:
+                sample = create_sample(side)
+                count = converter.workers * rounds
+                thread = measure(converter, THREAD, sample, count)
+                process = measure(converter, PROCESS, sample, count)
+                print(f'{side:>5}px {len(sample):>10} B   thread {thread * 1000:9.2f} ms   '
+                      f'process {process * 1000:9.2f} ms')
+                results.append((len(sample), side * side, thread, process))
+        finally:
+            converter.shutdown()
+    return results
+
+
+def crossover(results: List[Tuple[int, int, float, float]]) -> Tuple[Optional[int], Optional[int]]:
+    """Largest sample after which process pool is faster for all larger samples
+
+    Parameters
+    ----------
+    results : List[Tuple[int, int, float, float]]
+        Calibration results ordered by size
+
+    Returns
+    -------
+    Tuple[Optional[int], Optional[int]]
+        Thresholds in bytes and pixels, None if thread pool is faster for largest
+        sample, so no image is sent to process pool without measurement supporting it
+    """
+    index = len(results)
+    while index and results[index - 1][3] < results[index - 1][2]:
+        index -= 1
+    if index == len(results):
+        return None, None
+    return (results[index - 1][0], results[index - 1][1]) if index else (0, 0)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Calibrate hybrid converter executor')
+    parser.add_argument('--rounds', type=int, default=4, help='Conversions per worker for each sample')
+    parser.add_argument('--backend', choices=BACKENDS, default=None, help='Also set executor backend')
+    parser.add_argument('--dry-run', action='store_true', help='Print thresholds without writing settings')
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]):
+    args = parse_args(argv)
+    threshold_bytes, threshold_pixels = crossover(calibrate(get_config(CONFIG_PATH), args.rounds))
+    print(f'threshold_bytes: {threshold_bytes}, threshold_pixels: {threshold_pixels}')
+    if args.dry_run:
+        return
+
+    with open(CONFIG_PATH, encoding=ENCODING) as fp:
+        settings = yaml.safe_load(fp)
+    settings['executor']['threshold_bytes'] = threshold_bytes
+    settings['executor']['threshold_pixels'] = threshold_pixels
+    if args.backend:
+        settings['executor']['backend'] = args.backend
+    with open(CONFIG_PATH, 'w', encoding=ENCODING) as fp:
+        yaml.safe_dump(settings, fp, sort_keys=False, allow_unicode=True)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,79 @@
+"""Images export
+
+Writes tar archive of converted images and NDJSON manifest of their rows,
+the same archive as export endpoint streams. With cursor file only images
+created after previous export are written and cursor file is updated when
+archive is complete, so nightly backup moves only new data
+
+    Example:
+
+        python ./scripts/export_images.py full.tar
+        python ./scripts/export_images.py nightly-$(date +%F).tar --cursor-file backup.cursor
+        python ./scripts/export_images.py - --since <cursor> > increment.tar
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parents[1]))
+
+from image_converter.settings import config
+from image_converter.backend.db.settings import ENGINE, ASYNC_SESSION
+from image_converter.backend.export import ExportStream
+from image_converter.backend.views.image.logic.list.helpers import decode_cursor
+
+
+async def export(args: argparse.Namespace) -> None:
+    """Write archive and store next cursor
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Command line arguments
+    """
+    encoding = config['project']['encoding']
+    since = args.since
+    if since is None and args.cursor_file is not None and args.cursor_file.is_file():
+        since = args.cursor_file.read_text(encoding=encoding).strip() or None
+
+    output = sys.stdout.buffer if str(args.archive) == '-' else open(f'{args.archive}.part', 'wb')
+    try:
+        async with ASYNC_SESSION() as session:
+            async with session.begin():
+                stream = ExportStream(session,
+                                      config['images_path'],
+                                      config['images']['extension'],
+                                      decode_cursor(since) if since else None,
+                                      config['export']['chunk'],
+                                      config['export']['settle'])
+                async for data in stream.chunks():
+                    output.write(data)
+        output.flush()
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    if output is not sys.stdout.buffer:
+        os.replace(f'{args.archive}.part', args.archive)
+    if args.cursor_file is not None and stream.cursor:
+        args.cursor_file.write_text(stream.cursor, encoding=encoding)
+    print(f'Exported {stream.images} images, next cursor {stream.cursor}', file=sys.stderr)
+    await ENGINE.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run export
+    """
+    parser = argparse.ArgumentParser(description='Export images and their rows as tar archive')
+    parser.add_argument('archive', type=Path, help='Output archive, - for stdout')
+    parser.add_argument('--since', help='Cursor of previous export')
+    parser.add_argument('--cursor-file', type=Path, help='File with cursor of previous export, updated after export')
+    args = parser.parse_args()
+    # https://stackoverflow.com/questions/65682221/runtimeerror-exception-ignored-in-function-proactorbasepipetransport
+    asyncio.get_event_loop().run_until_complete(export(args))
+
+
+if __name__ == '__main__':
+    main()
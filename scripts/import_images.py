@@ -0,0 +1,302 @@
+"""Bulk images import
+
+Walks directory tree or reads manifest of file paths, converts files in
+parallel on converter pools without HTTP and inserts converted images by
+batches with multi-row INSERT. Paths of inserted images are appended to
+checkpoint file after each batch commit, so interrupted import started
+again skips them. Image id is derived from file path and files of existing
+rows are not converted again, so import run again without checkpoint or
+with other quality neither duplicates rows nor overwrites stored files
+
+    Example:
+
+        python ./scripts/import_images.py ./archive --owner <user id> --checkpoint archive.done
+        python ./scripts/import_images.py --manifest files.txt --batch 1000 --concurrency 16
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import itertools
+import argparse
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+sys.path.append(str(Path(__file__).parents[1]))
+
+from image_converter.settings import config
+from image_converter.images.converter import ImageConverter
+from image_converter.backend.db.settings import ENGINE
+from image_converter.backend.models import Image, Status
+
+
+EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.tif', '.tiff')
+KEY = Image.__mapper__.primary_key[0]
+
+
+def walk(root: Path, extensions: Tuple[str, ...]) -> Iterator[Path]:
+    """Image files of directory tree in stable order
+
+    Parameters
+    ----------
+    root : Path
+        Directory
+    extensions : Tuple[str, ...]
+        Lowercase extensions of imported files
+
+    Yields
+    ------
+    Path
+        Absolute path to image file
+    """
+    for folder, folders, files in os.walk(root):
+        folders.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in extensions:
+                yield Path(folder, name).resolve()
+
+
+def read_manifest(path: Path) -> Iterator[Path]:
+    """File paths listed in manifest, one per line
+
+    Parameters
+    ----------
+    path : Path
+        Manifest file
+
+    Yields
+    ------
+    Path
+        Absolute path to image file
+    """
+    with open(path, encoding=config['project']['encoding']) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield Path(line).resolve()
+
+
+def read_checkpoint(path: Path) -> Set[str]:
+    """Paths of images imported before
+
+    Parameters
+    ----------
+    path : Path
+        Checkpoint file
+
+    Returns
+    -------
+    Set[str]
+        Imported paths
+    """
+    if not path.is_file():
+        return set()
+    with open(path, encoding=config['project']['encoding']) as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+def image_id(path: Path) -> uuid.UUID:
+    """
+    Parameters
+    ----------
+    path : Path
+        Absolute path to image file
+
+    Returns
+    -------
+    UUID
+        Image id, the same for the same path
+    """
+    return uuid.uuid5(uuid.NAMESPACE_URL, path.as_uri())
+
+
+async def convert(converter: ImageConverter,
+                  path: Path,
+                  owner: Optional[uuid.UUID],
+                  quality: Optional[int],
+                  widths: Optional[List[int]]) -> Tuple[Path, Optional[Dict]]:
+    """Convert image file and make its row, all rows have the same keys for multi-row INSERT
+
+    Parameters
+    ----------
+    converter : ImageConverter
+        Converter instance
+    path : Path
+        Absolute path to image file
+    owner : UUID
+        Optional owner id
+    quality : int
+        Optional compression quality in %
+    widths : List[int]
+        Optional widths of downscaled renditions
+
+    Returns
+    -------
+    Tuple[Path, Optional[Dict]]
+        Path and row values or None if conversion failed
+    """
+    _id = image_id(path)
+    try:
+        metadata = await converter.async_image_process(path, _id, quality, widths=widths)
+    except Exception as e:
+        print(f'{path}: {e.__class__.__name__}: {e}', file=sys.stderr)
+        return path, None
+    metadata.pop('passthrough', None)
+    row = {KEY.key: _id, 'owner_id': owner, 'status': Status.READY,
+           'frames': 1, 'renditions': None, 'placeholder': None, 'quality': None}
+    row.update(metadata)
+    return path, row
+
+
+async def existing_ids(ids: List[uuid.UUID]) -> Set[uuid.UUID]:
+    """Ids of images which already have rows
+
+    Parameters
+    ----------
+    ids : List[UUID]
+        Image ids
+
+    Returns
+    -------
+    Set[UUID]
+        Existing ids
+    """
+    if not ids:
+        return set()
+    async with ENGINE.connect() as conn:
+        result = await conn.execute(select(KEY).where(KEY.in_(ids)))
+        return set(result.scalars())
+
+
+async def insert_batch(rows: List[Dict]) -> int:
+    """Insert rows with one multi-row INSERT, rows of already imported images are skipped
+
+    Parameters
+    ----------
+    rows : List[Dict]
+        Row values
+
+    Returns
+    -------
+    int
+        Number of inserted rows
+    """
+    async with ENGINE.begin() as conn:
+        result = await conn.execute(insert(Image.__table__).values(rows).on_conflict_do_nothing(index_elements=[KEY]))
+    return result.rowcount
+
+
+async def run_import(paths: Iterator[Path], args: argparse.Namespace) -> None:
+    """Convert files with bounded number of conversions in flight and insert them by batches,
+    files of images which already have rows are not converted, so their stored files keep matching rows
+
+    Parameters
+    ----------
+    paths : Iterator[Path]
+        Image files
+    args : argparse.Namespace
+        Command line arguments
+    """
+    settings = {k: v for k, v in config.items()}
+    converter = ImageConverter(settings)
+    converter.start()
+    concurrency = args.concurrency or converter.workers * 2
+    preset = args.preset if args.preset is not None else settings['images']['preset']
+    widths = (settings['images']['presets'] or {}).get(preset) if preset else None
+    owner = uuid.UUID(args.owner) if args.owner else None
+    done = read_checkpoint(args.checkpoint)
+
+    started = time.perf_counter()
+    imported = skipped = failed = 0
+    tasks = set()
+    rows: List[Dict] = []
+    batch_paths: List[str] = []
+
+    async def flush() -> None:
+        nonlocal imported
+        if not rows:
+            return
+        inserted = await insert_batch(rows)
+        checkpoint.write(''.join(f'{path}\n' for path in batch_paths))
+        checkpoint.flush()
+        os.fsync(checkpoint.fileno())
+        imported += inserted
+        rows.clear()
+        batch_paths.clear()
+        elapsed = time.perf_counter() - started
+        print(f'{imported} imported, {skipped} skipped, {failed} failed, {imported / elapsed:.1f} images/s')
+
+    async def collect(when: str) -> None:
+        nonlocal failed
+        finished, _ = await asyncio.wait(tasks, return_when=when)
+        for task in finished:
+            tasks.discard(task)
+            path, row = task.result()
+            if row is None:
+                failed += 1
+                continue
+            rows.append(row)
+            batch_paths.append(str(path))
+            if len(rows) >= args.batch:
+                await flush()
+
+    with open(args.checkpoint, 'a', encoding=config['project']['encoding']) as checkpoint:
+        try:
+            while True:
+                chunk = list(itertools.islice(paths, args.batch))
+                if not chunk:
+                    break
+                pending = [path for path in chunk if str(path) not in done]
+                known = await existing_ids([image_id(path) for path in pending])
+                skipped += len(chunk) - len(pending)
+                for path in pending:
+                    if image_id(path) in known:
+                        skipped += 1
+                        continue
+                    tasks.add(asyncio.ensure_future(convert(converter, path, owner, args.quality, widths)))
+                    if len(tasks) >= concurrency:
+                        await collect(asyncio.FIRST_COMPLETED)
+            if tasks:
+                await collect(asyncio.ALL_COMPLETED)
+            await flush()
+        finally:
+            for task in tasks:
+                task.cancel()
+            converter.shutdown()
+            await ENGINE.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run import
+    """
+    parser = argparse.ArgumentParser(description='Import image files converting them without HTTP')
+    parser.add_argument('root', type=Path, nargs='?', help='Directory with images')
+    parser.add_argument('--manifest', type=Path, help='File with image paths, one per line')
+    parser.add_argument('--owner', help='Owner user id of imported images')
+    parser.add_argument('--quality', type=int, help='Compression quality in %%')
+    parser.add_argument('--preset', help='Renditions preset, configured preset if not set')
+    parser.add_argument('--checkpoint', type=Path, default=Path('import.checkpoint'),
+                        help='File with imported paths')
+    parser.add_argument('--batch', type=int, default=500, help='Rows per INSERT')
+    parser.add_argument('--concurrency', type=int, help='Conversions in flight, twice converter workers if not set')
+    parser.add_argument('--extensions', default=','.join(EXTENSIONS),
+                        help='Comma separated extensions of imported files')
+    args = parser.parse_args()
+    if (args.root is None) == (args.manifest is None):
+        parser.error('either root directory or --manifest is required')
+
+    if args.manifest is not None:
+        paths = read_manifest(args.manifest)
+    else:
+        paths = walk(args.root, tuple(e.strip().lower() for e in args.extensions.split(',')))
+    # https://stackoverflow.com/questions/65682221/runtimeerror-exception-ignored-in-function-proactorbasepipetransport
+    asyncio.get_event_loop().run_until_complete(run_import(paths, args))
+
+
+if __name__ == '__main__':
+    main()
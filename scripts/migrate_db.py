@@ -0,0 +1,168 @@
+"""Database upgrade
+
+Upgrades database created before images metadata columns were added. Missing
+tables are created, missing columns and indexes of images table are added in
+one transaction. Existing images are added as ready, so they stay served and
+are not taken for crashed conversions by reconciler. Metadata of existing
+images is then read from their stored files by batches. Images without stored
+file are reported and left for reconciler. Script may be run again, it skips
+existing columns and filled rows. Application must be stopped while it runs
+
+    Example:
+
+        python ./scripts/migrate_db.py
+        python ./scripts/migrate_db.py --batch 1000 --threads 8
+"""
+
+import os
+import sys
+import hashlib
+import asyncio
+import argparse
+import concurrent.futures
+from io import BytesIO
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from PIL import Image as PILImage
+from sqlalchemy import select, update, bindparam, text
+
+sys.path.append(str(Path(__file__).parents[1]))
+
+from image_converter.settings import config
+from image_converter.backend.db.settings import ENGINE, BASE
+from image_converter.backend.models import Image, Status
+
+
+KEY = Image.__mapper__.primary_key[0]
+
+# Existing rows get default of column when it is added, status default is set to pending afterwards
+COLUMNS = f"""
+ALTER TABLE images
+    ADD COLUMN IF NOT EXISTS width INTEGER,
+    ADD COLUMN IF NOT EXISTS height INTEGER,
+    ADD COLUMN IF NOT EXISTS size BIGINT,
+    ADD COLUMN IF NOT EXISTS hash VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS frames INTEGER NOT NULL DEFAULT 1,
+    ADD COLUMN IF NOT EXISTS renditions JSONB,
+    ADD COLUMN IF NOT EXISTS placeholder TEXT,
+    ADD COLUMN IF NOT EXISTS quality INTEGER,
+    ADD COLUMN IF NOT EXISTS status VARCHAR(16) NOT NULL DEFAULT '{Status.READY}',
+    ADD COLUMN IF NOT EXISTS created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    ADD COLUMN IF NOT EXISTS owner_id UUID REFERENCES users (user_id) ON DELETE SET NULL
+"""
+STATUS_DEFAULT = f"ALTER TABLE images ALTER COLUMN status SET DEFAULT '{Status.PENDING}'"
+
+
+async def upgrade_schema() -> None:
+    """Create missing tables, add missing images columns and indexes
+    """
+    async with ENGINE.begin() as conn:
+        await conn.run_sync(BASE.metadata.create_all, BASE.metadata.tables.values(), checkfirst=True)
+        await conn.execute(text(COLUMNS))
+        await conn.execute(text(STATUS_DEFAULT))
+        for index in Image.__table__.indexes:
+            await conn.run_sync(index.create, checkfirst=True)
+
+
+def read_metadata(path: Path) -> Optional[Dict]:
+    """Metadata of stored image file
+
+    Parameters
+    ----------
+    path : Path
+        Stored image file
+
+    Returns
+    -------
+    Optional[Dict]
+        Width, height, size, hash and creation time or None if file is missing or unreadable
+    """
+    try:
+        data = path.read_bytes()
+        mtime = os.stat(path).st_mtime
+        with PILImage.open(BytesIO(data)) as image:
+            width, height = image.size
+    except OSError:
+        return None
+    return {'width': width,
+            'height': height,
+            'size': len(data),
+            'hash': hashlib.sha256(data).hexdigest(),
+            'created_at': datetime.fromtimestamp(mtime, timezone.utc)}
+
+
+async def backfill(pool: concurrent.futures.Executor, batch: int) -> None:
+    """Fill metadata of ready images stored before metadata columns were added
+
+    Parameters
+    ----------
+    pool : Executor
+        Pool reading image files
+    batch : int
+        Rows per batch
+    """
+    loop = asyncio.get_running_loop()
+    path = config['images_path']
+    extension = config['images']['extension']
+    statement = update(Image.__table__).where(KEY == bindparam('_id'))
+    filled = missing = 0
+    after = None
+    while True:
+        query = (select(KEY)
+                 .where(Image.status == Status.READY, Image.size.is_(None))
+                 .order_by(KEY)
+                 .limit(batch))
+        if after is not None:
+            query = query.where(KEY > after)
+        async with ENGINE.connect() as conn:
+            ids = (await conn.execute(query)).scalars().all()
+        if not ids:
+            break
+        after = ids[-1]
+        found = await asyncio.gather(*(loop.run_in_executor(pool, read_metadata, path / f'{_id}.{extension}')
+                                       for _id in ids))
+        rows: List[Dict] = []
+        for _id, metadata in zip(ids, found):
+            if metadata is None:
+                missing += 1
+                print(f'Image {_id} has no readable stored file', file=sys.stderr)
+                continue
+            rows.append(dict(metadata, _id=_id))
+        if rows:
+            async with ENGINE.begin() as conn:
+                await conn.execute(statement, rows)
+            filled += len(rows)
+        print(f'{filled} images filled, {missing} without file')
+
+
+async def migrate(args: argparse.Namespace) -> None:
+    """Upgrade schema and fill metadata of existing images
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Command line arguments
+    """
+    with concurrent.futures.ThreadPoolExecutor(args.threads) as pool:
+        try:
+            await upgrade_schema()
+            await backfill(pool, args.batch)
+        finally:
+            await ENGINE.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run upgrade
+    """
+    parser = argparse.ArgumentParser(description='Upgrade database and fill metadata of existing images')
+    parser.add_argument('--batch', type=int, default=500, help='Rows per batch')
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 4, help='Threads reading image files')
+    args = parser.parse_args()
+    # https://stackoverflow.com/questions/65682221/runtimeerror-exception-ignored-in-function-proactorbasepipetransport
+    asyncio.get_event_loop().run_until_complete(migrate(args))
+
+
+if __name__ == '__main__':
+    main()
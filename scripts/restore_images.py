@@ -0,0 +1,109 @@
+"""Images restore
+
+Restores archive written by export script or export endpoint. Image files
+are written by pool of threads, rows of each manifest are inserted with one
+multi-row INSERT after files of their chunk are written. Existing rows are
+kept, so archives may be restored again and incremental archives are
+restored in export order
+
+    Example:
+
+        python ./scripts/restore_images.py full.tar nightly-2024-01-02.tar
+        python ./scripts/restore_images.py - --threads 16 < increment.tar
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tarfile
+import argparse
+import concurrent.futures
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).parents[1]))
+
+from image_converter.settings import config
+from image_converter.images.formats import write_file
+from image_converter.backend.db.settings import ENGINE
+from image_converter.backend.export import IMAGES, MANIFEST, CURSOR, FILE_NAME, load_row, restore_rows
+
+
+async def restore(archive: str, pool: concurrent.futures.Executor, pending: int) -> int:
+    """Restore archive read as stream
+
+    Parameters
+    ----------
+    archive : str
+        Archive path, - for stdin
+    pool : Executor
+        Pool writing image files
+    pending : int
+        Maximal number of files waiting for write
+
+    Returns
+    -------
+    int
+        Number of inserted rows
+    """
+    path = config['images_path']
+    path.mkdir(parents=True, exist_ok=True)
+    futures: List[concurrent.futures.Future] = []
+    inserted = 0
+    source = tarfile.open(fileobj=sys.stdin.buffer, mode='r|') if archive == '-' else tarfile.open(archive, mode='r|')
+    with source:
+        for member in source:
+            if not member.isfile():
+                continue
+            if member.name.startswith(IMAGES):
+                name = member.name[len(IMAGES):]
+                if not FILE_NAME.match(name):
+                    print(f'{archive}: skipped {member.name}', file=sys.stderr)
+                    continue
+                futures.append(pool.submit(write_file, path / name, source.extractfile(member).read()))
+                if len(futures) >= pending:
+                    futures.pop(0).result()
+            elif member.name.startswith(MANIFEST):
+                rows = [load_row(json.loads(line)) for line in source.extractfile(member).read().splitlines() if line]
+                for future in futures:
+                    future.result()
+                futures.clear()
+                inserted += await restore_rows(ENGINE, rows)
+                print(f'{archive}: {inserted} images restored', file=sys.stderr)
+            elif member.name == CURSOR:
+                print(f'{archive}: cursor {source.extractfile(member).read().decode()}', file=sys.stderr)
+    for future in futures:
+        future.result()
+    return inserted
+
+
+async def run_restore(args: argparse.Namespace) -> None:
+    """Restore archives in order
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Command line arguments
+    """
+    with concurrent.futures.ThreadPoolExecutor(args.threads) as pool:
+        try:
+            for archive in args.archives:
+                await restore(archive, pool, args.threads * 4)
+        finally:
+            await ENGINE.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run restore
+    """
+    parser = argparse.ArgumentParser(description='Restore images and their rows from export archives')
+    parser.add_argument('archives', nargs='+', help='Archives in export order, - for stdin')
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 4, help='Threads writing image files')
+    args = parser.parse_args()
+    # https://stackoverflow.com/questions/65682221/runtimeerror-exception-ignored-in-function-proactorbasepipetransport
+    asyncio.get_event_loop().run_until_complete(run_restore(args))
+
+
+if __name__ == '__main__':
+    main()